@@ -16,7 +16,8 @@
 
 3. 채널 및 게시판
    - 프로젝트 채널 글 등록/수정/삭제
-   - 이미지 및 파일 업로드
+   - 이미지 및 파일 업로드 (upload_utils.store_images: 청크 단위 저장, 매직 바이트/크기 검사)
+   - 업로드 파일 정리 실행 / dry-run 보고 (최종관리자, file_gc.py)
 
 4. 알림 관리
    - 초대 요청, 승인, 정산 등의 이벤트에 따른 알림 등록
@@ -30,25 +31,31 @@
 비고
 ----------------------------------------------------------------------
 - DB 연결은 pymysql 사용 (DictCursor)
-- SQL 실행 후 커넥션 반드시 close
+- DB 세션은 `conn = Depends(get_db)` 로 요청당 하나, commit/rollback 은 get_db 가 처리
 - 일부 요청은 FormData 및 UploadFile 병행 처리
 ----------------------------------------------------------------------
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Body, UploadFile, File, Form, Query
+from fastapi import APIRouter, HTTPException, Depends, Body, UploadFile, File, Form, Query, BackgroundTasks
 from pydantic import BaseModel
 from datetime import datetime
 import pymysql
-from database import db_config
+from db_pool import get_db, DBSession
 import shutil, os
-from jwt_auth import get_current_user
+from jwt_auth import get_current_user, user_changed
 from typing import Optional
 from typing import List
-from config import FRONT_BASE_URL
+from config import FRONT_BASE_URL, UPLOAD_ROOT
+from alert_utils import add_alert, fan_out_team_alert, chat_alert_counts
+from upload_utils import store_images, remove_files, register_files, release_files, file_url
+from image_variants import variant_urls
+from file_gc import file_gc, GCLocked
+from board_paging import keyset_condition, paginate, board_totals
+from fastapi.concurrency import run_in_threadpool
 import json
 
 router = APIRouter( tags=["Admin"])
-UPLOAD_DIR = "C:/Users/admin/uploads"
+UPLOAD_DIR = UPLOAD_ROOT
 
 # --- 필요한 모델 ---
 class GradeUpdate(BaseModel):
@@ -104,25 +111,21 @@ class Portfolio(BaseModel):
 # --- 관리자(Admin, PM) 전용 라우터 ---
 
 @router.get("/users")
-def get_all_users(user: dict = Depends(get_current_user)):
+def get_all_users(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("SELECT user_id, nickname, email, grade, role, status, del_yn FROM user WHERE del_yn = 'N'")
             return cursor.fetchall()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/stats")
-def get_admin_stats(user: dict = Depends(get_current_user)):
+def get_admin_stats(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("SELECT COUNT(*) as count FROM user WHERE del_yn = 'N'")
             user_count = cursor.fetchone()["count"]
@@ -136,15 +139,12 @@ def get_admin_stats(user: dict = Depends(get_current_user)):
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/ongoing_projects")
-def get_ongoing_projects(user: dict = Depends(get_current_user)):
+def get_ongoing_projects(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT project_id, title, status
@@ -155,15 +155,12 @@ def get_ongoing_projects(user: dict = Depends(get_current_user)):
             return cursor.fetchall()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.put("/users/{user_id}/grade")
-def update_user_grade(user_id: str, update: GradeUpdate, user: dict = Depends(get_current_user)):
+def update_user_grade(user_id: str, update: GradeUpdate, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             cursor.execute("""
                 UPDATE user 
@@ -172,19 +169,16 @@ def update_user_grade(user_id: str, update: GradeUpdate, user: dict = Depends(ge
                     update_dt = NOW()
                 WHERE user_id = %s
             """, (update.grade, user["user_id"], user_id))
-        conn.commit()
+        user_changed(conn, user_id, revoke_tokens=False)  # 등급은 토큰에 없음
         return {"message": "사용자 등급이 수정되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.put("/users/{user_id}/role")
-def update_user_role(user_id: str, update: RoleUpdate, user: dict = Depends(get_current_user)):
+def update_user_role(user_id: str, update: RoleUpdate, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] != "R04":
         raise HTTPException(status_code=403, detail="최종관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
 
             # ✅ R02(개발자)로 변경될 경우, 해당 유저가 PM으로 있는 프로젝트 조회
@@ -205,22 +199,19 @@ def update_user_role(user_id: str, update: RoleUpdate, user: dict = Depends(get_
             # ✅ R03(PM)으로 변경될 경우 그냥 PM으로 바꾸기
             else:
                 cursor.execute("UPDATE user SET role = %s WHERE user_id = %s", (update.role, user_id))
-        conn.commit()
+        user_changed(conn, user_id)
         return {"message": "사용자 역할이 수정되었습니다."}
     except HTTPException as http_err:
         raise http_err  # ✅ HTTP 예외는 그대로 던짐!
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 # 정지
 @router.delete("/users/{user_id}/delete")
-def delete_user(user_id: str, user: dict = Depends(get_current_user)):
+def delete_user(user_id: str, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             cursor.execute("""
                 UPDATE user 
@@ -229,21 +220,18 @@ def delete_user(user_id: str, user: dict = Depends(get_current_user)):
                     update_dt = NOW()
                 WHERE user_id = %s
             """, (user["user_id"], user_id))
-        conn.commit()
+        user_changed(conn, user_id)
         return {"message": "사용자가 정지되었습니다."}
     except Exception as e:
         print("❌ 삭제 중 오류 발생:", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 # 복구
 @router.put("/users/{user_id}/recover")
-def recover_user(user_id: str, user: dict = Depends(get_current_user)):
+def recover_user(user_id: str, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             cursor.execute("""
                 UPDATE user 
@@ -253,20 +241,17 @@ def recover_user(user_id: str, user: dict = Depends(get_current_user)):
                 WHERE user_id = %s
             """, (user["user_id"], user_id))
 
-        conn.commit()
+        user_changed(conn, user_id, revoke_tokens=False)
         return {"message": "사용자가 복구되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 @router.get("/projects")
-def get_all_projects(user: dict = Depends(get_current_user)):
+def get_all_projects(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             sql = """
                 SELECT 
@@ -284,16 +269,13 @@ def get_all_projects(user: dict = Depends(get_current_user)):
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/my-projects")
-def get_pm_projects(user: dict = Depends(get_current_user)):
+def get_pm_projects(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             sql = """
                 SELECT 
@@ -311,16 +293,13 @@ def get_pm_projects(user: dict = Depends(get_current_user)):
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.put("/projects/assign-pm")
-def assign_pm(data: PMAssignRequest, user: dict = Depends(get_current_user)):
+def assign_pm(data: PMAssignRequest, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             # pm_id를 현재 로그인한 사용자로 지정
             cursor.execute("UPDATE project SET pm_id = %s, status = '검토 중', update_dt = NOW(), update_id = %s WHERE project_id = %s",
@@ -341,78 +320,49 @@ def assign_pm(data: PMAssignRequest, user: dict = Depends(get_current_user)):
                     SET pm_id = %s, update_dt = NOW(), update_id = %s
                     WHERE project_id = %s AND del_yn = 'N'
                 """, (user["user_id"], user["user_id"], data.project_id))
-        conn.commit()
         return {"message": "PM으로 지정되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
         
 @router.put("/projects/{project_id}")
-def update_project(project_id: int, project: ProjectFlexibleUpdate, user:dict = Depends(get_current_user)):    
+def update_project(project_id: int, project: ProjectFlexibleUpdate, user:dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):    
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
         
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             if project.status is not None:
                 link = f"{FRONT_BASE_URL}/client/list"
-                # ⭐ 상태가 '진행중' (W02)일 경우 클라이언트에게 알림 전송
-                if project.status == 'W02':
-                    
-                    cursor.execute("""
-                        INSERT INTO alerts (
-                            target_user, title, message, link, create_dt, create_id
-                        )
-                        SELECT
-                            p.client_id,
-                            '시스템 알람',
-                            '등록하신 프로젝트가 시작되었습니다.',
-                            %s,
-                            NOW(),
-                            %s
-                        FROM project p
-                        WHERE p.project_id = %s
-                    """, (link, user["user_id"], project_id))
-                if project.status == 'W03':
-                    cursor.execute("""
-                        INSERT INTO alerts (
-                            target_user, title, message, link, create_dt, create_id
-                        )
-                        SELECT
-                            p.client_id,
-                            '시스템 알람',
-                            '프로젝트가 완료되었습니다.',
-                            %s,
-                            NOW(),
-                            %s
-                        FROM project p
-                        WHERE p.project_id = %s
-                    """, (link,user["user_id"], project_id))
+                # ⭐ 상태가 '진행중' (W02) / '완료' (W03)일 경우 클라이언트에게 알림 전송
+                status_messages = {
+                    'W02': '등록하신 프로젝트가 시작되었습니다.',
+                    'W03': '프로젝트가 완료되었습니다.',
+                }
+                if project.status in status_messages:
+                    cursor.execute("SELECT client_id FROM project WHERE project_id = %s", (project_id,))
+                    target = cursor.fetchone()
+                    if target:
+                        add_alert(conn, target["client_id"], '시스템 알람', status_messages[project.status],
+                                  link, user["user_id"])
                         
                 cursor.execute("UPDATE project SET status = %s WHERE project_id = %s", (project.status, project_id))
 
             if project.progress is not None:
                 cursor.execute("UPDATE project SET progress = %s WHERE project_id = %s", (project.progress, project_id))
 
-        conn.commit()
         return {"message": "프로젝트 업데이트 완료"}
     except Exception as e:
         import traceback
         print("❌ 예외 발생:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/project/{project_id}/members/without-pm")
-def get_members_exclude_pm(project_id: int, user: dict = Depends(get_current_user)):
+def get_members_exclude_pm(project_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
 
             # 멤버 조회
@@ -438,8 +388,6 @@ def get_members_exclude_pm(project_id: int, user: dict = Depends(get_current_use
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 @router.post("/members/filter")
 def filter_member_users(
     ranks: List[str] = Body(default=[]),
@@ -447,13 +395,13 @@ def filter_member_users(
     keyword: str = Body(default=""),
     page: int = Body(default=1),
     page_size: int = Body(default=5),
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)
 ):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             offset = (page - 1) * page_size
             base_sql = """
@@ -507,8 +455,6 @@ def filter_member_users(
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.post("/client/filter")
 def filter_client_users(
@@ -516,12 +462,12 @@ def filter_client_users(
     page: int = Body(default=1),
     page_size: int = Body(default=5),
     user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)
 ):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             offset = (page - 1) * page_size
             base_sql = """
@@ -559,16 +505,13 @@ def filter_client_users(
             }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 @router.delete("/projects/{project_id}/delete")
-def delete_project(project_id: str, user: dict = Depends(get_current_user)):
+def delete_project(project_id: str, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             cursor.execute("""
                 UPDATE project 
@@ -577,21 +520,17 @@ def delete_project(project_id: str, user: dict = Depends(get_current_user)):
                     update_dt = NOW()
                 WHERE project_id = %s
             """, (user["user_id"], project_id))
-        conn.commit()
         return {"message": "프로젝트가 삭제되었습니다."}
     except Exception as e:
         print("❌ 삭제 중 오류 발생:", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.post("/notices")
-def create_notice(notice: Notice, user: dict = Depends(get_current_user)):
+def create_notice(notice: Notice, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             sql = """
                 INSERT INTO notices (title, target_type, content, create_dt, create_id)
@@ -599,17 +538,20 @@ def create_notice(notice: Notice, user: dict = Depends(get_current_user)):
             """
             now=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             cursor.execute(sql, (notice.title, notice.target_type, notice.content, now, user["user_id"]))
-        conn.commit()
+            notice_id = cursor.lastrowid
+
+        # 클라이언트/팀원 전체에 공용 알림 (역할별 한 행, 확인 상태는 사용자별 alert_read_state)
+        for audience, path in (("R01", "client"), ("R02", "member")):
+            add_alert(conn, audience, "공지사항", f"새 공지사항이 등록되었습니다: {notice.title}",
+                      f"{FRONT_BASE_URL}/{path}/notice/{notice_id}", user["user_id"],
+                      value_id=notice_id, category="notice")
         return {"message": "공지사항이 등록되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/notices")
-def get_notices(page: int = 1, keyword: str = "", user: dict = Depends(get_current_user)):
+def get_notices(page: int = 1, keyword: str = "", user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             page_size = 10
             offset = (page - 1) * page_size
@@ -643,44 +585,39 @@ def get_notices(page: int = 1, keyword: str = "", user: dict = Depends(get_curre
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 @router.get("/notices/{notice_id}")
-def get_notice_detail(notice_id: int, user: dict = Depends(get_current_user)):
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("SELECT notice_id, title, target_type, content, create_dt FROM notices WHERE notice_id = %s", (notice_id,))
-            result = cursor.fetchone()
-        if not result:
-            raise HTTPException(status_code=404, detail="공지사항을 찾을 수 없습니다.")
-        return result
-    finally:
-        conn.close()
+def get_notice_detail(notice_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("SELECT notice_id, title, target_type, content, create_dt FROM notices WHERE notice_id = %s", (notice_id,))
+        result = cursor.fetchone()
+    if not result:
+        raise HTTPException(status_code=404, detail="공지사항을 찾을 수 없습니다.")
+    return result
 
 @router.delete("/notices/{notice_id}/delete")
-def delete_notice(notice_id: str, user: dict = Depends(get_current_user)):
+def delete_notice(notice_id: str, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             cursor.execute("UPDATE notices SET del_yn = 'Y' WHERE notice_id = %s", (notice_id,))
-        conn.commit()
+            # 공지 알림도 함께 내림
+            cursor.execute("""
+                UPDATE alerts
+                SET del_yn = 'Y', update_dt = NOW(), update_id = %s
+                WHERE category = 'notice' AND value_id = %s AND del_yn = 'N'
+            """, (user["user_id"], notice_id))
         return {"message": "공지가 삭제되었습니다."}
     except Exception as e:
         print("❌ 삭제 중 오류 발생:", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 @router.put("/notices/{notice_id}/update")
-def update_notice(notice_id: int, notice: Notice, user:dict = Depends(get_current_user)):    
+def update_notice(notice_id: int, notice: Notice, user:dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):    
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             sql = """
                  UPDATE notices
@@ -693,20 +630,16 @@ def update_notice(notice_id: int, notice: Notice, user:dict = Depends(get_curren
             """
             now=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             cursor.execute(sql, (notice.title, notice.target_type, notice.content, now, user["user_id"], notice_id))
-        conn.commit()
         return {"message": "공지사항이 수정되었습니다."}
     except Exception as e:
         import traceback
         print("❌ 예외 발생:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/project/{project_id}/projecttitle")
-def get_project_title(project_id: int, user: dict = Depends(get_current_user)):
+def get_project_title(project_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT title
@@ -724,15 +657,12 @@ def get_project_title(project_id: int, user: dict = Depends(get_current_user)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        conn.close()
 
 @router.get("/project/{project_id}/members")
-def get_project_members(project_id: int, user: dict = Depends(get_current_user)):
+def get_project_members(project_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT u.user_id, u.nickname
@@ -755,212 +685,138 @@ def get_project_members(project_id: int, user: dict = Depends(get_current_user))
             if pm and all(u["user_id"] != pm.get("user_id") for u in members):
                 members.append(pm)
 
-            # 🔁 각 멤버마다 team_member_id, 알림 수 조회
+            # 🔁 멤버별 team_member_id, 알림 수를 한 번에 조회 (멤버마다 쿼리하지 않음)
+            counts = {}
+            if pm_id is not None:
+                for row in chat_alert_counts(cursor, project_id, pm_id):
+                    counts.setdefault(row["user_id"], row)
             for member in members:
-                 # ✅ team_member_id 조회
-                cursor.execute("""
-                    SELECT team_member_id
-                    FROM team_member
-                    WHERE project_id = %s
-                      AND user_id = %s
-                      AND pm_id = %s
-                      AND del_yn = 'N'
-                """, (project_id, member["user_id"], pm_id))
-                team_member = cursor.fetchone()
-                member["team_member_id"] = team_member["team_member_id"] if team_member else None
-                
-                # ✅ 알림 수 조회
-                cursor.execute("""
-                    SELECT COUNT(*) as count
-                    FROM alerts
-                    WHERE target_user = ''
-                      AND create_id = %s
-                      AND value_id = %s
-                      AND category = 'chat'
-                      AND del_yn = 'N'
-                """, (member["user_id"],member["team_member_id"]))
-                count_result = cursor.fetchone()
-                member["count"] = count_result["count"] if count_result else 0
+                row = counts.get(member["user_id"])
+                member["team_member_id"] = row["team_member_id"] if row else None
+                member["count"] = row["member_unread"] if row else 0
 
             return {"members": members, "pm_id": pm_id}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.delete("/project/{project_id}/member/{user_id}")
-def remove_member_from_project(project_id: int, user_id: str, user: dict = Depends(get_current_user)):
+def remove_member_from_project(project_id: int, user_id: str, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             cursor.execute("""
                 UPDATE team_member
                 SET del_yn = 'Y'
                 WHERE project_id = %s AND user_id = %s
             """, (project_id, user_id))
-        conn.commit()
         return {"message": "팀원 삭제 완료"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.post("/projectchannel/{project_id}/create")
 async def create_project_channel(
     project_id: int,
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     user_id: str = Form(...),
     content: str = Form(...),
     value_id: int = Form(...),
     category: str = Form(...),
     files: Optional[List[UploadFile]] = File(None),
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)
 ):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
-    allowed_types = {"image/jpeg","image/jpg", "image/png", "image/gif", "image/webp"}
-    UPLOAD_DIR = "C:/Users/admin/uploads/projectchannel"
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    # 📎 이미지 파일 먼저 저장 (청크 단위, 쓰기는 스레드풀) → 형식/크기 검사에 걸리면 글도 등록하지 않음
+    stored = await store_images(files)
 
-    try:
-        conn = pymysql.connect(**db_config)
+    def save_post():
+        # pymysql 호출은 이벤트 루프 밖(스레드풀)에서 실행
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            link = f"{FRONT_BASE_URL}/client/list"
             # 🔸 게시글 등록
             cursor.execute("""
                 INSERT INTO project_channel (title, user_id, content, create_dt, create_id, value_id, category)
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
             """, (title, user_id, content, now, user["user_id"], value_id, category))
             channel_id = cursor.lastrowid
+            conn.after_commit(lambda: board_totals.invalidate(category, value_id))
 
-            # 📎 이미지 파일 저장
-            if files:
-                for file in files:
-                    if file.content_type not in allowed_types:
-                        raise HTTPException(status_code=400, detail="이미지 파일만 등록 가능합니다.")
-
-                    filename = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}"
-                    filepath = os.path.join(UPLOAD_DIR, filename)
+            register_files(cursor, channel_id, stored, user["user_id"])
 
-                    with open(filepath, "wb") as buffer:
-                        shutil.copyfileobj(file.file, buffer)
-
-                    cursor.execute("""
-                        INSERT INTO post_file (channel_id, file_name, file_path, create_dt, create_id, del_yn)
-                        VALUES (%s, %s, %s, %s, %s, 'N')
-                    """, (channel_id, file.filename, filepath, now, user["user_id"]))
-
-            # 프로젝트에 참가한 팀멤버아이디 조회
-                cursor.execute("""
-                    SELECT user_id
-                    FROM team_member 
-                    WHERE project_id = %s
-                    AND del_yn = 'N'
-                """, (project_id,))
-                team_members = cursor.fetchall()
-
-            # 🔔 알림 전송 (이 부분은 그린 코드 그대로!)
+            # 🔔 알림 전송
             if category == "board01":
-                cursor.execute("""
-                    SELECT user_id
-                    FROM team_member 
-                    WHERE project_id = %s
-                    AND del_yn = 'N'
-                """, (project_id,))
-                team_members = cursor.fetchall()
+                # 팀원 전체 알림은 응답 후 INSERT ... SELECT 한 번으로 (팀 인원수와 상관없이 등록 속도 일정)
                 link1 = f"{FRONT_BASE_URL}/member/channel/{project_id}/common"
-                for member in team_members:
-                    target_user = member["user_id"]
-                    cursor.execute("""
-                        INSERT INTO alerts (target_user, value_id, category, title, message, link, create_dt, create_id)
-                        VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
-                    """, (
-                        target_user,
-                        project_id,
-                        "commonChat",
-                        "프로젝트 공지",
-                        "프로젝트에서 PM이 공지사항을 작성하였습니다.",
-                        link1,
-                        user["user_id"]
-                    ))
+                background_tasks.add_task(
+                    fan_out_team_alert, project_id, "프로젝트 공지", "프로젝트에서 PM이 공지사항을 작성하였습니다.",
+                    link1, user["user_id"], value_id=project_id, category="commonChat",
+                )
             else:
                 link2 = f"{FRONT_BASE_URL}/member/channel/{project_id}/pm/{user_id}"
-                cursor.execute("""
-                    INSERT INTO alerts (target_user, value_id, category, title, message, link, create_dt, create_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
-                """, (
-                    "",
-                    value_id,
-                    "chat",
-                    "프로젝트 PM",
-                    "프로젝트에서 PM이 개인채널에 글을 작성하였습니다.",
-                    link2,
-                    user["user_id"]
-                ))
-
-        conn.commit()
+                # 개인채널 글 → 채널 상대(팀원)에게 실시간 배지 갱신
+                add_alert(conn, "", "프로젝트 PM", "프로젝트에서 PM이 개인채널에 글을 작성하였습니다.",
+                          link2, user["user_id"], value_id=value_id, category="chat", notify_users=[user_id])
+
+    try:
+        await run_in_threadpool(save_post)
         return {"message": "게시글과 이미지가 등록되었습니다."}
     except Exception as e:
+        await run_in_threadpool(conn.rollback)  # file_blob 잠금부터 풀고 파일 정리
+        await run_in_threadpool(remove_files, stored)
+        if isinstance(e, HTTPException):
+            raise
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
-
 
 @router.get("/projectchannel/{channel_id}/view")
-def get_project_channel_detail(channel_id: int, user: dict = Depends(get_current_user)):
-
-    conn = pymysql.connect(**db_config)
-    try:
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            # 채널 게시글 정보 조회
-            cursor.execute("""
-                SELECT channel_id, title, content, user_id, create_dt, value_id, category, create_id
-                FROM project_channel
-                WHERE channel_id = %s AND del_yn = 'N'
-            """, (channel_id,))
-            channel = cursor.fetchone()
-
-            if not channel:
-                raise HTTPException(status_code=404, detail="게시글이 존재하지 않습니다")
+def get_project_channel_detail(channel_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        # 채널 게시글 정보 조회
+        cursor.execute("""
+            SELECT channel_id, title, content, user_id, create_dt, value_id, category, create_id
+            FROM project_channel
+            WHERE channel_id = %s AND del_yn = 'N'
+        """, (channel_id,))
+        channel = cursor.fetchone()
+
+        if not channel:
+            raise HTTPException(status_code=404, detail="게시글이 존재하지 않습니다")
+
+        # 첨부 이미지 조회 (썸네일/WebP 변환 상태 포함)
+        cursor.execute("""
+            SELECT pf.file_id, pf.file_name, pf.file_path, j.status AS job_status
+            FROM post_file pf
+            LEFT JOIN image_job j ON j.content_hash = pf.content_hash
+            WHERE pf.channel_id = %s AND pf.del_yn = 'N'
+        """, (channel_id,))
+        images = cursor.fetchall()
+
+        # 파일 경로를 URL로 바꿔주기 (프론트에서 쓸 수 있게!)
+        # thumb_url(미리보기) / view_url(상세) 은 변환이 끝났으면 WebP, 아니면 원본
+        for img in images:
+            img.update(variant_urls(img["file_path"], img.pop("job_status")))
+            img["file_path"] = file_url(img["file_path"])
 
-            # 첨부 이미지 조회
-            cursor.execute("""
-                SELECT file_id, file_name, file_path
-                FROM post_file
-                WHERE channel_id = %s AND del_yn = 'N'
-            """, (channel_id,))
-            images = cursor.fetchall()
-
-            # 파일 경로를 URL로 바꿔주기 (프론트에서 쓸 수 있게!)
-            for img in images:
-                if img["file_path"].startswith("C:/Users/admin/uploads"):
-                    img["file_path"] = img["file_path"].replace(
-                        "C:/Users/admin/uploads", "http://localhost:8001/static"
-                    )
-
-            return {
-                "channel": channel,
-                "images": images
-            }
-    finally:
-        conn.close()
+        return {
+            "channel": channel,
+            "images": images
+        }
 
 
 @router.get("/projectchannel/{channel_id}")
-def get_channel_by_id(channel_id: int, user: dict = Depends(get_current_user)):
+def get_channel_by_id(channel_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT channel_id, title, user_id, content,
@@ -978,23 +834,25 @@ def get_channel_by_id(channel_id: int, user: dict = Depends(get_current_user)):
     except Exception as e:
         print("❌ 단건 조회 예외:", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.put("/projectchannel/{channel_id}/update")
-def update_project_channel(
+async def update_project_channel(
     channel_id: int,
     title: str = Form(...),
     user_id: str = Form(...),
     content: str = Form(...),
     delete_ids: Optional[List[int]] = Form(None),  # 삭제할 기존 이미지 file_id 리스트
     files: Optional[List[UploadFile]] = File(None),
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)
 ):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
-    try:
-        conn = pymysql.connect(**db_config)
+
+    # 새 이미지 파일 먼저 저장 (내용 주소, 같은 이미지는 한 번만 저장)
+    stored = await store_images(files)
+
+    def save_post():
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             # 1. 게시글 존재 & 작성자 확인
             cursor.execute("""
@@ -1016,68 +874,60 @@ def update_project_channel(
                 WHERE channel_id = %s
             """, (title, user_id, content, user["user_id"], channel_id))
 
-            # 3. 삭제할 이미지 파일 처리
-            for file_id in delete_ids or []:
-                cursor.execute("SELECT file_path FROM post_file WHERE file_id = %s", (file_id,))
-                result = cursor.fetchone()
-                if result and os.path.exists(result["file_path"]):
-                    os.remove(result["file_path"])
-                cursor.execute("DELETE FROM post_file WHERE file_id = %s", (file_id,))
-
-            # 4. 새 이미지 파일 저장
-            if files:
-                upload_dir = "C:/Users/admin/uploads"
-                for file in files:
-                    filename = file.filename
-                    file_path = os.path.join(upload_dir, filename)
-                    with open(file_path, "wb") as buffer:
-                        shutil.copyfileobj(file.file, buffer)
-
-                    cursor.execute("""
-                        INSERT INTO post_file (channel_id, file_name, file_path)
-                        VALUES (%s, %s, %s)
-                    """, (channel_id, filename, file_path))
-
-        conn.commit()
+            # 3. 삭제할 이미지 연결 해제 (다른 글이 같이 쓰는 파일은 남김)
+            release_files(cursor, channel_id, delete_ids)
+
+            # 4. 새 이미지 연결
+            register_files(cursor, channel_id, stored, user["user_id"])
+
+    try:
+        await run_in_threadpool(save_post)
         return {"message": "공지사항이 성공적으로 수정되었습니다!"}
-    
+    except HTTPException:
+        await run_in_threadpool(conn.rollback)  # file_blob 잠금부터 풀고 파일 정리
+        await run_in_threadpool(remove_files, stored)
+        raise
     except Exception as e:
+        await run_in_threadpool(conn.rollback)  # file_blob 잠금부터 풀고 파일 정리
+        await run_in_threadpool(remove_files, stored)
         print("❌ 게시글 수정 중 오류:", e)
         raise HTTPException(status_code=500, detail="게시글 수정 중 서버 오류 발생")
     
-    finally:
-        conn.close()
 
 
 @router.delete("/projectchannel/{channel_id}/delete")
-def delete_notice(channel_id: str, user: dict = Depends(get_current_user)):
+def delete_notice(channel_id: str, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
-            cursor.execute("UPDATE project_channel SET del_yn = 'Y' WHERE channel_id = %s", (channel_id,))
-        conn.commit()
+            # update_dt 기준으로 보관 기간이 지나면 첨부 파일 정리 (file_gc.py)
+            cursor.execute("""
+                UPDATE project_channel SET del_yn = 'Y', update_dt = NOW(), update_id = %s WHERE channel_id = %s
+            """, (user["user_id"], channel_id))
+        conn.after_commit(board_totals.invalidate)
         return {"message": "글이 삭제되었습니다."}
     except Exception as e:
         print("❌ 삭제 중 오류 발생:", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/project/common/{project_id}")
 def get_project_common(
     project_id: int, 
     page: int = Query(1, ge=1),
-    page_size: int = Query(5, ge=1),
-    user: dict = Depends(get_current_user)):
+    page_size: int = Query(5, ge=1, le=100),
+    cursor_key: Optional[str] = Query(None, alias="cursor"),
+    include_total: bool = Query(True),
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
+    # cursor 가 있으면 keyset, 없으면 기존 page 방식
+    keyset_sql, keyset_params = keyset_condition("pc", cursor_key)
+    offset = 0 if cursor_key else (page - 1) * page_size
     try:
-        offset = (page - 1) * page_size
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            sql = """
+            sql = f"""
                 SELECT 
                     pc.channel_id, 
                     pc.title, 
@@ -1097,35 +947,33 @@ def get_project_common(
                   AND u.role IN ('R03', 'R04')
                   AND pc.user_id = pc.create_id
                   AND pc.value_id = %s
-                  AND pc.category = "board01"
-                ORDER BY pc.create_dt DESC
+                  AND pc.category = 'board01'
+                  {keyset_sql}
+                ORDER BY pc.create_dt DESC, pc.channel_id DESC
                 LIMIT %s OFFSET %s
             """
-            cursor.execute(sql, (project_id, page_size, offset))
-            items = cursor.fetchall()
+            cursor.execute(sql, (project_id, *keyset_params, page_size + 1, offset))
+            result = paginate(cursor.fetchall(), page_size)
 
-            count_sql = """
-                SELECT COUNT(*) AS total
-                FROM project_channel pc
-                JOIN user u ON pc.user_id = u.user_id
-                WHERE pc.del_yn = 'N'
-                  AND u.role IN ('R03', 'R04')
-                  AND pc.user_id = pc.create_id
-                  AND pc.value_id = %s
-                  AND pc.category = "board01"
-            """
-            cursor.execute(count_sql, (project_id,))
-            total = cursor.fetchone()["total"]
+            def count_total():
+                cursor.execute("""
+                    SELECT COUNT(*) AS total
+                    FROM project_channel pc
+                    JOIN user u ON pc.user_id = u.user_id
+                    WHERE pc.del_yn = 'N'
+                      AND u.role IN ('R03', 'R04')
+                      AND pc.user_id = pc.create_id
+                      AND pc.value_id = %s
+                      AND pc.category = "board01"
+                """, (project_id,))
+                return cursor.fetchone()["total"]
 
-            return {
-                "items": items,
-                "total": total
-            }
+            # 전체 글 수는 캐시 (페이지마다 COUNT 하지 않음)
+            result["total"] = board_totals.get(("board01", project_id), count_total) if include_total else None
+            return result
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/project/{project_id}/user/{user_id}/{teamMemberId}")
 def get_channel_messages(
@@ -1133,15 +981,19 @@ def get_channel_messages(
     user_id: str, 
     teamMemberId:int, 
     page: int = Query(1, ge=1),
-    page_size: int = Query(5, ge=1),
-    user: dict = Depends(get_current_user)):
+    page_size: int = Query(5, ge=1, le=100),
+    cursor_key: Optional[str] = Query(None, alias="cursor"),
+    include_total: bool = Query(True),
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
+    # cursor 가 있으면 keyset, 없으면 기존 page 방식
+    keyset_sql, keyset_params = keyset_condition("pc", cursor_key)
+    offset = 0 if cursor_key else (page - 1) * page_size
     try:
-        offset = (page - 1) * page_size
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            sql = """
+            sql = f"""
                 SELECT 
                     pc.channel_id,
                     pc.title,
@@ -1159,23 +1011,27 @@ def get_channel_messages(
                 JOIN user u ON pc.create_id = u.user_id
                 WHERE pc.del_yn = 'N'
                   AND pc.value_id = %s
-                  AND pc.category = "board02"
-                ORDER BY pc.create_dt DESC
+                  AND pc.category = 'board02'
+                  {keyset_sql}
+                ORDER BY pc.create_dt DESC, pc.channel_id DESC
                 LIMIT %s OFFSET %s
             """
-            cursor.execute(sql, (teamMemberId, page_size, offset))
-            items = cursor.fetchall()
+            cursor.execute(sql, (teamMemberId, *keyset_params, page_size + 1, offset))
+            result = paginate(cursor.fetchall(), page_size)
 
-            count_sql = """
-                SELECT COUNT(*) AS total
-                FROM project_channel pc
-                JOIN user u ON pc.create_id = u.user_id
-                WHERE pc.del_yn = 'N'
-                  AND pc.value_id = %s
-                  AND pc.category = "board02"
-            """
-            cursor.execute(count_sql, (teamMemberId,))
-            total = cursor.fetchone()["total"]
+            def count_total():
+                cursor.execute("""
+                    SELECT COUNT(*) AS total
+                    FROM project_channel pc
+                    JOIN user u ON pc.create_id = u.user_id
+                    WHERE pc.del_yn = 'N'
+                      AND pc.value_id = %s
+                      AND pc.category = "board02"
+                """, (teamMemberId,))
+                return cursor.fetchone()["total"]
+
+            # 전체 글 수는 캐시 (페이지마다 COUNT 하지 않음)
+            result["total"] = board_totals.get(("board02", teamMemberId), count_total) if include_total else None
 
             cursor.execute("""
                 SELECT pm_id FROM project
@@ -1184,78 +1040,63 @@ def get_channel_messages(
             pm_row = cursor.fetchone()
             pm_id = pm_row["pm_id"] if pm_row else None
 
-            return {
-                "items": items,
-                "pm_id": pm_id,
-                "total": total
-            }
+            result["pm_id"] = pm_id
+            return result
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 @router.post("/project/{project_id}/invite")
-def invite_member(project_id: int, body: dict = Body(...), user: dict = Depends(get_current_user)):
+def invite_member(project_id: int, body: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                   *
-                FROM join_requests
-                WHERE project_id = %s AND user_id = %s AND pm_id = %s AND status ='N' AND checking ='N' AND del_yn ='N'
-            """, (project_id, body["member_id"], user["user_id"]))
-            is_check = cursor.fetchall()
-
-            if is_check:
-                raise HTTPException(status_code=400, detail="이미 초대 요청이 존재합니다.")
-
-            cursor.execute("""
-                INSERT INTO join_requests (project_id, user_id, pm_id, checking, create_dt, del_yn)
-                VALUES (%s, %s, %s, 'N', NOW(), 'N')
-            """, (project_id, body["member_id"], user["user_id"]))
-            request_id = cursor.lastrowid
-
-            cursor.execute("""
-                SELECT * FROM team_member
-                WHERE project_id = %s AND user_id = %s AND del_yn = 'N'
-            """, (project_id, body["member_id"]))
-            if cursor.fetchone():
-                raise HTTPException(status_code=400, detail="이미 팀원으로 등록된 사용자입니다.")
-            link = f"{FRONT_BASE_URL}/member/projectlist"
-            # ✨ 알림 추가
-            cursor.execute("""
-                INSERT INTO alerts (
-                    target_user, value_id, category, title, message, link, answer_yn, create_dt, del_yn, create_id
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, 'N', NOW(), 'N', %s
-                )
-            """, (
-                body["member_id"],  # 알림 받을 대상
-                request_id,
-                "project",
-                "시스템 알람",
-                "PM이 프로젝트에 초대하였습니다. 프로젝트 목록에서 확인 후 수락 또는 거절할 수 있습니다.",
-                link,
-                user["user_id"]  # 알림 보낸 사람
-            ))
-
-        conn.commit()
-        return {"message": "초대 요청이 생성되었습니다."}
-    finally:
-        conn.close()
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT 
+               *
+            FROM join_requests
+            WHERE project_id = %s AND user_id = %s AND pm_id = %s AND status ='N' AND checking ='N' AND del_yn ='N'
+        """, (project_id, body["member_id"], user["user_id"]))
+        is_check = cursor.fetchall()
+
+        if is_check:
+            raise HTTPException(status_code=400, detail="이미 초대 요청이 존재합니다.")
+
+        cursor.execute("""
+            INSERT INTO join_requests (project_id, user_id, pm_id, checking, create_dt, del_yn)
+            VALUES (%s, %s, %s, 'N', NOW(), 'N')
+        """, (project_id, body["member_id"], user["user_id"]))
+        request_id = cursor.lastrowid
+
+        cursor.execute("""
+            SELECT * FROM team_member
+            WHERE project_id = %s AND user_id = %s AND del_yn = 'N'
+        """, (project_id, body["member_id"]))
+        if cursor.fetchone():
+            raise HTTPException(status_code=400, detail="이미 팀원으로 등록된 사용자입니다.")
+        link = f"{FRONT_BASE_URL}/member/projectlist"
+        # ✨ 알림 추가
+        add_alert(
+            conn,
+            body["member_id"],  # 알림 받을 대상
+            "시스템 알람",
+            "PM이 프로젝트에 초대하였습니다. 프로젝트 목록에서 확인 후 수락 또는 거절할 수 있습니다.",
+            link,
+            user["user_id"],  # 알림 보낸 사람
+            value_id=request_id,
+            category="project",
+            answer_yn="N",
+        )
+
+    return {"message": "초대 요청이 생성되었습니다."}
 
 @router.get("/project/{project_id}/invited-members")
-def get_invited_members(project_id: int, user: dict = Depends(get_current_user)):
+def get_invited_members(project_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT r.request_id, u.user_id, u.nickname, r.status, r.checking
@@ -1270,16 +1111,13 @@ def get_invited_members(project_id: int, user: dict = Depends(get_current_user))
             return {"invited": invited}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.post("/project/{project_id}/approve/{request_id}")
-def approve_member(project_id: int, request_id: int, user: dict = Depends(get_current_user)):
+def approve_member(project_id: int, request_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             # 초대 상태 확인
             cursor.execute("""
@@ -1325,19 +1163,15 @@ def approve_member(project_id: int, request_id: int, user: dict = Depends(get_cu
                 WHERE value_id = %s AND category="project"
             """, (user["user_id"], request_id))
 
-        conn.commit()
         return {"message": "팀원 등록 및 목록 제거 완료!"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 @router.post("/project/{project_id}/reject/{request_id}")
-def reject_member(project_id: int, request_id: int, user: dict = Depends(get_current_user)):
+def reject_member(project_id: int, request_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             cursor.execute("""
                 UPDATE join_requests
@@ -1352,18 +1186,14 @@ def reject_member(project_id: int, request_id: int, user: dict = Depends(get_cur
                 WHERE value_id = %s AND category="project"
             """, (user["user_id"], request_id))
 
-            conn.commit()
             return {"message": "요청이 거절되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 @router.get("/askList")
-def get_askList(user: dict = Depends(get_current_user)):
+def get_askList(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             sql = """
                 SELECT 
@@ -1384,15 +1214,12 @@ def get_askList(user: dict = Depends(get_current_user)):
             return items
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.post("/askCheck")
-def get_askCheck(payload: dict = Body(...) ,user: dict = Depends(get_current_user)):
+def get_askCheck(payload: dict = Body(...) ,user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             sql = """
                 UPDATE ask
@@ -1410,22 +1237,18 @@ def get_askCheck(payload: dict = Body(...) ,user: dict = Depends(get_current_use
                 WHERE value_id = %s AND category="ask"
             """, (user["user_id"], payload.get("ask_id")))
 
-            conn.commit()
 
             return {"message": "문의사항이 확인되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 
 
 @router.post("/projects")
-def create_project_as_admin(payload: dict = Body(...), user: dict = Depends(get_current_user)):
+def create_project_as_admin(payload: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
-    conn = pymysql.connect(**db_config)
     try:
         with conn.cursor() as cursor:
             cursor.execute("""
@@ -1454,20 +1277,16 @@ def create_project_as_admin(payload: dict = Body(...), user: dict = Depends(get_
                 payload.get("urgencyLevel"),
                 user["user_id"]                  # ✅ 현재 로그인한 관리자 ID
             ))
-        conn.commit()
         return {"message": "프로젝트가 등록되었습니다! (관리자 등록)"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/projects/{project_id}")
-def get_project_by_id(project_id: int, user: dict = Depends(get_current_user)):
+def get_project_by_id(project_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT project_id, title, description, category,
@@ -1485,16 +1304,13 @@ def get_project_by_id(project_id: int, user: dict = Depends(get_current_user)):
     except Exception as e:
         print("❌ 단건 조회 예외:", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.put("/projects/{project_id}/update")
-def update_project(project_id: int, payload: dict = Body(...), user: dict = Depends(get_current_user)):    
+def update_project(project_id: int, payload: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):    
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             sql = """
                 UPDATE project
@@ -1524,7 +1340,6 @@ def update_project(project_id: int, payload: dict = Body(...), user: dict = Depe
                 project_id
             ))
 
-        conn.commit()
         return {"message": "프로젝트가 수정되었습니다."}
 
     except Exception as e:
@@ -1532,18 +1347,15 @@ def update_project(project_id: int, payload: dict = Body(...), user: dict = Depe
         print("❌ 예외 발생:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 # ---------- 포트폴리오작성 ----------
 @router.post("/portfolioCreate")
-def portfolio_Create(data:Portfolio ,user: dict = Depends(get_current_user)):
+def portfolio_Create(data:Portfolio ,user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             checking = "Y" if data.checking else "N"
 
@@ -1573,47 +1385,39 @@ def portfolio_Create(data:Portfolio ,user: dict = Depends(get_current_user)):
                         portfolio_id, skill.code_id, skill.code_name, skill.parent_code, user["user_id"],
                     ))
 
-        conn.commit()
         return {"message": "포트폴리오 작성완료"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 # -----------특정 포트폴리오불러오기----------------
 @router.get("/portfolio/{portfolio_id}")
-def get_user_info(portfolio_id: int, user: dict = Depends(get_current_user)):
+def get_user_info(portfolio_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        
 
-        # 1. 포트폴리오 기본 정보 조회
-            cursor.execute("""
-                SELECT 
-                    *
-                FROM portfolio
-                WHERE portfolio_id = %s AND del_yn = 'N'
-            """, (portfolio_id,))
-            portfolio = cursor.fetchone()
+    # 1. 포트폴리오 기본 정보 조회
+        cursor.execute("""
+            SELECT 
+                *
+            FROM portfolio
+            WHERE portfolio_id = %s AND del_yn = 'N'
+        """, (portfolio_id,))
+        portfolio = cursor.fetchone()
 
-            if not portfolio:
-                raise HTTPException(status_code=404, detail="포트폴리오를 찾을 수 없습니다.")
+        if not portfolio:
+            raise HTTPException(status_code=404, detail="포트폴리오를 찾을 수 없습니다.")
 
-            return portfolio
-    finally:
-        conn.close()
+        return portfolio
 
 # ---------- 특정포트폴리오 선택되어있는기술불러오기 ----------
 @router.get("/portfolio/{portfolio_id}/tech-stacks")
-def get_portfolio_tech_stacks(portfolio_id: int, user: dict = Depends(get_current_user)):
+def get_portfolio_tech_stacks(portfolio_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             # 1. 포트폴리오에 등록된 기술의 code_id만 가져오기
             cursor.execute("""
@@ -1654,12 +1458,11 @@ def get_portfolio_tech_stacks(portfolio_id: int, user: dict = Depends(get_curren
 
 # ---------- 포트폴리오수정 ----------
 @router.post("/portfolioUpdate/{portfolio_id}")
-def portfolio_Update(portfolio_id:int, data:Portfolio ,user: dict = Depends(get_current_user)):
+def portfolio_Update(portfolio_id:int, data:Portfolio ,user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             checking = "Y" if data.checking else "N"
 
@@ -1702,22 +1505,18 @@ def portfolio_Update(portfolio_id:int, data:Portfolio ,user: dict = Depends(get_
                     WHERE portfolio_id = %s AND code_id = %s
                 """, (user["user_id"], portfolio_id, code))
 
-        conn.commit()
         return {"message": "포트폴리오 수정완료"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 # ---------- 포트폴리오삭제 ----------
 @router.post("/portfolioDelete/{portfolio_id}")
-def portfolio_Delete(portfolio_id:int, user: dict = Depends(get_current_user)):
+def portfolio_Delete(portfolio_id:int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
 
             # 1. 포트폴리오 기본 정보 삭제
@@ -1734,56 +1533,48 @@ def portfolio_Delete(portfolio_id:int, user: dict = Depends(get_current_user)):
                 WHERE portfolio_id = %s
             """, (user["user_id"], portfolio_id))
 
-        conn.commit()
         return {"message": "포트폴리오 삭제완료"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
         
 @router.get("/users/{user_id}")
-def get_user_info(user_id: str, user: dict = Depends(get_current_user)):
+def get_user_info(user_id: str, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     print("📌 요청된 user_id:", user_id)  # 이거 추가!
     print("📌 요청한 사람의 권한:", user["role"])  # 이거도!
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT u.user_id, u.nickname, u.email, u.role, u.phone, u.company, u.tech, u.experience, u.git, u.portfolio
-                FROM user u
-                WHERE u.user_id = %s AND del_yn = 'N'
-            """, (user_id,))
-            user_info = cursor.fetchone()
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("""
+            SELECT u.user_id, u.nickname, u.email, u.role, u.phone, u.company, u.tech, u.experience, u.git, u.portfolio
+            FROM user u
+            WHERE u.user_id = %s AND del_yn = 'N'
+        """, (user_id,))
+        user_info = cursor.fetchone()
 
-            if not user_info:
-                raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+        if not user_info:
+            raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
 
-            # 기술스택 추가 조회 (예: user_skills 테이블)
-            cursor.execute("""
-                SELECT s.code_id, c.code_name AS skill_name, s.years, s.is_fresher
-                FROM user_skills s
-                JOIN common_code c ON s.code_id = c.code_id
-                WHERE s.user_id = %s AND s.del_yn = 'N'
-            """, (user_id,))
-            user_info["skills"] = cursor.fetchall()
+        # 기술스택 추가 조회 (예: user_skills 테이블)
+        cursor.execute("""
+            SELECT s.code_id, c.code_name AS skill_name, s.years, s.is_fresher
+            FROM user_skills s
+            JOIN common_code c ON s.code_id = c.code_id
+            WHERE s.user_id = %s AND s.del_yn = 'N'
+        """, (user_id,))
+        user_info["skills"] = cursor.fetchall()
 
-        return user_info
-    finally:
-        conn.close()
+    return user_info
 
 
 @router.post("/pmRemove/{user_id}")
-def get_haveProject(user_id: str, user: dict = Depends(get_current_user)):
+def get_haveProject(user_id: str, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] != "R04":
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             # 1. 삭제되지않고 완료되지않은 보유 프로젝트 pmid null, 진행도도 null (PM 미지정)
             cursor.execute("""
@@ -1816,21 +1607,18 @@ def get_haveProject(user_id: str, user: dict = Depends(get_current_user)):
                 WHERE user_id = %s
             """, (user_id,))
 
-        conn.commit()
+        user_changed(conn, user_id)
         return {"message": f"{affected_rows}건의 프로젝트에서 PM이 제거되었습니다."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 
 @router.get("/project/pmCheck/{project_id}/{user_id}")
-def get_project_common(project_id: int, user_id: str, user: dict = Depends(get_current_user)):
+def get_project_common(project_id: int, user_id: str, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ("R03", "R04"):
         raise HTTPException(status_code=403, detail="관리자만 접근 가능합니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             sql = """
                 SELECT *
@@ -1845,5 +1633,13 @@ def get_project_common(project_id: int, user_id: str, user: dict = Depends(get_c
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
\ No newline at end of file
+
+@router.post("/files/gc")
+def run_file_gc(dry_run: bool = Query(True), user: dict = Depends(get_current_user)):
+    """업로드 파일 정리 (기본 dry-run: 정리 가능한 파일 수 / 용량만 보고)"""
+    if user["role"] != "R04":
+        raise HTTPException(status_code=403, detail="최종관리자만 접근 가능합니다.")
+    try:
+        return file_gc.run_gc(dry_run=dry_run)
+    except GCLocked:
+        raise HTTPException(status_code=409, detail="파일 정리 작업이 이미 실행 중입니다.")
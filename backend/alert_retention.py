@@ -0,0 +1,241 @@
+"""
+----------------------------------------------------------------------
+파일명     : alert_retention.py
+설명       : 지난 알림을 alerts_archive 로 옮기는 주기 정리 작업
+
+주요 기능
+----------------------------------------------------------------------
+1. 보관 대상 (`AlertRetention`)
+   - 삭제(del_yn = 'Y') 후 ALERT_ARCHIVE_DELETED_DAYS 일이 지난 알림
+   - 등록 후 ALERT_RETENTION_DAYS 일이 지난 알림
+     단, 아직 읽지 않은 chat 알림(target_user = '', del_yn = 'N')은 제외
+     (alert_counter 배지 수와 맞춰야 하므로 읽음 처리될 때까지 유지)
+   - 조건별로 따로 조회 (OR 로 묶으면 인덱스를 못 타고 배치마다 테이블 전체를 읽음)
+     · 삭제된 알림 : (del_yn, update_dt, create_dt) 인덱스 범위 조회 (update_dt 가 없는 행은 create_dt 기준)
+     · 오래된 알림 : create_dt 인덱스 범위 조회
+     (인덱스는 sql/alerts_retention_index.sql)
+   - 합쳐서 ALERT_RETENTION_BATCH 개씩
+     INSERT INTO alerts_archive ... SELECT → DELETE → COMMIT (배치마다 짧은 트랜잭션)
+
+2. 파티션 유지
+   - alerts 가 월별 RANGE 파티션이면 (sql/alerts_partitioning.sql)
+     다음 ALERT_PARTITION_AHEAD_MONTHS 개월 파티션을 pmax 에서 미리 분리
+   - 파티션이 없으면 아무것도 하지 않음
+
+3. 실행 관리
+   - 서버 시작 시 start(), 종료 시 stop() (main.py)
+   - 워커가 여러 개여도 GET_LOCK('alert_retention') 을 잡은 하나만 실행
+   - 처리 건수, 마지막 실행 시각, 오류 횟수 지표 제공 (/metrics)
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- ALERT_RETENTION_ENABLED        : 정리 작업 사용 여부 (Y/N, 기본 Y)
+- ALERT_RETENTION_INTERVAL       : 실행 주기(초) (기본 3600)
+- ALERT_RETENTION_DAYS           : 알림 보관 기간(일) (기본 90)
+- ALERT_ARCHIVE_DELETED_DAYS     : 삭제된 알림을 옮기기까지 기간(일) (기본 7)
+- ALERT_RETENTION_BATCH          : 배치 크기 (기본 1000)
+- ALERT_RETENTION_MAX_BATCHES    : 한 번 실행에서 처리할 최대 배치 수 (기본 100)
+- ALERT_PARTITION_AHEAD_MONTHS   : 미리 만들어 둘 월 파티션 수 (기본 2)
+
+비고
+----------------------------------------------------------------------
+- alerts_archive 는 sql/alerts_archive.sql 로 먼저 만들어야 함 (alerts 와 같은 컬럼 + archived_dt)
+- 공용 알림이 옮겨져도 alert_read_state 는 그대로 두면 됨 (없는 broadcast_seq 는 커서 정리 때 건너뜀)
+----------------------------------------------------------------------
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import date, datetime
+
+import pymysql
+from db_pool import get_connection
+
+RETENTION_ENABLED = os.getenv("ALERT_RETENTION_ENABLED", "Y").upper() == "Y"
+RETENTION_INTERVAL = float(os.getenv("ALERT_RETENTION_INTERVAL", "3600"))
+RETENTION_DAYS = int(os.getenv("ALERT_RETENTION_DAYS", "90"))
+ARCHIVE_DELETED_DAYS = int(os.getenv("ALERT_ARCHIVE_DELETED_DAYS", "7"))
+RETENTION_BATCH = int(os.getenv("ALERT_RETENTION_BATCH", "1000"))
+RETENTION_MAX_BATCHES = int(os.getenv("ALERT_RETENTION_MAX_BATCHES", "100"))
+PARTITION_AHEAD_MONTHS = int(os.getenv("ALERT_PARTITION_AHEAD_MONTHS", "2"))
+
+LOCK_NAME = "alert_retention"
+
+logger = logging.getLogger(__name__)
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+class AlertRetention:
+    def __init__(self, interval=RETENTION_INTERVAL, batch=RETENTION_BATCH, max_batches=RETENTION_MAX_BATCHES):
+        self.interval = interval
+        self.batch = batch
+        self.max_batches = max_batches
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        self._runs = 0
+        self._skipped = 0
+        self._errors = 0
+        self._archived = 0
+        self._partitions_added = 0
+        self._last_run = None
+        self._last_archived = 0
+
+    def _select_batch(self, cursor):
+        # 각 쿼리가 인덱스 하나로 범위 조회하도록 나눠서 차례로 실행, 합쳐서 batch 개까지
+        queries = (
+            # 삭제 후 보관 기간이 지난 알림
+            ("""
+                SELECT alert_id FROM alerts
+                WHERE del_yn = 'Y' AND update_dt < NOW() - INTERVAL %s DAY
+                ORDER BY update_dt
+                LIMIT %s
+            """, ARCHIVE_DELETED_DAYS),
+            # 읽음 처리(chat) 등 update_dt 없이 삭제된 알림
+            ("""
+                SELECT alert_id FROM alerts
+                WHERE del_yn = 'Y' AND update_dt IS NULL AND create_dt < NOW() - INTERVAL %s DAY
+                ORDER BY create_dt
+                LIMIT %s
+            """, ARCHIVE_DELETED_DAYS),
+            # 등록 후 보관 기간이 지난 알림 (안 읽은 chat 알림 제외)
+            ("""
+                SELECT alert_id FROM alerts
+                WHERE create_dt < NOW() - INTERVAL %s DAY
+                  AND NOT (target_user = '' AND category = 'chat' AND del_yn = 'N')
+                ORDER BY create_dt
+                LIMIT %s
+            """, RETENTION_DAYS),
+        )
+        ids = []
+        for sql, days in queries:
+            remaining = self.batch - len(ids)
+            if remaining <= 0:
+                break
+            cursor.execute(sql, (days, remaining))
+            ids.extend(row["alert_id"] for row in cursor.fetchall())
+        return list(dict.fromkeys(ids))  # 여러 조건에 걸린 알림은 한 번만
+
+    def _archive(self, conn, cursor) -> int:
+        total = 0
+        for _ in range(self.max_batches):
+            if self._stop.is_set():
+                break
+            ids = self._select_batch(cursor)
+            if not ids:
+                break
+            placeholders = ", ".join(["%s"] * len(ids))
+            cursor.execute(f"""
+                INSERT IGNORE INTO alerts_archive
+                SELECT a.*, NOW() FROM alerts a WHERE a.alert_id IN ({placeholders})
+            """, ids)
+            cursor.execute(f"DELETE FROM alerts WHERE alert_id IN ({placeholders})", ids)
+            conn.commit()
+            total += len(ids)
+            if len(ids) < self.batch:
+                break
+        return total
+
+    def _ensure_partitions(self, conn, cursor) -> int:
+        cursor.execute("""
+            SELECT PARTITION_NAME AS name
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'alerts' AND PARTITION_NAME IS NOT NULL
+        """)
+        names = {row["name"] for row in cursor.fetchall()}
+        if "pmax" not in names:
+            return 0  # 파티션 안 된 테이블
+
+        added = 0
+        this_month = date.today().replace(day=1)
+        for ahead in range(PARTITION_AHEAD_MONTHS + 1):
+            month = _add_months(this_month, ahead)
+            name = f"p{month:%Y%m}"
+            if name in names:
+                continue
+            upper = _add_months(month, 1)
+            cursor.execute(f"""
+                ALTER TABLE alerts REORGANIZE PARTITION pmax INTO (
+                    PARTITION {name} VALUES LESS THAN ('{upper:%Y-%m-%d}'),
+                    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+                )
+            """)
+            conn.commit()
+            logger.info("alerts 파티션 추가: %s", name)
+            added += 1
+        return added
+
+    def run_once(self) -> int:
+        """한 번 실행, 옮긴 알림 수 반환 (다른 워커가 실행 중이면 0)"""
+        conn = get_connection()
+        try:
+            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute("SELECT GET_LOCK(%s, 0) AS locked", (LOCK_NAME,))
+                if not cursor.fetchone()["locked"]:
+                    with self._lock:
+                        self._skipped += 1
+                    return 0
+                try:
+                    started = time.monotonic()
+                    added = self._ensure_partitions(conn, cursor)
+                    archived = self._archive(conn, cursor)
+                finally:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            if archived:
+                logger.info("알림 %d건 보관 처리 (%.1f초)", archived, time.monotonic() - started)
+            with self._lock:
+                self._runs += 1
+                self._archived += archived
+                self._partitions_added += added
+                self._last_archived = archived
+                self._last_run = datetime.now().isoformat(timespec="seconds")
+            return archived
+        finally:
+            conn.close()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                with self._lock:
+                    self._errors += 1
+                logger.exception("알림 정리 작업 실패")
+
+    def start(self):
+        if not RETENTION_ENABLED or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="alert-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": RETENTION_ENABLED,
+                "interval": self.interval,
+                "retention_days": RETENTION_DAYS,
+                "runs": self._runs,
+                "skipped": self._skipped,
+                "errors": self._errors,
+                "archived": self._archived,
+                "last_archived": self._last_archived,
+                "partitions_added": self._partitions_added,
+                "last_run": self._last_run,
+            }
+
+
+alert_retention = AlertRetention()
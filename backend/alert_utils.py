@@ -0,0 +1,693 @@
+"""
+----------------------------------------------------------------------
+파일명     : alert_utils.py
+설명       : 알림(alerts) 등록 및 실시간 전송(SSE) 공통 모듈
+
+주요 기능
+----------------------------------------------------------------------
+1. 알림 등록 (`add_alert`)
+   - alerts 테이블 INSERT 를 한 곳에서 처리
+   - 커밋이 끝난 뒤 연결된 사용자에게 바로 전송 (롤백되면 전송 안 함)
+   - target_user 가 역할 코드(공용 대상)면 그 역할 전체, "" (chat) 이면 notify_users 에게 전송
+   - chat 알림이면 같은 트랜잭션에서 alert_counter 도 +1
+
+   팀 전체 알림 (`fan_out_team_alert`)
+   - 프로젝트 팀원 전원에게 같은 알림을 INSERT ... SELECT 한 번으로 등록
+   - BackgroundTasks 로 응답 이후 별도 커넥션에서 실행 (게시글 등록 속도가 팀 인원수와 무관)
+
+2. 구독 관리 (`AlertBroker`)
+   - 키(user_id 또는 공용 대상 역할 코드) → 연결된 스트림 목록
+   - 커밋 후 콜백은 워커 스레드에서 실행되므로 call_soon_threadsafe 로 이벤트 루프에 전달
+   - 느린 연결은 큐가 가득 차면 끊음 → 브라우저 EventSource 가 Last-Event-ID 로 재연결해 이어받음
+
+3. 알림 목록 커서 (`encode_cursor`, `decode_cursor`)
+   - (create_dt, alert_id) 기준 keyset 페이지네이션용 불투명 커서 문자열
+   - alert_targets(user) : 내 알림 + 내 역할의 공용 알림 대상 목록
+
+4. 채널 chat 알림 배지 (alert_counter 테이블, sql/alert_counter.sql)
+   - (create_id, value_id, category) 별 안 읽은 수를 미리 유지 → 배지 조회는 PK 조회
+   - chat_alert_count(cursor, create_id, value_id) : 채널 하나의 배지 수
+   - chat_alert_counts(cursor, project_id, pm_id)  : 프로젝트 팀원 전체 배지 수
+     (team_member 에 alert_counter 를 PK 로 조인, alerts 를 집계하지 않음)
+     · member_unread : 팀원이 PM 채널에 쓴 글 (PM 이 볼 배지)
+     · pm_unread     : PM 이 팀원 채널에 쓴 글 (팀원이 볼 배지)
+
+   채널 읽음 지연 반영 (`ChatReadBuffer`)
+   - /common/alertsCheck 는 메모리에 (글쓴이, team_member_id) → 확인 시각만 기록하고 바로 응답
+   - 같은 채널을 여러 번 열어도 한 건으로 합침 (확인 시각은 가장 최근 값)
+   - CHAT_READ_FLUSH_SECONDS 마다 모아서 UPDATE 한 번 + 카운터 다시 계산
+     (확인 시각 이후에 온 알림은 읽음 처리하지 않음)
+   - 반영 전이라도 chat_alert_count / chat_alert_counts 는 확인한 채널을 확인 시각 이후에 온 알림 수로 응답
+     (카운터 대신 alerts 에서 최근 구간만 조회, 확인 직후 온 알림도 배지에 보임)
+
+5. 공용(broadcast) 알림 + 사용자별 확인 상태 (alert_read_state 테이블, sql/alert_read_state.sql)
+   - 역할 전체 대상 알림은 target_user = 역할 코드로 한 행만 저장
+     (R01 클라이언트, R02 팀원, R03 관리자(R03/R04 공용))
+   - 공용 알림마다 대상별 일련번호(broadcast_seq) 부여 (alert_broadcast_seq 테이블)
+     → 개인/chat 알림과 섞이지 않고 대상별로 1, 2, 3 ... 빈틈 없이 증가
+   - 사용자별 + 대상별 확인(삭제) 상태는 커서 + 비트맵으로 보관
+     · cursor_seq 이하의 공용 알림은 모두 확인한 것
+     · bitmap 의 i 번째 비트 = broadcast_seq (cursor_seq + 1 + i) 확인 여부
+     · 앞쪽이 모두 확인되면 커서를 당겨 비트맵을 줄임, 최대 ALERT_READ_BITMAP_BITS 비트 (공용 알림 개수 기준)
+   - visible_alerts_filter(cursor, user) : 내게 보이는 알림 WHERE 조건 (확인한 공용 알림 제외)
+     비트맵을 파라미터 하나로 넘겨 SQL 에서 비트 검사 (확인한 개수와 상관없이 파라미터 수 일정)
+   - dismiss_broadcasts(cursor, user, alert_ids) : 공용 알림 확인 처리 (본인 상태만 변경)
+   - dismiss_broadcasts_where(cursor, user, condition, params) : 조건에 맞는 공용 알림 일괄 확인
+   - init_read_state(cursor, user_id, role) : 가입 시 cursor_seq 를 내 대상(역할)의 마지막 broadcast_seq 로
+     (alert_broadcast_seq.last_seq, 가입 이전 공용 알림 제외 / alert_id 와는 무관)
+
+6. 스트림 보조 함수
+   - load_alerts_since(user, since) : 재연결 시 놓친 알림 조회
+     alert_id 는 INSERT 순서라 커밋 순서와 다를 수 있음 (작은 id 가 나중에 커밋될 수 있음)
+     → since 알림 등록 시각 - ALERT_STREAM_RESUME_OVERLAP_SECONDS 이후를 다시 보내고
+       클라이언트(useAlertStream.js)가 alert_id 로 중복 제거
+   - format_event(event, data, event_id) : SSE 메시지 문자열 생성
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- ALERT_STREAM_QUEUE_SIZE    : 연결당 대기 이벤트 최대 개수 (기본 100)
+- ALERT_STREAM_PING_SECONDS  : 연결 유지용 주석 전송 주기(초) (기본 25)
+- ALERT_STREAM_BACKLOG_LIMIT : 재연결 시 보내는 놓친 알림 최대 개수 (기본 100)
+- ALERT_STREAM_RESUME_OVERLAP_SECONDS : 재연결 시 since 알림 등록 시각보다 앞서 다시 보내는 구간(초) (기본 10)
+                               알림 등록 트랜잭션이 이보다 오래 걸려 늦게 커밋되면 재연결 시 놓칠 수 있음
+- ALERT_READ_BITMAP_BITS     : 공용 알림 확인 비트맵 최대 크기(비트) (기본 4096)
+                               확인하지 않은 공용 알림보다 4096개 넘게 새 공용 알림을 확인하면
+                               그보다 오래된 공용 알림은 확인한 것으로 처리
+- CHAT_READ_FLUSH_SECONDS    : 채널 읽음 처리 DB 반영 주기(초) (기본 1)
+- CHAT_READ_FLUSH_BATCH      : 한 번에 반영할 최대 채널 수 (기본 200)
+
+비고
+----------------------------------------------------------------------
+- 구독 정보는 프로세스 메모리에 있으므로 워커가 여러 개면 같은 워커에 붙은 연결만 즉시 수신
+  (다른 워커의 알림은 재연결 시 backlog 로 받음)
+- chat 알림(target_user = "")은 배지 카운트용이라 backlog 대상이 아님
+- 채널 읽음 버퍼도 워커별이므로 다른 워커의 배지 수는 최대 CHAT_READ_FLUSH_SECONDS 늦게 반영
+----------------------------------------------------------------------
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pymysql
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from db_pool import get_connection
+
+QUEUE_SIZE = int(os.getenv("ALERT_STREAM_QUEUE_SIZE", "100"))
+PING_SECONDS = float(os.getenv("ALERT_STREAM_PING_SECONDS", "25"))
+BACKLOG_LIMIT = int(os.getenv("ALERT_STREAM_BACKLOG_LIMIT", "100"))
+RESUME_OVERLAP_SECONDS = int(os.getenv("ALERT_STREAM_RESUME_OVERLAP_SECONDS", "10"))
+READ_BITMAP_BITS = int(os.getenv("ALERT_READ_BITMAP_BITS", "4096"))
+READ_FLUSH_SECONDS = float(os.getenv("CHAT_READ_FLUSH_SECONDS", "1"))
+READ_FLUSH_BATCH = int(os.getenv("CHAT_READ_FLUSH_BATCH", "200"))
+
+CHAT_CATEGORY = "chat"
+
+# 관리자 공용 알림 대상
+ADMIN_TARGET = "R03"
+ADMIN_ROLES = ("R03", "R04")
+
+# 역할 → 공용 알림 대상 (관리자는 R03/R04 가 "R03" 하나를 같이 받음)
+ROLE_AUDIENCE = {"R01": "R01", "R02": "R02", "R03": ADMIN_TARGET, "R04": ADMIN_TARGET}
+BROADCAST_AUDIENCES = frozenset(ROLE_AUDIENCE.values())
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, keys, loop):
+        self.keys = keys
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.closed = False
+
+    def _push(self, event):
+        # 이벤트 루프 스레드에서 실행됨
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # 너무 밀린 연결은 끊고 재연결(backlog)로 따라오게 함
+            self.closed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class AlertBroker:
+    def __init__(self):
+        self._subscribers = {}  # key -> set(Subscription)
+        self._lock = threading.Lock()
+        self._published = 0
+        self._dropped = 0
+
+    def subscribe(self, keys) -> Subscription:
+        sub = Subscription(tuple(keys), asyncio.get_running_loop())
+        with self._lock:
+            for key in sub.keys:
+                self._subscribers.setdefault(key, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            for key in sub.keys:
+                subs = self._subscribers.get(key)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subscribers[key]
+
+    def publish(self, key, event):
+        """어느 스레드에서든 호출 가능"""
+        with self._lock:
+            subs = list(self._subscribers.get(key, ()))
+            self._published += 1
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._push, event)
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힘 (서버 종료 중)
+                with self._lock:
+                    self._dropped += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "keys": len(self._subscribers),
+                "connections": len({sub for subs in self._subscribers.values() for sub in subs}),
+                "published": self._published,
+                "dropped": self._dropped,
+            }
+
+
+alert_broker = AlertBroker()
+
+
+def add_alert(conn, target_user, title, message, link, create_id,
+              value_id=None, category=None, answer_yn=None, notify_users=()):
+    """
+    알림 INSERT + 커밋 후 실시간 전송 (conn: get_db 세션)
+    - value_id / category / answer_yn 는 None 이면 컬럼 기본값 사용
+    - notify_users : target_user 가 "" 인 chat 알림을 받을 상대방 user_id 목록
+    """
+    row = {
+        "target_user": target_user,
+        "value_id": value_id,
+        "category": category,
+        "title": title,
+        "message": message,
+        "link": link,
+        "answer_yn": answer_yn,
+        "create_dt": datetime.now().replace(microsecond=0),
+        "del_yn": "N",
+        "create_id": create_id,
+    }
+    with conn.cursor() as cursor:
+        if target_user in BROADCAST_AUDIENCES:
+            row["broadcast_seq"] = _next_broadcast_seq(cursor, target_user)
+        columns = [col for col, value in row.items() if value is not None]
+        cursor.execute(
+            f"INSERT INTO alerts ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+            [row[col] for col in columns],
+        )
+        row["alert_id"] = cursor.lastrowid
+
+        if target_user == "" and category == CHAT_CATEGORY:
+            cursor.execute("""
+                INSERT INTO alert_counter (create_id, value_id, category, unread_count, update_dt)
+                VALUES (%s, %s, %s, 1, NOW())
+                ON DUPLICATE KEY UPDATE unread_count = unread_count + 1, update_dt = NOW()
+            """, (create_id, value_id, CHAT_CATEGORY))
+
+    if target_user:
+        conn.after_commit(lambda: alert_broker.publish(target_user, ("alert", row)))
+    for user_id in notify_users:
+        if user_id:
+            conn.after_commit(lambda user_id=user_id: alert_broker.publish(user_id, ("chat", row)))
+    return row["alert_id"]
+
+
+def fan_out_team_alert(project_id, title, message, link, create_id, value_id=None, category=None):
+    """
+    팀원(team_member) 전원에게 알림 등록 후 실시간 전송
+    - 요청 세션이 아닌 풀 커넥션을 따로 빌려서 자체 커밋 (BackgroundTasks 에서 호출)
+    """
+    created = datetime.now().replace(microsecond=0)
+    conn = get_connection()
+    try:
+        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+            cursor.execute("""
+                INSERT INTO alerts (target_user, value_id, category, title, message, link, create_dt, del_yn, create_id)
+                SELECT DISTINCT tm.user_id, %s, %s, %s, %s, %s, %s, 'N', %s
+                FROM team_member tm
+                WHERE tm.project_id = %s AND tm.del_yn = 'N'
+            """, (value_id, category, title, message, link, created, create_id, project_id))
+            first_id, inserted = cursor.lastrowid, cursor.rowcount
+            rows = []
+            if inserted > 0:
+                # 방금 넣은 행 (다중 INSERT 의 lastrowid 는 첫 번째 행 ID)
+                cursor.execute("""
+                    SELECT *
+                    FROM alerts
+                    WHERE alert_id >= %s AND create_id = %s AND create_dt = %s AND value_id <=> %s AND category <=> %s
+                    ORDER BY alert_id
+                    LIMIT %s
+                """, (first_id, create_id, created, value_id, category, inserted))
+                rows = cursor.fetchall()
+        conn.commit()
+    except Exception:
+        logger.exception("팀 알림 등록 실패 (project_id=%s)", project_id)
+        return
+    finally:
+        conn.close()
+
+    for row in rows:
+        alert_broker.publish(row["target_user"], ("alert", row))
+
+
+def _next_broadcast_seq(cursor, audience) -> int:
+    """
+    대상별 공용 알림 일련번호 발급
+    - 행 잠금이 커밋까지 유지되므로 같은 대상의 공용 알림은 번호 순서대로 커밋됨
+      (커서를 당길 때 아직 안 보이는 앞 번호를 건너뛰지 않음)
+    """
+    cursor.execute("""
+        INSERT INTO alert_broadcast_seq (audience, last_seq) VALUES (%s, LAST_INSERT_ID(1))
+        ON DUPLICATE KEY UPDATE last_seq = LAST_INSERT_ID(last_seq + 1)
+    """, (audience,))
+    cursor.execute("SELECT LAST_INSERT_ID() AS seq")
+    row = cursor.fetchone()
+    return row["seq"] if isinstance(row, dict) else row[0]
+
+
+def broadcast_audience(user):
+    return ROLE_AUDIENCE.get(user.get("role"))
+
+
+def broadcast_targets(user) -> list:
+    audience = broadcast_audience(user)
+    return [audience] if audience else []
+
+
+def alert_targets(user) -> list:
+    """사용자가 받는 알림의 target_user 목록 (본인 + 역할 공용 대상)"""
+    return [user["user_id"]] + broadcast_targets(user)
+
+
+# 스트림 구독 키도 같은 기준
+stream_keys = alert_targets
+
+
+def _load_read_state(cursor, user_id, audience, for_update=False):
+    """(cursor_seq, bitmap 바이트)"""
+    cursor.execute(
+        "SELECT cursor_seq, bitmap FROM alert_read_state WHERE user_id = %s AND audience = %s"
+        + (" FOR UPDATE" if for_update else ""),
+        (user_id, audience),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return 0, b""
+    return row["cursor_seq"], bytes(row["bitmap"] or b"")
+
+
+def _bitmap_to_set(cursor_seq, bitmap) -> set:
+    bits = int.from_bytes(bitmap, "little")
+    return {cursor_seq + 1 + i for i in range(bits.bit_length()) if bits >> i & 1}
+
+
+def _save_read_state(cursor, user_id, audience, cursor_seq, dismissed):
+    bits = 0
+    for seq in dismissed:
+        bits |= 1 << (seq - cursor_seq - 1)
+    cursor.execute("""
+        UPDATE alert_read_state
+        SET cursor_seq = %s, bitmap = %s, update_dt = NOW()
+        WHERE user_id = %s AND audience = %s
+    """, (cursor_seq, bits.to_bytes((bits.bit_length() + 7) // 8, "little"), user_id, audience))
+
+
+def _compact_read_state(cursor, audience, cursor_seq, dismissed):
+    """확인한 공용 알림이 앞에서부터 이어지면 커서를 당기고 비트맵에서 제거"""
+    if not dismissed:
+        return cursor_seq, dismissed
+    top = max(dismissed)
+    if top - cursor_seq > READ_BITMAP_BITS:
+        # 비트맵 상한 초과 → 그보다 오래된 공용 알림은 확인한 것으로 처리
+        cursor_seq = top - READ_BITMAP_BITS
+    # 이미 내려갔거나(del_yn = 'Y') 보관 처리된 번호는 건너뜀
+    cursor.execute("""
+        SELECT broadcast_seq
+        FROM alerts
+        WHERE target_user = %s AND broadcast_seq > %s AND broadcast_seq <= %s AND del_yn = 'N'
+        ORDER BY broadcast_seq
+    """, (audience, cursor_seq, top))
+    new_cursor = top
+    for row in cursor.fetchall():
+        if row["broadcast_seq"] not in dismissed:
+            new_cursor = row["broadcast_seq"] - 1
+            break
+    return new_cursor, {seq for seq in dismissed if seq > new_cursor}
+
+
+def dismiss_broadcasts_where(cursor, user, condition, params=()) -> int:
+    """
+    조건에 맞는 공용 알림을 한 번에 확인 처리 (다른 사용자에게는 그대로 보임)
+    - condition : alerts 기준 WHERE 조건 (예: "alert_id IN (%s, %s)")
+    - 새로 확인 처리한 개수 반환
+    """
+    audience = broadcast_audience(user)
+    if not audience:
+        return 0
+
+    cursor.execute("""
+        INSERT IGNORE INTO alert_read_state (user_id, audience, cursor_seq, bitmap, update_dt)
+        VALUES (%s, %s, 0, '', NOW())
+    """, (user["user_id"], audience))
+    cursor_seq, bitmap = _load_read_state(cursor, user["user_id"], audience, for_update=True)
+    dismissed = _bitmap_to_set(cursor_seq, bitmap)
+    cursor.execute(f"""
+        SELECT broadcast_seq
+        FROM alerts
+        WHERE target_user = %s AND broadcast_seq > %s AND del_yn = 'N'
+          AND {condition}
+    """, (audience, cursor_seq, *params))
+    seqs = {row["broadcast_seq"] for row in cursor.fetchall()} - dismissed
+    if not seqs:
+        return 0
+
+    cursor_seq, dismissed = _compact_read_state(cursor, audience, cursor_seq, dismissed | seqs)
+    _save_read_state(cursor, user["user_id"], audience, cursor_seq, dismissed)
+    return len(seqs)
+
+
+def dismiss_broadcasts(cursor, user, alert_ids) -> int:
+    """공용 알림 id 목록 확인 처리"""
+    alert_ids = list(alert_ids)
+    if not alert_ids:
+        return 0
+    return dismiss_broadcasts_where(cursor, user, f"alert_id IN ({', '.join(['%s'] * len(alert_ids))})", alert_ids)
+
+
+def visible_alerts_filter(cursor, user):
+    """
+    내게 보이는 알림 조건 (sql, params)
+    - 본인 알림 + 확인하지 않은 공용 알림 (del_yn 조건은 호출하는 쪽에서)
+    """
+    audience = broadcast_audience(user)
+    if not audience:
+        return "target_user = %s", [user["user_id"]]
+    cursor_seq, bitmap = _load_read_state(cursor, user["user_id"], audience)
+    sql = "(target_user = %s OR (target_user = %s AND broadcast_seq > %s"
+    params = [user["user_id"], audience, cursor_seq]
+    if bitmap:
+        # 비트맵의 (broadcast_seq - cursor_seq - 1) 번째 비트가 0 인 것만 (비트맵 밖이면 SUBSTRING 이 '' → 0)
+        sql += (" AND ((ASCII(SUBSTRING(%s, (broadcast_seq - %s - 1) DIV 8 + 1, 1))"
+                " >> MOD(broadcast_seq - %s - 1, 8)) & 1) = 0")
+        params += [bitmap, cursor_seq, cursor_seq]
+    return sql + "))", params
+
+
+def init_read_state(cursor, user_id, role):
+    """신규 가입자는 가입 이전 공용 알림을 받지 않도록 cursor_seq 를 대상별 마지막 broadcast_seq 로"""
+    audience = ROLE_AUDIENCE.get(role)
+    if not audience:
+        return
+    cursor.execute("""
+        INSERT IGNORE INTO alert_read_state (user_id, audience, cursor_seq, bitmap, update_dt)
+        SELECT %s, %s, COALESCE(MAX(last_seq), 0), '', NOW() FROM alert_broadcast_seq WHERE audience = %s
+    """, (user_id, audience, audience))
+
+
+def encode_cursor(row) -> str:
+    raw = f"{row['create_dt']:%Y-%m-%d %H:%M:%S}|{row['alert_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        create_dt, alert_id = raw.split("|")
+        return datetime.strptime(create_dt, "%Y-%m-%d %H:%M:%S"), int(alert_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
+
+
+def chat_alert_count(cursor, create_id, value_id) -> int:
+    """채널 하나(글쓴이 create_id, team_member_id value_id)의 안 읽은 chat 알림 수"""
+    cursor.execute("""
+        SELECT unread_count
+        FROM alert_counter
+        WHERE create_id = %s AND value_id = %s AND category = %s
+    """, (create_id, value_id, CHAT_CATEGORY))
+    row = cursor.fetchone()
+    marked_at = chat_read_buffer.marked_at(create_id, value_id)
+    if marked_at is not None:
+        return _unread_after(cursor, create_id, value_id, marked_at)
+    return row["unread_count"] if row else 0
+
+
+def _unread_after(cursor, create_id, value_id, marked_at) -> int:
+    """확인 시각 이후에 온 chat 알림 수 (읽음 처리가 아직 DB 에 반영되지 않은 채널용)"""
+    # 확인 시각이 최근이므로 (target_user, del_yn, create_dt) 인덱스로 짧은 구간만 조회
+    cursor.execute("""
+        SELECT COUNT(*) AS count
+        FROM alerts
+        WHERE target_user = '' AND del_yn = 'N' AND create_dt > %s
+          AND category = %s AND create_id = %s AND value_id = %s
+    """, (marked_at, CHAT_CATEGORY, create_id, value_id))
+    return cursor.fetchone()["count"]
+
+
+def chat_alert_counts(cursor, project_id, pm_id=None):
+    """팀원(team_member)별 chat 알림 수 (cursor: DictCursor)"""
+    sql = """
+        SELECT
+            tm.team_member_id,
+            tm.user_id,
+            tm.pm_id,
+            COALESCE(mc.unread_count, 0) AS member_unread,
+            COALESCE(pc.unread_count, 0) AS pm_unread
+        FROM team_member tm
+        LEFT JOIN alert_counter mc
+               ON mc.create_id = tm.user_id AND mc.value_id = tm.team_member_id AND mc.category = %s
+        LEFT JOIN alert_counter pc
+               ON pc.create_id = tm.pm_id AND pc.value_id = tm.team_member_id AND pc.category = %s
+        WHERE tm.project_id = %s AND tm.del_yn = 'N'
+    """
+    params = [CHAT_CATEGORY, CHAT_CATEGORY, project_id]
+    if pm_id is not None:
+        sql += " AND tm.pm_id = %s"
+        params.append(pm_id)
+    sql += " ORDER BY tm.team_member_id"
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    # 아직 DB 에 반영 안 된 읽음 처리 적용 (확인 시각 이후에 온 알림만 셈)
+    for row in rows:
+        for create_id, field in ((row["user_id"], "member_unread"), (row["pm_id"], "pm_unread")):
+            marked_at = chat_read_buffer.marked_at(create_id, row["team_member_id"])
+            if marked_at is not None:
+                row[field] = _unread_after(cursor, create_id, row["team_member_id"], marked_at)
+    return rows
+
+
+def _read_key(create_id, value_id):
+    """(글쓴이, team_member_id) → 버퍼 키, 값이 비어 있거나 team_member_id 가 숫자가 아니면 None"""
+    create_id = str(create_id or "").strip()
+    try:
+        value_id = int(value_id)
+    except (TypeError, ValueError):
+        return None
+    if not create_id:
+        return None
+    return (create_id, value_id)
+
+
+class ChatReadBuffer:
+    """채널 읽음 처리 write-behind 버퍼 ((create_id, value_id) → 확인 시각)"""
+
+    def __init__(self, interval=READ_FLUSH_SECONDS, batch=READ_FLUSH_BATCH):
+        self.interval = interval
+        self.batch = batch
+        self._pending = {}
+        self._flushing = {}  # DB 반영 중인 것 (반영 끝날 때까지 확인 시각 기준으로 응답)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._marked = 0
+        self._coalesced = 0
+        self._flushes = 0
+        self._flushed = 0
+        self._errors = 0
+
+    def mark(self, create_id, value_id) -> bool:
+        """채널 확인 기록, 잘못된 값(화면 로딩 중 빈 값 등)은 무시하고 False"""
+        key = _read_key(create_id, value_id)
+        if key is None:
+            return False
+        with self._lock:
+            self._marked += 1
+            if key in self._pending:
+                self._coalesced += 1
+            self._pending[key] = datetime.now()
+            if len(self._pending) >= self.batch:
+                self._wake.set()
+        return True
+
+    def marked_at(self, create_id, value_id):
+        """DB 에 아직 반영되지 않은 확인 시각 (없으면 None)"""
+        if not self._pending and not self._flushing:
+            return None
+        key = _read_key(create_id, value_id)
+        with self._lock:
+            times = [t for t in (self._pending.get(key), self._flushing.get(key)) if t is not None]
+        return max(times) if times else None
+
+    def _write(self, items):
+        conn = get_connection()
+        try:
+            with conn.cursor() as cursor:
+                # 확인 시각 이전 chat 알림만 읽음 처리
+                cursor.execute(f"""
+                    UPDATE alerts SET del_yn = 'Y'
+                    WHERE target_user = '' AND category = %s AND del_yn = 'N'
+                      AND ({' OR '.join(['(create_id = %s AND value_id = %s AND create_dt <= %s)'] * len(items))})
+                """, (CHAT_CATEGORY, *[v for (create_id, value_id), marked_at in items
+                                       for v in (create_id, value_id, marked_at)]))
+                # 확인 이후 새 알림이 있을 수 있으므로 0 이 아니라 남은 개수로 다시 계산
+                cursor.execute(f"""
+                    UPDATE alert_counter c
+                    SET c.unread_count = (
+                            SELECT COUNT(*) FROM alerts a
+                            WHERE a.target_user = '' AND a.category = c.category
+                              AND a.create_id = c.create_id AND a.value_id = c.value_id AND a.del_yn = 'N'
+                        ),
+                        c.update_dt = NOW()
+                    WHERE c.category = %s
+                      AND (c.create_id, c.value_id) IN ({', '.join(['(%s, %s)'] * len(items))})
+                """, (CHAT_CATEGORY, *[v for key, _ in items for v in key]))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def flush(self) -> int:
+        """대기 중인 읽음 처리를 DB 에 반영, 반영한 채널 수 반환"""
+        total = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        break
+                    keys = list(self._pending)[:self.batch]
+                    items = [(key, self._pending.pop(key)) for key in keys]
+                    self._flushing.update(items)
+                try:
+                    self._write(items)
+                except Exception:
+                    with self._lock:
+                        self._errors += 1
+                        # 실패한 건은 다시 대기열로 (그 사이 새로 확인한 시각이 있으면 그 값 유지)
+                        for key, marked_at in items:
+                            self._pending[key] = max(marked_at, self._pending.get(key, marked_at))
+                    raise
+                finally:
+                    with self._lock:
+                        for key, marked_at in items:
+                            if self._flushing.get(key) == marked_at:
+                                del self._flushing[key]
+                with self._lock:
+                    self._flushes += 1
+                    self._flushed += len(items)
+                total += len(items)
+        return total
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("채널 읽음 처리 반영 실패")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="chat-read-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+        # 남은 것 반영 후 종료
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("채널 읽음 처리 반영 실패")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "flushing": len(self._flushing),
+                "marked": self._marked,
+                "coalesced": self._coalesced,
+                "flushes": self._flushes,
+                "flushed": self._flushed,
+                "errors": self._errors,
+                "interval": self.interval,
+            }
+
+
+chat_read_buffer = ChatReadBuffer()
+
+
+def load_alerts_since(user, since: int):
+    """재연결 시 놓친 알림 (since 알림 등록 시각 - 겹침 구간 이후, 오래된 것부터, 이미 받은 알림 포함)"""
+    conn = get_connection()
+    try:
+        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+            visible_sql, visible_params = visible_alerts_filter(cursor, user)
+            cursor.execute("SELECT create_dt FROM alerts WHERE alert_id = %s", (since,))
+            row = cursor.fetchone()
+            if row:
+                # since 보다 작은 id 가 since 이후에 커밋됐을 수 있으므로 등록 시각 기준으로 겹쳐서 조회
+                resume_sql = "create_dt >= %s"
+                resume_param = row["create_dt"] - timedelta(seconds=RESUME_OVERLAP_SECONDS)
+            else:
+                # since 알림이 이미 보관(alerts_archive)되었으면 id 기준
+                resume_sql = "alert_id > %s"
+                resume_param = since
+            cursor.execute(f"""
+                SELECT *
+                FROM alerts
+                WHERE {visible_sql}
+                  AND {resume_sql} AND del_yn = 'N'
+                ORDER BY create_dt ASC, alert_id ASC
+                LIMIT %s
+            """, (*visible_params, resume_param, BACKLOG_LIMIT))
+            return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def format_event(event, data, event_id=None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(jsonable_encoder(data), ensure_ascii=False))
+    return "\n".join(lines) + "\n\n"
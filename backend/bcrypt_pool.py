@@ -0,0 +1,144 @@
+"""
+----------------------------------------------------------------------
+파일명     : bcrypt_pool.py
+설명       : bcrypt 해시/검증 전용 프로세스 풀 및 동시 처리 제한 모듈
+
+주요 기능
+----------------------------------------------------------------------
+1. 전용 실행기 (`BcryptExecutor`)
+   - bcrypt 연산은 CPU 코어 수만큼의 프로세스 풀에서 실행
+   - 대기 + 실행 중인 요청 수를 BCRYPT_MAX_PENDING 으로 제한
+   - 한도를 넘는 요청은 바로 503 (로그인 폭주가 다른 API 스레드를 잡아먹지 않도록)
+   - 대기열 깊이, 처리/거절 건수, 평균 처리 시간 지표 제공 (/metrics)
+
+2. 비밀번호 함수
+   - hash_password(plain)           : BCRYPT_ROUNDS 작업계수로 해시
+   - check_password(plain, hashed)  : 비밀번호 검증
+   - needs_rehash(hashed)           : 저장된 해시의 작업계수가 설정값보다 낮은지 확인
+     (로그인 성공 시 새 작업계수로 다시 해시해서 저장)
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- BCRYPT_ROUNDS       : 작업계수 (기본 12, bcrypt 기본값과 동일)
+- BCRYPT_WORKERS      : 프로세스 수 (기본 CPU 코어 수)
+- BCRYPT_MAX_PENDING  : 동시에 받아들일 최대 요청 수 (기본 BCRYPT_WORKERS * 2)
+- BCRYPT_WAIT_TIMEOUT : 결과 대기 최대 시간(초) (기본 10)
+----------------------------------------------------------------------
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+from fastapi import HTTPException
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(os.cpu_count() or 1)))
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", str(BCRYPT_WORKERS * 2)))
+BCRYPT_WAIT_TIMEOUT = float(os.getenv("BCRYPT_WAIT_TIMEOUT", "10"))
+
+
+# 프로세스 풀에서 실행되는 함수 (pickle 가능하도록 모듈 최상위에 정의)
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+class BcryptExecutor:
+    def __init__(self, workers=BCRYPT_WORKERS, max_pending=BCRYPT_MAX_PENDING, timeout=BCRYPT_WAIT_TIMEOUT):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+        self._pending = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._total_seconds = 0.0
+
+    def _get_executor(self):
+        # 처음 사용할 때 생성 (import 시점에 프로세스를 띄우지 않음)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HTTPException(status_code=503, detail="요청이 많습니다. 잠시 후 다시 시도해주세요.")
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+
+        started = time.monotonic()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+            raise
+        # 대기 중인 요청이 시간 초과로 포기해도 이미 실행 중인 해시는 멈출 수 없으므로
+        # 작업이 실제로 끝났을 때(취소 포함) pending 을 줄임 → max_pending 이 풀의 실제 작업량 기준
+        future.add_done_callback(lambda _: self._done(started))
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self._timeouts += 1
+            raise HTTPException(status_code=503, detail="요청이 많습니다. 잠시 후 다시 시도해주세요.")
+
+    def _done(self, started):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+            self._total_seconds += time.monotonic() - started
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "queued": max(self._pending - self.workers, 0),
+                "peak_pending": self._peak_pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "avg_ms": round(self._total_seconds * 1000 / self._completed, 3) if self._completed else 0.0,
+                "rounds": BCRYPT_ROUNDS,
+            }
+
+
+bcrypt_executor = BcryptExecutor()
+
+
+def hash_password(password: str) -> str:
+    return bcrypt_executor.run(_hashpw, password.encode(), BCRYPT_ROUNDS).decode()
+
+
+def check_password(password: str, hashed: str) -> bool:
+    return bcrypt_executor.run(_checkpw, password.encode(), hashed.encode())
+
+
+def needs_rehash(hashed: str) -> bool:
+    # 해시 형식: $2b$<작업계수>$<salt+hash>
+    try:
+        return int(hashed.split("$")[2]) < BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
@@ -0,0 +1,122 @@
+"""
+----------------------------------------------------------------------
+파일명     : board_paging.py
+설명       : 프로젝트 채널 게시판 목록 커서(keyset) 페이지 처리 + 전체 글 수 캐시
+
+주요 기능
+----------------------------------------------------------------------
+1. 커서 페이지 (`keyset_condition`, `paginate`)
+   - 정렬 기준 (create_dt DESC, channel_id DESC)
+   - 다음 페이지는 마지막 글의 (create_dt, channel_id) 보다 앞선 글만 조회
+     → OFFSET 처럼 앞 페이지 글을 읽고 버리지 않으므로 페이지가 깊어져도 속도 일정
+   - page_size + 1 개를 조회해서 has_more 판단 (COUNT 없이)
+   - next_cursor : 마지막 글 기준 커서 문자열 (base64), 다음 요청의 cursor 로 그대로 전달
+   - 기존 page 방식 요청도 그대로 동작 (page 로 조회해도 next_cursor 를 같이 응답)
+
+2. 전체 글 수 캐시 (`BoardTotals`)
+   - 게시판별 COUNT(*) 결과를 BOARD_TOTAL_CACHE_SECONDS 동안 보관 (페이지마다 COUNT 하지 않음)
+   - 글 등록/삭제 시 invalidate() 로 해당 게시판 값 제거 (커밋 이후)
+   - 다른 워커 프로세스의 변경은 보관 시간이 지나면 반영 (화면 표시용 근사값)
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- BOARD_TOTAL_CACHE_SECONDS : 전체 글 수 보관 시간(초) (기본 60)
+
+비고
+----------------------------------------------------------------------
+- 인덱스는 sql/project_channel_keyset.sql 참고
+----------------------------------------------------------------------
+"""
+
+import base64
+import os
+import threading
+import time
+from datetime import datetime
+
+from fastapi import HTTPException
+
+TOTAL_CACHE_SECONDS = float(os.getenv("BOARD_TOTAL_CACHE_SECONDS", "60"))
+
+
+def encode_cursor(row) -> str:
+    create_dt = row["create_dt"]
+    if isinstance(create_dt, datetime):
+        create_dt = create_dt.isoformat(sep=" ")
+    raw = f"{create_dt}|{row['channel_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """커서 문자열 → (create_dt, channel_id), 형식이 맞지 않으면 400"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        create_dt, channel_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(create_dt), int(channel_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="잘못된 cursor 값입니다.")
+
+
+def keyset_condition(alias: str, cursor):
+    """cursor 이후 글만 조회하는 WHERE 조건 → (sql, params), cursor 가 없으면 ("", ())"""
+    if not cursor:
+        return "", ()
+    create_dt, channel_id = decode_cursor(cursor)
+    # (create_dt, channel_id) < (%s, %s) 를 인덱스를 탈 수 있는 형태로 풀어서 작성
+    sql = f"AND ({alias}.create_dt < %s OR ({alias}.create_dt = %s AND {alias}.channel_id < %s))"
+    return sql, (create_dt, create_dt, channel_id)
+
+
+def paginate(rows, page_size: int) -> dict:
+    """page_size + 1 개 조회 결과 → items / has_more / next_cursor"""
+    has_more = len(rows) > page_size
+    items = list(rows[:page_size])
+    return {
+        "items": items,
+        "has_more": has_more,
+        "next_cursor": encode_cursor(items[-1]) if has_more else None,
+    }
+
+
+class BoardTotals:
+    def __init__(self, ttl=TOTAL_CACHE_SECONDS):
+        self.ttl = ttl
+        self._values = {}  # (category, value_id, ...) -> (만료 시각, 글 수)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: tuple, compute) -> int:
+        """캐시된 글 수, 없거나 만료됐으면 compute() 로 다시 계산"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._values.get(key)
+            if cached and cached[0] > now:
+                self._hits += 1
+                return cached[1]
+            self._misses += 1
+        total = compute()
+        with self._lock:
+            self._values[key] = (now + self.ttl, total)
+        return total
+
+    def invalidate(self, category=None, value_id=None):
+        """게시판(category, value_id) 값 제거, 인자가 없으면 전체 제거"""
+        with self._lock:
+            if category is None:
+                self._values.clear()
+                return
+            for key in [k for k in self._values if k[0] == category and (value_id is None or k[1] == value_id)]:
+                del self._values[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "size": len(self._values),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+board_totals = BoardTotals()
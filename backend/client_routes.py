@@ -25,8 +25,8 @@
 기타
 ----------------------------------------------------------------------
 - DB는 pymysql 사용 (DictCursor)
-- SQL 실행 후 커넥션은 반드시 close
-- 공통 코드(urgency, category)는 `common_code` 테이블에서 매핑 처리
+- DB 세션은 `conn = Depends(get_db)` 로 요청당 하나, commit/rollback 은 get_db 가 처리
+- 공통 코드(urgency, category)는 code_cache 의 resolve_code_labels 로 일괄 변환
 - 오류 발생 시 HTTPException으로 상태 및 메시지 반환
 ----------------------------------------------------------------------
 """
@@ -34,17 +34,17 @@
 from fastapi import APIRouter, HTTPException, Depends, Body
 from pydantic import BaseModel
 import pymysql
-import bcrypt
-from database import db_config
-from jwt_auth import get_current_user 
+from bcrypt_pool import check_password
+from db_pool import get_db, DBSession
+from jwt_auth import get_current_user, user_changed
+from code_cache import resolve_code_labels, PROJECT_CODE_LABELS
 
 router = APIRouter( tags=["Client"])
 
 
 #회원정보 조회
 @router.get("/userinfo")
-def get_client_user_info(user: dict = Depends(get_current_user)):
-    conn = pymysql.connect(**db_config)
+def get_client_user_info(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
@@ -63,66 +63,50 @@ def get_client_user_info(user: dict = Depends(get_current_user)):
             return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
         
 #회원정보 수정        
 @router.put("/userupdate")
-def update_user_info(payload: dict = Body(...), user: dict = Depends(get_current_user)):
-    conn = pymysql.connect(**db_config)
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                UPDATE user
-                SET 
-                    phone = %s, 
-                    company = %s, 
-                    update_dt = NOW()
-                WHERE 
-                    user_id = %s 
-                    AND del_yn = 'N'
-            """, (payload["phone"], payload["company"], user["user_id"]))
-        conn.commit()
-        return {"message": "수정 완료"}
-    finally:
-        conn.close()
+def update_user_info(payload: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE user
+            SET 
+                phone = %s, 
+                company = %s, 
+                update_dt = NOW()
+            WHERE 
+                user_id = %s 
+                AND del_yn = 'N'
+        """, (payload["phone"], payload["company"], user["user_id"]))
+    return {"message": "수정 완료"}
 
 #회원탈퇴
 @router.put("/withdraw")
-def withdraw_user(user: dict = Depends(get_current_user)):
-    conn = pymysql.connect(**db_config)
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute("""
-                UPDATE user
-                SET del_yn = 'Y', update_dt = NOW()
-                WHERE user_id = %s AND del_yn = 'N'
-            """, (user["user_id"],))
-        conn.commit()
-        return {"message": "회원탈퇴 처리 완료"}
-    finally:
-        conn.close()
+def withdraw_user(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            UPDATE user
+            SET del_yn = 'Y', update_dt = NOW()
+            WHERE user_id = %s AND del_yn = 'N'
+        """, (user["user_id"],))
+    user_changed(conn, user["user_id"])
+    return {"message": "회원탈퇴 처리 완료"}
 
    
 @router.post("/verify-password")
-def verify_password(data: dict = Body(...), user: dict = Depends(get_current_user)):
-    conn = pymysql.connect(**db_config)
-    try:
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("SELECT password FROM user WHERE user_id = %s", (user["user_id"],))
-            result = cursor.fetchone()
-            if not result:
-                raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
-            if not bcrypt.checkpw(data["password"].encode(), result["password"].encode()):
-                raise HTTPException(status_code=401, detail="비밀번호가 일치하지 않습니다.")
-            return {"message": "확인 성공"}
-    finally:
-        conn.close()
+def verify_password(data: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("SELECT password FROM user WHERE user_id = %s", (user["user_id"],))
+        result = cursor.fetchone()
+        if not result:
+            raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+        if not check_password(data["password"], result["password"]):
+            raise HTTPException(status_code=401, detail="비밀번호가 일치하지 않습니다.")
+        return {"message": "확인 성공"}
 
 
 @router.post("/projects")
-def create_project(payload: dict = Body(...), user: dict = Depends(get_current_user)):
-    conn = pymysql.connect(**db_config)
+def create_project(payload: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
         with conn.cursor() as cursor:
             cursor.execute("""
@@ -151,17 +135,13 @@ def create_project(payload: dict = Body(...), user: dict = Depends(get_current_u
                 payload.get("ugencyLevel"),
                 user["user_id"]
             ))
-        conn.commit()
         return {"message": "프로젝트가 등록되었습니다!"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 @router.post("/list")
-def project_list(payload: dict = Body(...), user: dict = Depends(get_current_user)):
-    conn = pymysql.connect(**db_config)
+def project_list(payload: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
         with conn.cursor() as cursor:
             # 프로젝트 목록을 가져옵니다.
@@ -190,41 +170,10 @@ def project_list(payload: dict = Body(...), user: dict = Depends(get_current_use
             if not projects:
                 raise HTTPException(status_code=404, detail="프로젝트가 없습니다.")
             
-            # 각 프로젝트의 'urgency' 값을 'code_name'으로 변환
-            for project in projects:
-                # urgency 값을 공통 코드에서 가져오기
-                cursor.execute("""
-                    SELECT code_name
-                    FROM common_code
-                    WHERE group_id = 'URGENCY_LEVEL' 
-                    AND code_id = %s
-                    AND del_yn = 'N'
-                """, (project['urgency'],))
-
-                urgency_level = cursor.fetchone()
-                if urgency_level:
-                    project['urgency_level'] = urgency_level['code_name']
-                else:
-                    project['urgency_level'] = ' - '  # 공통코드가 없는 경우 처리
-                
-                # category 값을 공통 코드에서 가져오기
-                cursor.execute("""
-                    SELECT code_name
-                    FROM common_code
-                    WHERE group_id = 'PROJECT_TYPE' 
-                    AND code_id = %s
-                    AND del_yn = 'N'
-                """, (project['category'],))
-
-                project_type = cursor.fetchone()
-                if project_type:
-                    project['category_name'] = project_type['code_name']
-                else:
-                    project['category_name'] = ' - '  # 공통코드가 없는 경우 처리
+            # urgency, category 코드를 이름으로 변환 (code_cache 에서 한 번에)
+            resolve_code_labels(projects, PROJECT_CODE_LABELS, default=' - ')
 
             return {"projects": projects}
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""
+----------------------------------------------------------------------
+파일명     : code_cache.py
+설명       : common_code / group_code 전체를 프로세스 메모리에 보관하는 캐시
+
+주요 기능
+----------------------------------------------------------------------
+1. 코드 스냅샷 (`CodeSnapshot`)
+   - group_code, common_code 전체를 한 번에 읽어 만든 읽기 전용 데이터
+   - 그룹별 코드 목록 (/common/codes/{group_id})
+   - 사용 중인 그룹 + 하위 코드 (/common/groups)
+   - 코드 → 이름 변환 (`label`)
+   - 기술 스택 트리 (부모 코드명 → 자식 코드 목록)
+     스냅샷 생성 시 한 번만 만들고 JSON 직렬화 + ETag 까지 미리 계산
+
+2. 버전 관리 (`CodeCache`)
+   - 버전 = 두 테이블의 (COUNT(*), MAX(update_dt))
+   - CODE_CACHE_PROBE_SECONDS 마다 한 번만 버전을 확인하고, 바뀐 경우에만 다시 적재
+   - 코드를 수정하는 처리에서는 `code_cache.bump()` 로 즉시 다시 적재 가능
+   - 서버 시작 시 `warm()` 으로 미리 적재
+
+3. 편의 함수
+   - code_label(group_id, code_id, default) : 코드 이름 조회
+   - resolve_code_labels(rows, mapping, default) : 결과 행 전체의 코드 → 이름 일괄 변환
+     (행마다 common_code 를 조회하던 N+1 쿼리 대체)
+   - PROJECT_CODE_LABELS : 프로젝트 목록용 매핑 (urgency_level, category_name)
+   - tech_stack_response(if_none_match) : 기술 스택 트리 응답
+     (/user/tech-stacks, /member/user/tech-stacks 공용, ETag 일치 시 304)
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- CODE_CACHE_PROBE_SECONDS : 버전 확인 주기(초) (기본 30)
+
+비고
+----------------------------------------------------------------------
+- 스냅샷은 통째로 교체되므로 읽는 쪽은 락 없이 사용
+- 반환값은 공유 객체이므로 호출한 쪽에서 수정하지 말 것 (필요하면 복사)
+----------------------------------------------------------------------
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+import pymysql
+from fastapi import Response
+from db_pool import get_connection
+
+PROBE_SECONDS = float(os.getenv("CODE_CACHE_PROBE_SECONDS", "30"))
+
+logger = logging.getLogger(__name__)
+
+
+class CodeSnapshot:
+    def __init__(self, version, groups, codes):
+        self.version = version
+        self.loaded_at = time.time()
+        self.codes = codes  # common_code 전체 행 (del_yn 포함)
+
+        # /codes/{group_id} : 삭제되지 않은 코드
+        self.codes_by_group = {}
+        self.labels = {}          # (group_id, code_id) -> code_name
+        self.labels_by_code = {}  # code_id -> code_name (그룹 없이 조인하던 곳 호환용)
+        for code in codes:
+            if code["del_yn"] == "N":
+                self.codes_by_group.setdefault(code["group_id"], []).append(
+                    {"code_id": code["code_id"], "code_name": code["code_name"]}
+                )
+                self.labels[(code["group_id"], code["code_id"])] = code["code_name"]
+                self.labels_by_code.setdefault(code["code_id"], code["code_name"])
+
+        # /groups : 사용 중인 그룹 + 사용 중인 코드
+        group_map = {
+            g["group_id"]: {"group_id": g["group_id"], "group_name": g["group_name"], "common_codes": []}
+            for g in groups
+            if g["use_yn"] == "Y" and g["del_yn"] == "N"
+        }
+        for code in codes:
+            if code["use_yn"] == "Y" and code["del_yn"] == "N" and code["group_id"] in group_map:
+                group_map[code["group_id"]]["common_codes"].append(
+                    {"code_id": code["code_id"], "code_name": code["code_name"]}
+                )
+        self.groups = list(group_map.values())
+
+        self.tech_stack_body, self.tech_stack_etag = self._build_tech_stacks(codes)
+
+    @staticmethod
+    def _build_tech_stacks(codes):
+        # 기존 /tech-stacks 응답과 같은 모양: {부모 코드명: [{label, code_id, parent_code}, ...]}
+        tech = sorted((c for c in codes if c["group_id"] == "TECH_STACK"), key=lambda c: c["code_id"])
+        parent_map = {c["code_id"]: c["code_name"] for c in tech if c["parent_code"] is None}
+        tree = {}
+        for item in tech:
+            if item["parent_code"] is None:
+                continue
+            tree.setdefault(parent_map.get(item["parent_code"], "기타"), []).append({
+                "label": item["code_name"],
+                "code_id": item["code_id"],
+                "parent_code": item["parent_code"],
+            })
+        body = json.dumps(tree, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        # 내용 기준 ETag → 다른 그룹만 바뀌어 다시 적재돼도 브라우저 캐시 유지
+        return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    def label(self, group_id, code_id, default=None):
+        if group_id is None:
+            return self.labels_by_code.get(code_id, default)
+        return self.labels.get((group_id, code_id), default)
+
+
+class CodeCache:
+    def __init__(self, probe_seconds=PROBE_SECONDS):
+        self.probe_seconds = probe_seconds
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._probes = 0
+
+    @staticmethod
+    def _probe(cursor):
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM group_code)      AS group_count,
+                (SELECT MAX(update_dt) FROM group_code)  AS group_updated,
+                (SELECT COUNT(*) FROM common_code)     AS code_count,
+                (SELECT MAX(update_dt) FROM common_code) AS code_updated
+        """)
+        row = cursor.fetchone()
+        return (row["group_count"], str(row["group_updated"]), row["code_count"], str(row["code_updated"]))
+
+    def _load(self, cursor, version):
+        cursor.execute("SELECT group_id, group_name, use_yn, del_yn FROM group_code")
+        groups = cursor.fetchall()
+        cursor.execute("SELECT group_id, code_id, code_name, parent_code, use_yn, del_yn FROM common_code")
+        codes = cursor.fetchall()
+        self._loads += 1
+        logger.info("공통코드 캐시 적재: 그룹 %d개, 코드 %d개", len(groups), len(codes))
+        return CodeSnapshot(version, groups, codes)
+
+    def get(self) -> CodeSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.probe_seconds:
+            return snapshot
+
+        with self._lock:
+            # 다른 스레드가 먼저 확인했으면 그 결과 사용
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.probe_seconds:
+                return self._snapshot
+            conn = get_connection()
+            try:
+                with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                    version = self._probe(cursor)
+                    self._probes += 1
+                    if self._snapshot is None or self._snapshot.version != version:
+                        self._snapshot = self._load(cursor, version)
+            finally:
+                conn.close()
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def bump(self):
+        """코드 변경 직후 호출 → 다음 조회 때 버전과 상관없이 다시 적재"""
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+    def warm(self):
+        try:
+            self.get()
+        except Exception:
+            # DB 가 아직 안 떠 있어도 서버는 시작 (첫 요청 때 다시 적재)
+            logger.exception("공통코드 캐시 미리 적재 실패")
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "loaded": snapshot is not None,
+            "codes": len(snapshot.codes) if snapshot else 0,
+            "groups": len(snapshot.groups) if snapshot else 0,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "loads": self._loads,
+            "probes": self._probes,
+        }
+
+
+code_cache = CodeCache()
+
+
+def code_label(group_id, code_id, default=None):
+    return code_cache.get().label(group_id, code_id, default)
+
+
+# 프로젝트 목록 공통 매핑 {결과 키: (그룹 ID, 코드 컬럼)}
+PROJECT_CODE_LABELS = {
+    "urgency_level": ("URGENCY_LEVEL", "urgency"),
+    "category_name": ("PROJECT_TYPE", "category"),
+}
+
+
+def resolve_code_labels(rows, mapping, default=None):
+    """
+    rows 의 코드 컬럼을 이름으로 변환해 새 키로 채움 (스냅샷 한 번 조회, 행별 쿼리 없음)
+    - mapping : {결과 키: (group_id, 코드 컬럼)}
+    - 코드가 없거나 삭제된 경우 default
+    """
+    snapshot = code_cache.get()
+    for row in rows:
+        for target, (group_id, source) in mapping.items():
+            row[target] = snapshot.label(group_id, row.get(source), default)
+    return rows
+
+
+def tech_stack_response(if_none_match: Optional[str] = None) -> Response:
+    snapshot = code_cache.get()
+    headers = {"ETag": snapshot.tech_stack_etag, "Cache-Control": "no-cache"}
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or snapshot.tech_stack_etag in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.tech_stack_body, media_type="application/json", headers=headers)
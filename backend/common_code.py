@@ -8,12 +8,25 @@
 1. 공통 코드 조회
    - 단일 그룹 코드 조회 (/codes/{group_id})
    - 전체 그룹 및 공통코드 조회 (/groups)
+   - 두 API 모두 code_cache(메모리)에서 응답, DB 는 버전 확인 시에만 조회
 
 2. 알림 관리
    - 사용자 알림 조회 (/alerts)
+     · 내 알림 + 관리자 공용 알림을 한 쿼리로 합쳐 (create_dt, alert_id) 최신순 keyset 페이지
+     · limit(기본 50) 개씩, 다음 페이지는 응답 헤더 X-Next-Cursor 값을 cursor 로 전달
+   - 안 읽은(삭제 안 한) 알림 개수 (/alerts/unread-count)
+   - 실시간 알림 스트림 (/alerts/stream, Server-Sent Events)
+     · 새 알림을 커밋 직후 push (event: alert), 내 채널의 chat 알림은 event: chat
+     · since 또는 Last-Event-ID 이후의 놓친 알림을 먼저 전송 후 실시간 전송
    - 알림 개별 삭제 (/alerts/{alert_id}/delete)
+     · 공용(역할 전체) 알림은 본인 확인 상태(alert_read_state)만 변경
+   - 알림 일괄 삭제 (/alerts/bulk-delete)
+     · alert_ids 목록, before(목록 커서 이전 전체), category 로 대상 지정
+     · 개인 알림 UPDATE 한 번 + 공용 알림 확인 처리 한 번
    - 특정 팀원에 대한 알림 개수 조회 (/alerts/{teamMemberId}/{pmId})
+   - 프로젝트 전체 팀원 채널 알림 개수 한 번에 조회 (/alerts/project/{project_id}/chat-counts)
    - 알림 체크 상태 처리 (/alertsCheck)
+     · 요청마다 UPDATE 하지 않고 chat_read_buffer 에 모았다가 주기적으로 반영
 
 3. 팀원 ID 조회
    - 프로젝트 ID와 사용자 ID 기준으로 팀원 ID 조회 (/teamMemberId/{project_id}/{user_id})
@@ -21,28 +34,52 @@
 권한 제어
 ----------------------------------------------------------------------
 - 대부분의 기능은 JWT 인증 필수 (`Depends(get_current_user)`)
-- 알림 기능은 역할(role)에 따라 분기 처리 (예: R03/R04는 공통 알림 포함 조회)
+- 알림 기능은 역할(role)에 따라 분기 처리 (역할별 공용 알림 포함 조회, R03/R04는 "R03" 공용)
 
 기타
 ----------------------------------------------------------------------
 - DB 연결은 pymysql 사용, DictCursor 설정 포함
-- SQL 실행 후 커넥션은 반드시 close 처리
+- DB 세션은 `conn = Depends(get_db)` 로 요청당 하나, commit/rollback 은 get_db 가 처리
 - 알림 테이블은 `alerts`, 공통코드는 `group_code`, `common_code` 사용
 - 알림 값은 `target_user`, `create_id`, `value_id`, `category` 기준으로 필터링
+- chat 알림 배지 수는 `alert_counter` 테이블 값 사용 (alert_utils 참고)
 ----------------------------------------------------------------------
 """
 
 
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+import asyncio
 import pymysql
 from pydantic import BaseModel
-from database import db_config  # ✅ 원래대로!
+from db_pool import get_db, DBSession
 from typing import List
-from jwt_auth import get_current_user 
+from jwt_auth import get_current_user, get_stream_user
+from alert_utils import (
+    alert_broker, stream_keys, load_alerts_since, format_event, visible_alerts_filter, dismiss_broadcasts,
+    dismiss_broadcasts_where,
+    encode_cursor, decode_cursor, chat_alert_count, chat_alert_counts, chat_read_buffer,
+    ADMIN_ROLES, PING_SECONDS,
+)
+from typing import Optional
+from code_cache import code_cache
 
  
 router = APIRouter(prefix="", tags=["공통코드"])
 
+# 알림 목록 페이지 크기
+ALERT_PAGE_SIZE = 50
+ALERT_PAGE_MAX = 200
+# 일괄 삭제 시 id 목록 최대 개수
+ALERT_BULK_MAX = 500
+
+
+class AlertBulkRequest(BaseModel):
+    alert_ids: List[int] = []     # 지정한 알림
+    before: Optional[str] = None  # 이 커서(X-Next-Cursor) 이전 알림 전체 (alert_ids 와 합집합)
+    category: Optional[str] = None  # 지정하면 해당 카테고리만
+
 
 class CommonCode(BaseModel):
     code_id: str
@@ -53,162 +90,204 @@ class GroupCodeWithChildren(BaseModel):
     group_name: str
     common_codes: List[CommonCode]
 
-# ✅ 단일 그룹 코드 목록 조회
+# ✅ 단일 그룹 코드 목록 조회 (code_cache 메모리에서 응답)
 @router.get("/codes/{group_id}", response_model=List[CommonCode])
 def get_common_codes(group_id: str):
-    conn = pymysql.connect(**db_config)
     try:
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT code_id, code_name 
-                FROM common_code 
-                WHERE group_id = %s AND del_yn = 'N'
-            """, (group_id,))
-            return cursor.fetchall()
+        return code_cache.get().codes_by_group.get(group_id, [])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
-# ✅ 전체 그룹 + 공통코드 함께 조회
+# ✅ 전체 그룹 + 공통코드 함께 조회 (code_cache 메모리에서 응답)
 @router.get("/groups", response_model=list[GroupCodeWithChildren])
 def get_groups_with_codes():
-    conn = pymysql.connect(**db_config)
     try:
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT group_id, group_name 
-                FROM group_code 
-                WHERE use_yn = 'Y' AND del_yn = 'N'
-            """)
-            groups = cursor.fetchall()
-
-            cursor.execute("""
-                SELECT code_id, code_name, group_id 
-                FROM common_code 
-                WHERE use_yn = 'Y' AND del_yn = 'N'
-            """)
-            codes = cursor.fetchall()
-
-        group_map = {g["group_id"]: {**g, "common_codes": []} for g in groups}
-        for code in codes:
-            if code["group_id"] in group_map:
-                group_map[code["group_id"]]["common_codes"].append({
-                    "code_id": code["code_id"],
-                    "code_name": code["code_name"]
-                })
-
-        return list(group_map.values())
+        return code_cache.get().groups
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 @router.get("/alerts")
-def get_alerts(user: dict = Depends(get_current_user)):
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT *
-                FROM alerts
-                WHERE target_user = %s AND del_yn = 'N'
-                ORDER BY create_dt DESC
-            """, (user["user_id"],))
-            row1 = list(cursor.fetchall())
-            print("row1 type:", type(row1))  # 👈 이거 찍어보면 확실
-
-            if user["role"] in ("R03", "R04"):
-                cursor.execute("""
-                    SELECT *
-                    FROM alerts
-                    WHERE target_user = "R03" AND del_yn = 'N'
-                    ORDER BY create_dt DESC
-                """)
-                row2 = cursor.fetchall()
-                row1.extend(row2)
-
-        return row1
-    finally:
-        conn.close()
+def get_alerts(
+    response: Response,
+    limit: int = Query(ALERT_PAGE_SIZE, ge=1, le=ALERT_PAGE_MAX),
+    cursor: Optional[str] = Query(None),
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db),
+):
+    # 내 알림 + 확인 안 한 공용 알림을 SQL 에서 합쳐 최신순 keyset 페이지로 조회
+    with conn.cursor(pymysql.cursors.DictCursor) as cur:
+        visible_sql, params = visible_alerts_filter(cur, user)
+        where = [visible_sql, "del_yn = 'N'"]
+        if cursor:
+            before_dt, before_id = decode_cursor(cursor)
+            where.append("(create_dt < %s OR (create_dt = %s AND alert_id < %s))")
+            params += [before_dt, before_dt, before_id]
+
+        cur.execute(f"""
+            SELECT *
+            FROM alerts
+            WHERE {' AND '.join(where)}
+            ORDER BY create_dt DESC, alert_id DESC
+            LIMIT %s
+        """, (*params, limit + 1))
+        rows = list(cur.fetchall())
+
+    # 응답 모양(배열)은 그대로 두고 다음 페이지 커서는 헤더로 전달
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    return rows
+
+
+@router.get("/alerts/unread-count")
+def get_unread_alert_count(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        visible_sql, params = visible_alerts_filter(cursor, user)
+        cursor.execute(f"""
+            SELECT COUNT(*) AS count
+            FROM alerts
+            WHERE {visible_sql} AND del_yn = 'N'
+        """, params)
+        return {"count": cursor.fetchone()["count"]}
+
+
+@router.get("/alerts/stream")
+async def stream_alerts(
+    request: Request,
+    since: Optional[int] = Query(None),
+    last_event_id: Optional[str] = Header(None),
+    user: dict = Depends(get_stream_user),
+):
+    # 재연결이면 브라우저가 Last-Event-ID 를 붙여 보냄
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def event_stream():
+        # backlog 조회 전에 먼저 구독해야 그 사이 알림을 놓치지 않음
+        sub = alert_broker.subscribe(stream_keys(user))
+        try:
+            sent_ids = set()
+            if since is not None:
+                for row in await run_in_threadpool(load_alerts_since, user, since):
+                    sent_ids.add(row["alert_id"])
+                    yield format_event("alert", row, row["alert_id"])
+
+            while not await request.is_disconnected():
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), timeout=PING_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"  # 프록시가 연결을 끊지 않도록
+                    continue
+                if item is None:
+                    break  # 밀린 연결 → 끊고 재연결로 이어받게 함
+                event, row = item
+                if row["alert_id"] in sent_ids:
+                    continue
+                # chat 알림은 backlog 대상이 아니므로 Last-Event-ID 를 바꾸지 않음
+                yield format_event(event, row, row["alert_id"] if event == "alert" else None)
+        finally:
+            alert_broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.put("/alerts/{alert_id}/delete")
-def delete_alert(alert_id: int, user: dict = Depends(get_current_user)):
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor() as cursor:
-            # 해당 알림을 del_yn = 'Y'로 업데이트
-            cursor.execute("""
-                UPDATE alerts
-                SET del_yn = 'Y', update_dt = NOW(), update_id = %s
-                WHERE alert_id = %s AND target_user = %s
-            """, (user["user_id"], alert_id, user["user_id"]))
-
-            if user["role"] in ("R03", "R04"):
-            # 관리자면 target_user가 "R03" 인것도 delyn
-                cursor.execute("""
-                    UPDATE alerts
-                    SET del_yn = 'Y', update_dt = NOW(), update_id = %s
-                    WHERE alert_id = %s AND target_user = "R03"
-                """, (user["user_id"], alert_id))
-
-        conn.commit()
-        return {"message": "알림이 삭제되었습니다."}
-    finally:
-        conn.close()
+def delete_alert(alert_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor() as cursor:
+        # 해당 알림을 del_yn = 'Y'로 업데이트
+        cursor.execute("""
+            UPDATE alerts
+            SET del_yn = 'Y', update_dt = NOW(), update_id = %s
+            WHERE alert_id = %s AND target_user = %s
+        """, (user["user_id"], alert_id, user["user_id"]))
+
+        if cursor.rowcount == 0:
+            # 공용 알림이면 내 확인 상태만 변경 (다른 사용자에게는 그대로 보임)
+            dismiss_broadcasts(cursor, user, [alert_id])
+
+    return {"message": "알림이 삭제되었습니다."}
+
+
+@router.put("/alerts/bulk-delete")
+def bulk_delete_alerts(body: AlertBulkRequest, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    if len(body.alert_ids) > ALERT_BULK_MAX:
+        raise HTTPException(status_code=400, detail=f"한 번에 {ALERT_BULK_MAX}개까지 삭제할 수 있습니다.")
+
+    selectors, params = [], []
+    if body.alert_ids:
+        selectors.append(f"alert_id IN ({', '.join(['%s'] * len(body.alert_ids))})")
+        params += body.alert_ids
+    if body.before:
+        before_dt, before_id = decode_cursor(body.before)
+        selectors.append("(create_dt < %s OR (create_dt = %s AND alert_id < %s))")
+        params += [before_dt, before_dt, before_id]
+    if not selectors and not body.category:
+        raise HTTPException(status_code=400, detail="삭제할 알림을 지정해주세요.")
+
+    conditions = [f"({' OR '.join(selectors)})"] if selectors else []
+    if body.category:
+        conditions.append("category = %s")
+        params.append(body.category)
+    condition = " AND ".join(conditions)
+
+    with conn.cursor() as cursor:
+        # 개인 알림은 UPDATE 한 번
+        cursor.execute(f"""
+            UPDATE alerts
+            SET del_yn = 'Y', update_dt = NOW(), update_id = %s
+            WHERE target_user = %s AND del_yn = 'N' AND {condition}
+        """, (user["user_id"], user["user_id"], *params))
+        deleted = cursor.rowcount
+        # 공용 알림은 내 확인 상태만 한 번에 변경
+        deleted += dismiss_broadcasts_where(cursor, user, condition, params)
+
+    return {"message": "알림이 삭제되었습니다.", "deleted": deleted}
 
 
 @router.get("/teamMemberId/{project_id}/{user_id}")
-def get_teamMemberId(project_id: int, user_id: str):
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT *
-                FROM team_member
-                WHERE project_id = %s AND user_id = %s AND del_yn = 'N'
-            """, (project_id, user_id))
-
-        data = cursor.fetchone()
-        if data:
-            return data
-        
-        return {"team_member_id": "공용"}
-    finally:
-        conn.close()
+def get_teamMemberId(project_id: int, user_id: str, conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("""
+            SELECT *
+            FROM team_member
+            WHERE project_id = %s AND user_id = %s AND del_yn = 'N'
+        """, (project_id, user_id))
+
+    data = cursor.fetchone()
+    if data:
+        return data
+    
+    return {"team_member_id": "공용"}
 
 
 @router.get("/alerts/{teamMemberId}/{pmId}")
-def get_alertsList(teamMemberId: int, pmId: str):
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT *
-                FROM alerts
-                WHERE value_id = %s AND target_user = "" AND create_id = %s AND del_yn = 'N'
-            """, (teamMemberId, pmId))
-
-        results = cursor.fetchall()
-        alert_count = len(results)
-        
-        return {"count": alert_count}
-    finally:
-        conn.close()
+def get_alertsList(teamMemberId: int, pmId: str, conn: DBSession = Depends(get_db)):
+    # alert_counter 에 유지 중인 값을 PK 로 바로 조회
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        alert_count = chat_alert_count(cursor, pmId, teamMemberId)
 
+    return {"count": alert_count}
 
-@router.post("/alertsCheck")
-def alertsCheck(body: dict = Body(...)):
-    # DB 연결
-    conn = pymysql.connect(**db_config)
+
+@router.get("/alerts/project/{project_id}/chat-counts")
+def get_project_chat_counts(project_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    # 팀원별 채널 배지 수를 alert_counter 조인으로 한 번에 조회 (관리자/PM 은 전체, 팀원은 본인 것만)
     with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        counts = chat_alert_counts(cursor, project_id)
+    if user["role"] not in ADMIN_ROLES:
+        counts = [row for row in counts if user["user_id"] in (row["user_id"], row["pm_id"])]
+    return {"counts": counts}
 
-        cursor.execute("""
-            UPDATE alerts SET del_yn ='Y' WHERE target_user = "" AND create_id = %s AND value_id = %s AND category = "chat" AND del_yn ='N'
-        """, (body["user_id"], body["teamMemberId"],))
 
-        conn.commit()
+@router.post("/alertsCheck")
+def alertsCheck(body: dict = Body(...)):
+    # 채널을 열 때마다 호출되므로 DB 는 건드리지 않고 버퍼에만 기록 (주기적으로 모아서 반영)
+    # 화면 로딩 중이라 teamMemberId 가 아직 비어 있으면 기록하지 않음 (예전처럼 200 응답)
+    chat_read_buffer.mark(body.get("user_id"), body.get("teamMemberId"))
 
     return {"message": "알람체크 완료!"}
\ No newline at end of file
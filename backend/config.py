@@ -3,4 +3,9 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-FRONT_BASE_URL = os.getenv("FRONT_BASE_URL", "http://localhost:3000")
\ No newline at end of file
+FRONT_BASE_URL = os.getenv("FRONT_BASE_URL", "http://localhost:3000")
+# 업로드 파일 저장 최상위 경로 / 응답에 넣을 정적 파일 주소
+UPLOAD_ROOT = os.getenv("UPLOAD_ROOT", "C:/Users/admin/uploads")
+STATIC_BASE_URL = os.getenv("STATIC_BASE_URL", "http://localhost:8001/static")
+# nginx X-Accel-Redirect 로 넘길 internal 경로 (비우면 애플리케이션이 직접 전송)
+STATIC_ACCEL_REDIRECT = os.getenv("STATIC_ACCEL_REDIRECT", "")
@@ -0,0 +1,285 @@
+"""
+----------------------------------------------------------------------
+파일명     : db_pool.py
+설명       : database.db_config 기반 MySQL 커넥션 풀 모듈
+
+주요 기능
+----------------------------------------------------------------------
+1. 커넥션 풀 (`ConnectionPool`)
+   - 최대 크기(DB_POOL_SIZE)까지만 커넥션 생성, 초과 요청은 대기
+   - 대기 시간(DB_POOL_TIMEOUT) 초과 시 PoolTimeoutError 발생
+   - 체크아웃 시 pre-ping 으로 끊어진 커넥션 교체
+   - 생성 후 DB_POOL_RECYCLE 초가 지난 커넥션은 재생성
+
+2. 커넥션 대여 (`get_connection`)
+   - 라우터 밖(백그라운드 작업 등)에서 커넥션이 필요할 때 사용
+   - 반환 객체의 close() 는 실제 종료가 아니라 풀 반납
+   - 반납 시 커밋되지 않은 트랜잭션은 rollback 처리
+
+3. 요청 단위 세션 (`get_db`)
+   - `conn = Depends(get_db)` 로 요청당 커넥션/트랜잭션 하나를 공유
+   - get_current_user 와 핸들러가 같은 세션을 사용
+   - 정상 종료 시 한 번 commit, 예외 발생 시 rollback
+   - after_commit() 으로 커밋 이후 실행할 작업 등록 가능
+
+4. 풀 지표 (`pool.stats()`)
+   - 전체/유휴/사용중 커넥션 수, 대기자 수, 타임아웃 횟수 등
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- DB_POOL_SIZE     : 최대 커넥션 수 (기본 10)
+- DB_POOL_TIMEOUT  : 체크아웃 대기 최대 시간(초) (기본 5)
+- DB_POOL_RECYCLE  : 커넥션 재생성 주기(초) (기본 1800, MySQL wait_timeout 보다 짧게)
+- DB_POOL_PRE_PING : 체크아웃 시 ping 여부 (Y/N, 기본 Y)
+----------------------------------------------------------------------
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import pymysql
+from database import db_config
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "Y").upper() == "Y"
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """DB_POOL_TIMEOUT 안에 커넥션을 받지 못한 경우"""
+
+
+class PooledConnection:
+    """풀에서 빌려준 커넥션 (close() 하면 풀에 반납)"""
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._released = False
+
+    def close(self):
+        # 여러 번 close 해도 한 번만 반납
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self._raw, self._created_at)
+
+    def __getattr__(self, name):
+        # cursor(), commit(), rollback() 등은 실제 pymysql 커넥션으로 위임
+        return getattr(self._raw, name)
+
+
+class ConnectionPool:
+    def __init__(self, config, size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 recycle=POOL_RECYCLE, pre_ping=POOL_PRE_PING):
+        self._config = config
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+
+        self._idle = deque()          # (raw, created_at)
+        self._cond = threading.Condition()
+        self._total = 0               # 현재 열려 있는 커넥션 수 (유휴 + 사용중)
+        self._waiting = 0
+
+        # 지표
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._ping_failures = 0
+        self._wait_seconds = 0.0
+
+    def _connect(self):
+        raw = pymysql.connect(**self._config)
+        with self._cond:
+            self._created += 1
+        return raw, time.monotonic()
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    def acquire(self) -> PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        raw = None
+        created_at = None
+
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._idle:
+                        raw, created_at = self._idle.pop()  # 최근 반납된 것부터 (LIFO)
+                        break
+                    if self._total < self.size:
+                        self._total += 1  # 자리 먼저 확보 후 락 밖에서 연결
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"DB 커넥션 대기 시간 초과 ({self.timeout}초, 풀 크기 {self.size})"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+            self._checkouts += 1
+            self._wait_seconds += time.monotonic() - started
+
+        try:
+            if raw is None:
+                raw, created_at = self._connect()
+            elif self.recycle and time.monotonic() - created_at > self.recycle:
+                # 오래된 커넥션은 서버 쪽에서 끊겼을 수 있으니 새로 만듦
+                try:
+                    raw.close()
+                except Exception:
+                    pass
+                with self._cond:
+                    self._recycled += 1
+                raw, created_at = self._connect()
+            elif self.pre_ping:
+                try:
+                    raw.ping(reconnect=False)
+                except Exception:
+                    with self._cond:
+                        self._ping_failures += 1
+                    try:
+                        raw.close()
+                    except Exception:
+                        pass
+                    raw, created_at = self._connect()
+        except Exception:
+            # 연결 실패 시 확보했던 자리 반환
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+        return PooledConnection(self, raw, created_at)
+
+    def _release(self, raw, created_at):
+        if not raw.open:
+            self._discard(raw)
+            return
+        try:
+            raw.rollback()  # 커밋 안 된 작업은 다음 사용자에게 넘기지 않음
+        except Exception:
+            self._discard(raw)
+            return
+        with self._cond:
+            self._idle.append((raw, created_at))
+            self._cond.notify()
+
+    def dispose(self):
+        """유휴 커넥션 모두 종료 (서버 종료 시)"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._total -= len(idle)
+        for raw, _ in idle:
+            try:
+                raw.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._total,
+                "idle": len(self._idle),
+                "in_use": self._total - len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "recycled": self._recycled,
+                "ping_failures": self._ping_failures,
+                "avg_wait_ms": round(self._wait_seconds * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+            }
+
+
+pool = ConnectionPool(db_config)
+
+
+def get_connection() -> PooledConnection:
+    return pool.acquire()
+
+
+class DBSession:
+    """요청 단위 DB 세션 (처음 cursor() 를 호출할 때 풀에서 커넥션 대여)"""
+
+    def __init__(self):
+        self._conn = None
+        self._after_commit = []
+
+    @property
+    def connection(self) -> PooledConnection:
+        if self._conn is None:
+            self._conn = get_connection()
+        return self._conn
+
+    def cursor(self, *args, **kwargs):
+        return self.connection.cursor(*args, **kwargs)
+
+    def after_commit(self, callback):
+        """커밋이 성공한 뒤에 실행할 작업 등록 (캐시 무효화, 알림 전송 등)"""
+        self._after_commit.append(callback)
+
+    def commit(self):
+        if self._conn is not None:
+            self._conn.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("after_commit 작업 실패")
+
+    def rollback(self):
+        self._after_commit = []
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def release(self):
+        """지금까지의 작업을 커밋하고 커넥션을 풀에 반납 (오래 걸리는 작업 전에, 이후 cursor() 는 새로 대여)"""
+        self.commit()
+        self.close()
+
+
+def get_db():
+    """
+    FastAPI 의존성: 요청 하나당 DB 세션 하나
+    - get_current_user 와 라우트 핸들러가 같은 세션(커넥션)을 공유
+    - 핸들러가 정상 종료되면 commit, 예외(HTTPException 포함)면 rollback
+    """
+    session = DBSession()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
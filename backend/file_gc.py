@@ -0,0 +1,321 @@
+"""
+----------------------------------------------------------------------
+파일명     : file_gc.py
+설명       : 업로드 파일 삭제 대기열 처리 + 주기적인 고아 파일 정리 작업
+
+주요 기능
+----------------------------------------------------------------------
+1. 삭제 대기열 처리 (`process_queue`, FILE_DELETE_POLL_SECONDS 마다)
+   - file_delete_queue (sql/file_delete_queue.sql) 에서 due_dt 가 지난 항목을 FILE_DELETE_BATCH 개씩 처리
+     항목마다 SELECT ... FOR UPDATE SKIP LOCKED 로 잠가서 워커가 여러 개여도 한 곳에서만 처리
+   - 내용 주소 파일은 file_blob 행을 잠그고 ref_count 가 아직 0 인지 다시 확인
+     · 그 사이 다시 쓰이게 됐으면 지우지 않고 대기열에서만 제거
+     · 0 이면 원본 + 썸네일/WebP 변환 파일 삭제, file_blob / image_job 행 삭제
+   - 실패하면 attempts +1, 1분 × 시도 횟수 뒤에 다시 처리 (FILE_DELETE_MAX_ATTEMPTS 회까지)
+
+2. 고아 파일 정리 (`run_gc`, FILE_GC_INTERVAL 마다 / 관리자 API)
+   - 삭제된 글(project_channel.del_yn = 'Y')이 FILE_GC_GRACE_DAYS 일 지나면 첨부 파일 연결 해제
+     (upload_utils.release_files → 참조 수 감소, 삭제 대기열 등록)
+   - ref_count 가 0 인데 대기열에 없는 file_blob
+   - 채널 이미지가 쓰는 경로만 저장소 목록(storage.list)과 DB 비교
+     (UPLOAD_ROOT 의 다른 파일은 건드리지 않음)
+     · blobs/ 아래 파일 중 file_blob 에 없는 해시 (DB 처리 전에 서버가 죽은 경우 등)
+     · projectchannel/ 아래 파일 중 post_file.file_path 에 없는 파일 (예전 방식 파일)
+     · 수정 후 FILE_GC_GRACE_DAYS 일이 지나지 않은 파일은 건너뜀 (업로드 진행 중일 수 있음)
+   - dry_run=True 면 아무것도 바꾸지 않고 정리 가능한 파일 수 / 용량만 보고
+     주기 실행은 기본 dry-run, FILE_GC_DRY_RUN=N 으로 명시해야 실제로 삭제
+   - 워커가 여러 개여도 GET_LOCK('file_gc') 을 잡은 하나만 실행
+
+3. 실행 관리
+   - 서버 시작 시 start(), 종료 시 stop() (main.py)
+   - 삭제 건수, 마지막 정리 보고서 지표 제공 (/metrics)
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- FILE_GC_ENABLED            : 작업 사용 여부 (Y/N, 기본 Y)
+- FILE_DELETE_POLL_SECONDS   : 삭제 대기열 확인 주기(초) (기본 30)
+- FILE_DELETE_BATCH          : 한 번에 처리할 대기열 항목 수 (기본 100)
+- FILE_DELETE_MAX_ATTEMPTS   : 최대 시도 횟수 (기본 5)
+- FILE_GC_INTERVAL           : 고아 파일 정리 주기(초) (기본 86400)
+- FILE_GC_GRACE_DAYS         : 삭제된 글 / 고아 파일 보관 기간(일) (기본 7)
+- FILE_GC_DRY_RUN            : 주기 실행은 보고만 할지 여부 (Y/N, 기본 Y)
+----------------------------------------------------------------------
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import pymysql
+from db_pool import get_connection
+from storage import storage, key_for
+from upload_utils import BLOB_PREFIX, DELETE_DELAY, release_files
+from image_variants import VARIANTS, variant_key
+
+GC_ENABLED = os.getenv("FILE_GC_ENABLED", "Y").upper() == "Y"
+DELETE_POLL_SECONDS = float(os.getenv("FILE_DELETE_POLL_SECONDS", "30"))
+DELETE_BATCH = int(os.getenv("FILE_DELETE_BATCH", "100"))
+DELETE_MAX_ATTEMPTS = int(os.getenv("FILE_DELETE_MAX_ATTEMPTS", "5"))
+GC_INTERVAL = float(os.getenv("FILE_GC_INTERVAL", "86400"))
+GC_GRACE_DAYS = int(os.getenv("FILE_GC_GRACE_DAYS", "7"))
+GC_DRY_RUN = os.getenv("FILE_GC_DRY_RUN", "Y").upper() != "N"
+
+LOCK_NAME = "file_gc"
+
+# 예전 방식(파일명 기반)으로 저장된 채널 이미지 경로
+LEGACY_PREFIX = "projectchannel"
+
+# blobs/ab/{64자리 해시}.ext 또는 {해시}_thumb.webp
+BLOB_NAME = re.compile(r"^(?P<hash>[0-9a-f]{64})(?:_[a-z0-9]+)?\.[a-z0-9]+$")
+
+logger = logging.getLogger(__name__)
+
+
+class GCLocked(Exception):
+    """다른 워커가 정리 작업을 실행 중"""
+
+
+class FileGC:
+    def __init__(self, interval=DELETE_POLL_SECONDS, gc_interval=GC_INTERVAL, batch=DELETE_BATCH):
+        self.interval = interval
+        self.gc_interval = gc_interval
+        self.batch = batch
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        self._counts = {"deleted": 0, "reused": 0, "failed": 0, "errors": 0, "gc_runs": 0}
+        self._last_report = None
+
+    # ------------------------------------------------------------------
+    # 삭제 대기열
+    # ------------------------------------------------------------------
+    def _delete_blob(self, cursor, item) -> str:
+        cursor.execute("SELECT ref_count FROM file_blob WHERE content_hash = %s FOR UPDATE",
+                       (item["content_hash"],))
+        row = cursor.fetchone()
+        if row and row["ref_count"] > 0:
+            return "reused"
+        for name in VARIANTS:
+            storage.delete(variant_key(item["storage_key"], name))
+        storage.delete(item["storage_key"])
+        cursor.execute("DELETE FROM file_blob WHERE content_hash = %s", (item["content_hash"],))
+        cursor.execute("DELETE FROM image_job WHERE content_hash = %s", (item["content_hash"],))
+        return "deleted"
+
+    def process_queue(self) -> int:
+        """삭제 대기열을 한 묶음 처리, 처리한 항목 수 반환"""
+        conn = get_connection()
+        try:
+            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute("""
+                    SELECT queue_id, storage_key, content_hash, attempts
+                    FROM file_delete_queue
+                    WHERE due_dt <= NOW() AND attempts < %s
+                    ORDER BY due_dt
+                    LIMIT %s
+                """, (DELETE_MAX_ATTEMPTS, self.batch))
+                items = cursor.fetchall()
+                conn.commit()
+
+                for item in items:
+                    # 항목마다 짧은 트랜잭션 (file_blob 행 잠금을 오래 잡지 않도록)
+                    try:
+                        cursor.execute("SELECT queue_id FROM file_delete_queue WHERE queue_id = %s FOR UPDATE SKIP LOCKED",
+                                       (item["queue_id"],))
+                        if not cursor.fetchone():
+                            conn.rollback()
+                            continue  # 다른 워커가 처리 중
+                        if item["content_hash"]:
+                            result = self._delete_blob(cursor, item)
+                        else:
+                            storage.delete(item["storage_key"])
+                            result = "deleted"
+                        cursor.execute("DELETE FROM file_delete_queue WHERE queue_id = %s", (item["queue_id"],))
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        logger.warning("파일 삭제 실패 (%s): %s", item["storage_key"], e)
+                        cursor.execute("""
+                            UPDATE file_delete_queue
+                            SET attempts = attempts + 1, last_error = %s,
+                                due_dt = NOW() + INTERVAL %s MINUTE
+                            WHERE queue_id = %s
+                        """, (str(e)[:500], item["attempts"] + 1, item["queue_id"]))
+                        conn.commit()
+                        result = "failed"
+                    with self._lock:
+                        self._counts[result] += 1
+                return len(items)
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # 고아 파일 정리
+    # ------------------------------------------------------------------
+    def _deleted_posts(self, cursor):
+        """보관 기간이 지난 삭제 글의 첨부 파일 → (글별 file_id 목록, 정리될 blob 용량, 예전 파일 키 목록)"""
+        cursor.execute("""
+            SELECT pf.channel_id, pf.file_id, pf.file_path, pf.content_hash
+            FROM post_file pf
+            JOIN project_channel pc ON pc.channel_id = pf.channel_id
+            WHERE pc.del_yn = 'Y'
+              AND COALESCE(pc.update_dt, pc.create_dt) < NOW() - INTERVAL %s DAY
+        """, (GC_GRACE_DAYS,))
+        by_channel, released, legacy = {}, {}, []
+        for row in cursor.fetchall():
+            by_channel.setdefault(row["channel_id"], []).append(row["file_id"])
+            if row["content_hash"]:
+                released[row["content_hash"]] = released.get(row["content_hash"], 0) + 1
+            elif row["file_path"]:
+                legacy.append(key_for(row["file_path"]))
+
+        blob_bytes = 0
+        if released:
+            hashes = list(released)
+            cursor.execute(f"""
+                SELECT content_hash, size, ref_count FROM file_blob
+                WHERE content_hash IN ({', '.join(['%s'] * len(hashes))})
+            """, hashes)
+            # 다른(살아 있는) 글이 같이 쓰는 파일은 남음
+            blob_bytes = sum(row["size"] for row in cursor.fetchall()
+                             if row["ref_count"] <= released[row["content_hash"]])
+        return by_channel, blob_bytes, legacy
+
+    def _scan_orphans(self, cursor):
+        """저장소 목록과 DB 비교 → (고아 파일 [(키, 해시 또는 None, 크기)], 키별 크기)"""
+        cursor.execute("SELECT content_hash FROM file_blob")
+        known_hashes = {row["content_hash"] for row in cursor.fetchall()}
+        cursor.execute("SELECT file_path FROM post_file WHERE content_hash IS NULL")
+        known_keys = {key_for(row["file_path"]) for row in cursor.fetchall() if row["file_path"]}
+        cursor.execute("SELECT storage_key FROM file_delete_queue")
+        known_keys.update(row["storage_key"] for row in cursor.fetchall())  # 이미 삭제 대기 중
+
+        cutoff = time.time() - GC_GRACE_DAYS * 86400
+        orphans, sizes = [], {}
+        for key, size, mtime in storage.list(BLOB_PREFIX + "/"):
+            sizes[key] = size
+            match = BLOB_NAME.match(key.rsplit("/", 1)[-1])
+            # 이름이 해시 형식이 아닌 파일은 이 기능이 만든 것이 아니므로 건드리지 않음
+            if mtime <= cutoff and match and match.group("hash") not in known_hashes:
+                orphans.append((key, match.group("hash"), size))
+        for key, size, mtime in storage.list(LEGACY_PREFIX + "/"):
+            sizes[key] = size
+            if mtime <= cutoff and key not in known_keys:
+                orphans.append((key, None, size))
+        return orphans, sizes
+
+    def run_gc(self, dry_run=GC_DRY_RUN) -> dict:
+        """고아 파일 정리 한 번 실행 → 보고서 (dry_run 이면 보고만), 다른 워커가 실행 중이면 GCLocked"""
+        conn = get_connection()
+        try:
+            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute("SELECT GET_LOCK(%s, 0) AS locked", (LOCK_NAME,))
+                if not cursor.fetchone()["locked"]:
+                    raise GCLocked()
+                try:
+                    started = time.monotonic()
+                    by_channel, post_blob_bytes, post_legacy = self._deleted_posts(cursor)
+
+                    cursor.execute("""
+                        SELECT b.content_hash, b.file_path, b.size
+                        FROM file_blob b
+                        WHERE b.ref_count = 0
+                          AND NOT EXISTS (SELECT 1 FROM file_delete_queue q WHERE q.content_hash = b.content_hash)
+                    """)
+                    unqueued = cursor.fetchall()
+
+                    orphans, sizes = self._scan_orphans(cursor)
+
+                    report = {
+                        "dry_run": dry_run,
+                        "deleted_posts": {
+                            "posts": len(by_channel),
+                            "files": sum(len(ids) for ids in by_channel.values()),
+                            "bytes": post_blob_bytes + sum(sizes.get(key, 0) for key in post_legacy),
+                        },
+                        "unreferenced_blobs": {
+                            "files": len(unqueued),
+                            "bytes": sum(row["size"] for row in unqueued),
+                        },
+                        "orphan_files": {
+                            "files": len(orphans),
+                            "bytes": sum(size for _, _, size in orphans),
+                        },
+                    }
+                    report["reclaimable_bytes"] = sum(
+                        part["bytes"] for part in (report["deleted_posts"], report["unreferenced_blobs"],
+                                                   report["orphan_files"]))
+
+                    if not dry_run:
+                        for channel_id, file_ids in by_channel.items():
+                            release_files(cursor, channel_id, file_ids)
+                        # 대기열 처리 때 ref_count 를 다시 확인
+                        items = [(row["file_path"], row["content_hash"], DELETE_DELAY) for row in unqueued]
+                        items += [(key, content_hash, DELETE_DELAY) for key, content_hash, _ in orphans]
+                        if items:
+                            cursor.executemany("""
+                                INSERT INTO file_delete_queue (storage_key, content_hash, due_dt, create_dt)
+                                VALUES (%s, %s, NOW() + INTERVAL %s SECOND, NOW())
+                            """, items)
+                        conn.commit()
+                finally:
+                    cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+
+            report["elapsed"] = round(time.monotonic() - started, 1)
+            report["run_at"] = datetime.now().isoformat(timespec="seconds")
+            logger.info("파일 정리%s: 정리 가능 %d bytes", " (dry-run)" if dry_run else "", report["reclaimable_bytes"])
+            with self._lock:
+                self._counts["gc_runs"] += 1
+                self._last_report = report
+            return report
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # 실행 관리
+    # ------------------------------------------------------------------
+    def _loop(self):
+        next_gc = time.monotonic() + self.gc_interval
+        while not self._stop.wait(self.interval):
+            try:
+                while self.process_queue() >= self.batch and not self._stop.is_set():
+                    pass  # 밀린 항목이 있으면 바로 다음 묶음
+                if time.monotonic() >= next_gc:
+                    next_gc = time.monotonic() + self.gc_interval
+                    self.run_gc()
+            except GCLocked:
+                pass
+            except Exception:
+                with self._lock:
+                    self._counts["errors"] += 1
+                logger.exception("파일 정리 작업 실패")
+
+    def start(self):
+        if not GC_ENABLED or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="file-gc", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": GC_ENABLED,
+                "interval": self.interval,
+                "gc_interval": self.gc_interval,
+                **self._counts,
+                "last_report": self._last_report,
+            }
+
+
+file_gc = FileGC()
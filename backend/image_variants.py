@@ -0,0 +1,253 @@
+"""
+----------------------------------------------------------------------
+파일명     : image_variants.py
+설명       : 채널 이미지 썸네일 / WebP 변환 백그라운드 작업
+
+주요 기능
+----------------------------------------------------------------------
+1. 작업 대기열 (image_job 테이블, sql/image_job.sql)
+   - 이미지가 post_file 에 연결될 때 content_hash 기준으로 한 건 등록 (upload_utils.register_files)
+     같은 이미지는 한 번만 변환 (내용 주소 저장과 같은 기준)
+   - 상태: Q(대기) → R(처리 중) → D(완료) / F(실패, IMAGE_JOB_MAX_ATTEMPTS 회 초과)
+   - DB 에 남으므로 서버가 재시작돼도 이어서 처리
+     처리 중(R) 상태로 IMAGE_JOB_STALE_SECONDS 가 지난 작업은 다시 가져감
+     (변환 중 워커가 죽는 이미지도 IMAGE_JOB_MAX_ATTEMPTS 회까지만, 넘으면 F)
+   - 워커가 여러 개여도 SELECT ... FOR UPDATE SKIP LOCKED 로 한 작업은 한 곳에서만 처리
+
+2. 변환 (`ImagePipeline`)
+   - 프로세스 풀(IMAGE_WORKERS)에서 Pillow 로 변환 → API 스레드/이벤트 루프와 분리
+   - 원본을 저장소에서 받아(storage.fetch, 로컬은 그대로) 변환 후 원본 키 옆에 올림
+     · {해시}_thumb.webp : 긴 변 IMAGE_THUMB_SIZE 이하 (목록/미리보기용)
+     · {해시}_view.webp  : 긴 변 IMAGE_VIEW_SIZE 이하 (상세 화면용)
+   - EXIF 회전 반영, 원본보다 크게 늘리지 않음
+
+3. URL (`variant_urls`)
+   - 변환이 끝난 이미지는 thumb_url / view_url 로 WebP 주소
+   - 아직 안 끝났거나 실패했으면 원본 주소
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- IMAGE_PIPELINE_ENABLED  : 변환 작업 사용 여부 (Y/N, 기본 Y, Pillow 가 없으면 사용 안 함)
+- IMAGE_WORKERS           : 변환 프로세스 수 (기본 2)
+- IMAGE_JOB_POLL_SECONDS  : 대기 작업 확인 주기(초) (기본 2)
+- IMAGE_JOB_MAX_ATTEMPTS  : 최대 시도 횟수 (기본 3)
+- IMAGE_JOB_STALE_SECONDS : 처리 중 상태로 이 시간이 지나면 다시 처리 (기본 300)
+- IMAGE_THUMB_SIZE        : 썸네일 긴 변 (기본 320)
+- IMAGE_VIEW_SIZE         : 상세 이미지 긴 변 (기본 1600)
+- IMAGE_WEBP_QUALITY      : WebP 품질 (기본 80)
+
+비고
+----------------------------------------------------------------------
+- Pillow 는 선택 의존성 (pip install Pillow), 없으면 작업은 대기 상태로 남고 원본 주소를 응답
+----------------------------------------------------------------------
+"""
+
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pymysql
+from db_pool import get_connection
+from storage import storage, key_for
+from upload_utils import file_url
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow 미설치
+    Image = None
+
+PIPELINE_ENABLED = os.getenv("IMAGE_PIPELINE_ENABLED", "Y").upper() == "Y"
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+POLL_SECONDS = float(os.getenv("IMAGE_JOB_POLL_SECONDS", "2"))
+MAX_ATTEMPTS = int(os.getenv("IMAGE_JOB_MAX_ATTEMPTS", "3"))
+STALE_SECONDS = int(os.getenv("IMAGE_JOB_STALE_SECONDS", "300"))
+THUMB_SIZE = int(os.getenv("IMAGE_THUMB_SIZE", "320"))
+VIEW_SIZE = int(os.getenv("IMAGE_VIEW_SIZE", "1600"))
+WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+
+# 변형 이름 → 긴 변 최대 크기
+VARIANTS = {"thumb": THUMB_SIZE, "view": VIEW_SIZE}
+
+logger = logging.getLogger(__name__)
+
+
+def variant_key(file_path, name) -> str:
+    return os.path.splitext(key_for(file_path))[0] + f"_{name}.webp"
+
+
+def variant_urls(file_path, job_status) -> dict:
+    """원본 경로 + 변환 상태 → 화면별 이미지 주소"""
+    if job_status != "D":
+        original = file_url(file_path)
+        return {name + "_url": original for name in VARIANTS}
+    return {name + "_url": storage.url(variant_key(file_path, name)) for name in VARIANTS}
+
+
+# 프로세스 풀에서 실행되는 함수 (pickle 가능하도록 모듈 최상위에 정의)
+def _make_variants(src, outputs, quality):
+    with Image.open(src) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        for path, size in outputs:
+            copy = image.copy()
+            copy.thumbnail((size, size))  # 비율 유지, 원본보다 크게 늘리지 않음
+            copy.save(path, "WEBP", quality=quality, method=4)
+
+
+def _discard(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass  # put_file 로 이미 옮겨짐
+
+
+class ImagePipeline:
+    def __init__(self, workers=IMAGE_WORKERS, interval=POLL_SECONDS):
+        self.workers = workers
+        self.interval = interval
+        self.enabled = PIPELINE_ENABLED and Image is not None
+        self._executor = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+        self._counts = {"done": 0, "failed": 0, "retried": 0}
+
+    def _claim(self, cursor):
+        # 처리 중에 멈춘 작업(워커 종료, 압축 폭탄 등)은 _finish 를 거치지 않으므로 여기서 실패 처리
+        cursor.execute("""
+            UPDATE image_job
+            SET status = 'F', last_error = '처리 중 중단 (최대 시도 횟수 초과)', update_dt = NOW()
+            WHERE status = 'R' AND update_dt < NOW() - INTERVAL %s SECOND AND attempts >= %s
+        """, (STALE_SECONDS, MAX_ATTEMPTS))
+        if cursor.rowcount:
+            with self._lock:
+                self._counts["failed"] += cursor.rowcount
+        cursor.execute("""
+            SELECT j.job_id, j.content_hash, j.attempts, b.file_path
+            FROM image_job j
+            JOIN file_blob b ON b.content_hash = j.content_hash
+            WHERE j.status = 'Q'
+               OR (j.status = 'R' AND j.update_dt < NOW() - INTERVAL %s SECOND AND j.attempts < %s)
+            ORDER BY j.job_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (STALE_SECONDS, MAX_ATTEMPTS, self.workers))
+        jobs = cursor.fetchall()
+        if jobs:
+            cursor.execute(f"""
+                UPDATE image_job
+                SET status = 'R', attempts = attempts + 1, update_dt = NOW()
+                WHERE job_id IN ({', '.join(['%s'] * len(jobs))})
+            """, [job["job_id"] for job in jobs])
+        return jobs
+
+    def _finish(self, cursor, job, error):
+        if error is None:
+            cursor.execute("""
+                UPDATE image_job SET status = 'D', last_error = NULL, update_dt = NOW() WHERE job_id = %s
+            """, (job["job_id"],))
+            return "done"
+        failed = job["attempts"] + 1 >= MAX_ATTEMPTS
+        cursor.execute("""
+            UPDATE image_job SET status = %s, last_error = %s, update_dt = NOW() WHERE job_id = %s
+        """, ("F" if failed else "Q", str(error)[:500], job["job_id"]))
+        return "failed" if failed else "retried"
+
+    def run_once(self) -> int:
+        """대기 작업을 한 묶음(최대 IMAGE_WORKERS 개) 처리, 처리한 수 반환"""
+        conn = get_connection()
+        try:
+            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                jobs = self._claim(cursor)
+                conn.commit()
+                if not jobs:
+                    return 0
+
+                with contextlib.ExitStack() as stack:
+                    futures = []
+                    for job in jobs:
+                        try:
+                            src = stack.enter_context(storage.fetch(key_for(job["file_path"])))
+                            outputs = self._outputs(stack, job)
+                            futures.append((job, outputs, self._executor.submit(
+                                _make_variants, src, [(path, size) for _, path, size in outputs], WEBP_QUALITY,
+                            )))
+                        except Exception as e:
+                            futures.append((job, None, e))
+
+                    for job, outputs, future in futures:
+                        try:
+                            if isinstance(future, Exception):
+                                raise future
+                            future.result()
+                            for key, path, _ in outputs:
+                                storage.put_file(path, key, "image/webp")
+                            error = None
+                        except Exception as e:
+                            logger.warning("이미지 변환 실패 (%s): %s", job["content_hash"], e)
+                            error = e
+                        result = self._finish(cursor, job, error)
+                        with self._lock:
+                            self._counts[result] += 1
+                conn.commit()
+                return len(jobs)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _outputs(stack, job):
+        """변형별 (저장소 키, 임시 파일 경로, 크기), 임시 파일은 묶음이 끝나면 정리"""
+        os.makedirs(storage.staging_dir, exist_ok=True)
+        outputs = []
+        for name, size in VARIANTS.items():
+            fd, path = tempfile.mkstemp(suffix=".webp", dir=storage.staging_dir)
+            os.close(fd)
+            stack.callback(_discard, path)
+            outputs.append((variant_key(job["file_path"], name), path, size))
+        return outputs
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue  # 밀린 작업이 있으면 바로 다음 묶음
+            except Exception:
+                logger.exception("이미지 변환 작업 처리 실패")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            if PIPELINE_ENABLED and Image is None:
+                logger.warning("Pillow 가 설치되지 않아 이미지 변환 작업을 시작하지 않습니다.")
+            return
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="image-pipeline", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=10)
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "workers": self.workers,
+                **self._counts,
+            }
+
+
+image_pipeline = ImagePipeline()
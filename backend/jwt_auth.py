@@ -7,62 +7,353 @@
 ----------------------------------------------------------------------
 1. JWT 토큰 발급 (`create_access_token`)
    - user_id 등 사용자 정보를 payload로 포함
+   - 발급 시각(iat) 포함 (스테이트리스 모드의 폐기 판단용)
    - 기본 만료 시간: 60분
    - HS256 알고리즘을 사용하여 서명
 
 2. 사용자 인증 (`get_current_user`)
    - Authorization 헤더에서 Bearer 토큰을 추출해 디코드
    - `sub` 값에서 user_id 추출 후 DB 조회
+   - DB 조회는 요청 세션(get_db)을 라우트 핸들러와 공유
+   - 조회 결과는 user_cache 에 보관 (역할/상태 변경 시 무효화)
+   - 탈퇴(del_yn='Y') 또는 정지(status='N') 계정은 401
    - 유효한 사용자인 경우 user dict 반환
 
-3. 의존성 사용 방식
+3. 스테이트리스 모드 (JWT_STATELESS=Y, 선택)
+   - DB/캐시 조회 없이 검증된 토큰 클레임(sub, nickname, role)으로 사용자 구성
+   - 역할 변경/정지/탈퇴 시 `user_changed` 가 변경 시각을 기록 (TokenRevocations)
+     메모리 + token_revocation 테이블(sql/token_revocation.sql)에 같이 저장
+   - 변경 시각 이전에 발급된 토큰은 401 → 다시 로그인해야 새 역할이 반영됨
+   - 서버 시작 시 아직 유효한 토큰에 해당하는 기록을 모두 적재 (load)
+     이후 TOKEN_REVOCATION_SYNC_SECONDS 마다 테이블을 다시 읽어 다른 워커의 기록도 반영
+   - 변경 기록은 토큰 만료 시간이 지나면 자동 정리
+
+4. 리프레시 토큰 (`create_refresh_token`, `rotate_refresh_token`, `revoke_refresh_token`)
+   - 로그인 시 액세스 토큰과 함께 발급 (type=refresh, jti/family 클레임 포함)
+   - /user/refresh 에서 비밀번호 확인 없이 서명 + refresh_token 테이블 조회만으로 재발급
+   - 사용할 때마다 새 리프레시 토큰으로 교체(회전), 이전 토큰은 폐기
+   - 이미 폐기된 토큰이 다시 쓰이면 탈취로 보고 같은 family 전체 폐기
+   - /user/logout 시 family 전체 폐기
+   - 리프레시 토큰으로는 일반 API 인증 불가 (get_current_user 에서 거부)
+
+5. 의존성 사용 방식
    - FastAPI의 Depends + OAuth2PasswordBearer 사용
    - 각 API 라우트에서 `Depends(get_current_user)`로 인증 적용 가능
+   - 스트림(SSE)용 `get_stream_user` : EventSource 는 헤더를 못 붙이므로 ?token= 도 허용,
+     긴 연결 동안 DB 커넥션을 잡고 있지 않도록 인증 직후 반납
 
 설정값
 ----------------------------------------------------------------------
 - SECRET_KEY : JWT 서명용 비밀 키 (개발/운영 분리 필요)
 - ALGORITHM : JWT 암호화 알고리즘 (기본: HS256)
 - ACCESS_TOKEN_EXPIRE_MINUTES : 토큰 만료 시간 (기본: 60분)
+- REFRESH_TOKEN_EXPIRE_DAYS : 리프레시 토큰 만료 기간 (기본: 14일)
+- JWT_STATELESS : 스테이트리스 모드 사용 여부 (Y/N, 기본 N)
+- TOKEN_REVOCATION_SYNC_SECONDS : 스테이트리스 모드 변경 기록 재조회 주기(초) (기본 5)
 
 주의사항
 ----------------------------------------------------------------------
 - SECRET_KEY는 .env 등 외부 환경 변수에서 불러오는 방식 권장
 - 인증 실패 시 401 Unauthorized 반환
 - 토큰에는 반드시 `sub` 필드 포함 필요 (user_id 식별용)
+- 리프레시 토큰은 sql/refresh_token.sql 테이블 필요
+- 스테이트리스 모드는 sql/token_revocation.sql 테이블 필요
+- 워커가 여러 개면 변경을 처리한 워커는 즉시, 다른 워커는 최대 TOKEN_REVOCATION_SYNC_SECONDS 뒤에 거부
 ----------------------------------------------------------------------
 """
 
-from fastapi import Depends, HTTPException, status, Request
+from fastapi import Depends, HTTPException, status, Request, Query
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
 from typing import Optional
+import os
+import threading
+import time
+import uuid
+import pymysql
+import logging
+from db_pool import get_db, get_connection, DBSession
+from user_cache import user_cache, USER_COLUMNS, invalidate_user
 
 # JWT 설정값
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))
+STATELESS_AUTH = os.getenv("JWT_STATELESS", "N").upper() == "Y"
+REVOCATION_SYNC_SECONDS = float(os.getenv("TOKEN_REVOCATION_SYNC_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/user/login")
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/user/login", auto_error=False)
+
+
+class TokenRevocations:
+    """user_id -> 마지막 변경 시각. 그 이전에 발급된 토큰은 폐기된 것으로 본다"""
+
+    def __init__(self, retention_seconds, sync_seconds=REVOCATION_SYNC_SECONDS):
+        self.retention = retention_seconds
+        self.sync_seconds = sync_seconds
+        self._changed = {}  # 삽입 순서 = 변경 시각 순서
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._next_sync = 0.0
+        self._rejected = 0
+        self._syncs = 0
+        self._sync_errors = 0
+
+    def _mark_local(self, user_id, changed_at):
+        with self._lock:
+            if self._changed.get(user_id, 0) >= changed_at:
+                return
+            self._changed.pop(user_id, None)
+            self._changed[user_id] = changed_at
+            self._prune(time.time())
+
+    def _prune(self, now):
+        # 만료 시간이 지난 기록은 앞에서부터 정리 (그 전에 발급된 토큰은 이미 만료)
+        while self._changed:
+            oldest_id = next(iter(self._changed))
+            if self._changed[oldest_id] >= now - self.retention:
+                break
+            del self._changed[oldest_id]
+
+    def save(self, cursor, user_id, changed_at):
+        """변경 시각을 token_revocation 테이블에 기록 (cursor 의 트랜잭션에 포함)"""
+        cursor.execute("""
+            INSERT INTO token_revocation (user_id, revoked_at, update_dt) VALUES (%s, %s, NOW())
+            ON DUPLICATE KEY UPDATE revoked_at = GREATEST(revoked_at, VALUES(revoked_at)), update_dt = NOW()
+        """, (user_id, changed_at))
+
+    def mark(self, user_id):
+        """커밋 이후 호출: 메모리 + 테이블에 현재 시각 기록 (별도 커넥션)"""
+        now = time.time()
+        self._mark_local(user_id, now)
+        if not STATELESS_AUTH:
+            return
+        conn = get_connection()
+        try:
+            with conn.cursor() as cursor:
+                self.save(cursor, user_id, now)
+            conn.commit()
+        except Exception:
+            logger.exception("토큰 폐기 기록 저장 실패 (%s)", user_id)
+        finally:
+            conn.close()
+
+    def load(self):
+        """아직 유효한 토큰에 해당하는 변경 기록을 테이블에서 다시 읽음 (서버 시작 시 + 주기적으로)"""
+        now = time.time()
+        conn = get_connection()
+        try:
+            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute("""
+                    SELECT user_id, revoked_at FROM token_revocation
+                    WHERE revoked_at >= %s
+                    ORDER BY revoked_at
+                """, (now - self.retention,))
+                rows = cursor.fetchall()
+                # 만료된 기록 정리 (어느 워커가 해도 같은 결과)
+                cursor.execute("DELETE FROM token_revocation WHERE revoked_at < %s", (now - self.retention,))
+            conn.commit()
+        finally:
+            conn.close()
+        for row in rows:
+            self._mark_local(row["user_id"], float(row["revoked_at"]))
+        with self._lock:
+            self._syncs += 1
+            self._next_sync = time.monotonic() + self.sync_seconds
+
+    def _sync_if_due(self):
+        if time.monotonic() < self._next_sync or not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() >= self._next_sync:
+                self.load()
+        except Exception:
+            with self._lock:
+                self._sync_errors += 1
+                self._next_sync = time.monotonic() + self.sync_seconds
+            logger.exception("토큰 폐기 기록 조회 실패")
+        finally:
+            self._sync_lock.release()
+
+    def is_revoked(self, user_id, issued_at) -> bool:
+        self._sync_if_due()
+        with self._lock:
+            changed_at = self._changed.get(user_id)
+            if changed_at is None or (issued_at is not None and issued_at >= changed_at):
+                return False
+            self._rejected += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._changed),
+                "rejected": self._rejected,
+                "syncs": self._syncs,
+                "sync_errors": self._sync_errors,
+            }
+
+
+token_revocations = TokenRevocations(ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+def user_changed(conn, user_id, revoke_tokens: bool = True):
+    """
+    사용자 정보(역할/상태 등)가 바뀌는 처리에서 호출
+    - user_cache 무효화
+    - revoke_tokens=True 면 기존 토큰 폐기 (토큰 클레임이 더 이상 맞지 않는 경우)
+    """
+    invalidate_user(conn, user_id)
+    if revoke_tokens:
+        now = time.time()
+        token_revocations._mark_local(user_id, now)
+        if STATELESS_AUTH:
+            # 변경과 같은 트랜잭션으로 기록 → 커밋되면 다른 워커/재시작 후에도 유지
+            with conn.cursor() as cursor:
+                token_revocations.save(cursor, user_id, now)
+        # 커밋 전에 로그인해서 옛 역할로 발급된 토큰도 막기 위해 커밋 후 한 번 더 기록
+        conn.after_commit(lambda: token_revocations.mark(user_id))
+
 
 # 토큰 생성 함수
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": time.time()})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-# 사용자 인증
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    from database import db_config
-    import pymysql
-
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="유효하지 않은 인증 정보입니다.",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def load_user(conn, user_id):
+    """user_cache → DB 순으로 인증용 사용자 정보 조회 (없으면 None)"""
+    user = user_cache.get(user_id)
+    if user is None:
+        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+            cursor.execute(
+                f"SELECT {', '.join(USER_COLUMNS)} FROM user WHERE user_id = %s",
+                (user_id,),
+            )
+            user = cursor.fetchone()
+        if user is not None:
+            user_cache.put(user_id, user)
+    return user
+
+
+def is_active_user(user) -> bool:
+    # 탈퇴/정지된 계정은 토큰이 남아 있어도 거부
+    return user is not None and user["del_yn"] != "Y" and user["status"] != "N"
+
+
+# 리프레시 토큰 발급 (conn: get_db 세션, 커밋은 get_db 가 처리)
+def create_refresh_token(conn, user_id, family_id: Optional[str] = None):
+    jti = uuid.uuid4().hex
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    with conn.cursor() as cursor:
+        if family_id is None:
+            # 새 로그인 → 새 family, 겸사겸사 만료된 토큰 기록 정리
+            family_id = jti
+            cursor.execute(
+                "DELETE FROM refresh_token WHERE user_id = %s AND expire_at < UTC_TIMESTAMP()",
+                (user_id,),
+            )
+        cursor.execute(
+            """
+            INSERT INTO refresh_token (jti, user_id, family_id, expire_at, revoked_yn, create_dt)
+            VALUES (%s, %s, %s, %s, 'N', NOW())
+            """,
+            (jti, user_id, family_id, expire),
+        )
+    return jwt.encode(
+        {"sub": user_id, "jti": jti, "fam": family_id, "type": "refresh", "exp": expire, "iat": time.time()},
+        SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+
+
+def _decode_refresh_token(token: str, verify_exp: bool = True) -> dict:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": verify_exp})
+    except JWTError:
+        raise _credentials_exception()
+    if payload.get("type") != "refresh" or not payload.get("sub") or not payload.get("jti"):
+        raise _credentials_exception()
+    return payload
+
+
+def _revoke_family(conn, family_id):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "UPDATE refresh_token SET revoked_yn = 'Y', update_dt = NOW() WHERE family_id = %s AND revoked_yn = 'N'",
+            (family_id,),
+        )
+
+
+def rotate_refresh_token(conn, token: str):
+    """
+    리프레시 토큰 회전
+    - 서명/만료 확인 후 jti 행을 잠그고 폐기 처리
+    - 같은 사용자의 새 액세스 토큰 + 새 리프레시 토큰 반환
+    - 이미 폐기된 토큰이면 재사용(탈취)으로 보고 family 전체 폐기 후 401
+    """
+    payload = _decode_refresh_token(token)
+
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute(
+            "SELECT user_id, family_id, revoked_yn FROM refresh_token WHERE jti = %s FOR UPDATE",
+            (payload["jti"],),
+        )
+        row = cursor.fetchone()
+    if row is None or row["user_id"] != payload["sub"]:
+        raise _credentials_exception()
+
+    if row["revoked_yn"] == "Y":
+        _revoke_family(conn, row["family_id"])
+        # 401 로 끝나도 family 폐기는 남아야 하므로 여기서 커밋
+        conn.commit()
+        raise _credentials_exception()
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "UPDATE refresh_token SET revoked_yn = 'Y', update_dt = NOW() WHERE jti = %s",
+            (payload["jti"],),
+        )
+
+    user = load_user(conn, row["user_id"])
+    if not is_active_user(user):
+        _revoke_family(conn, row["family_id"])
+        conn.commit()
+        raise _credentials_exception()
+
+    access_token = create_access_token(data={
+        "sub": user["user_id"],
+        "nickname": user["nickname"],
+        "role": user["role"],
+    })
+    refresh_token = create_refresh_token(conn, user["user_id"], row["family_id"])
+    return access_token, refresh_token
+
+
+def revoke_refresh_token(conn, token: str):
+    """로그아웃: 해당 리프레시 토큰의 family 전체 폐기 (만료된 토큰도 허용)"""
+    payload = _decode_refresh_token(token, verify_exp=False)
+    if payload.get("fam"):
+        _revoke_family(conn, payload["fam"])
+
+
+# 사용자 인증
+def get_current_user(token: str = Depends(oauth2_scheme), conn: DBSession = Depends(get_db)):
+    credentials_exception = _credentials_exception()
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("sub")
@@ -71,13 +362,34 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
 
-    conn = pymysql.connect(**db_config)
+    # 리프레시 토큰은 /user/refresh 전용
+    if payload.get("type") == "refresh":
+        raise credentials_exception
+
+    if STATELESS_AUTH and payload.get("role"):
+        # DB 조회 없이 클레임으로 사용자 구성 (정지/역할 변경된 사용자는 폐기 목록에서 거부)
+        if token_revocations.is_revoked(user_id, payload.get("iat")):
+            raise credentials_exception
+        return {
+            "user_id": user_id,
+            "nickname": payload.get("nickname"),
+            "role": payload["role"],
+        }
+
+    # 라우트 핸들러와 같은 요청 세션(커넥션)을 사용
+    user = load_user(conn, user_id)
+    if not is_active_user(user):
+        raise credentials_exception
+    return user
+
+
+# 스트림(SSE) 인증
+def get_stream_user(
+    header_token: Optional[str] = Depends(oauth2_scheme_optional),
+    token: Optional[str] = Query(None),
+):
+    session = DBSession()
     try:
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("SELECT * FROM user WHERE user_id = %s", (user_id,))
-            user = cursor.fetchone()
-            if user is None:
-                raise credentials_exception
-            return user
+        return get_current_user(header_token or token or "", session)
     finally:
-        conn.close()
+        session.close()
@@ -1,14 +1,26 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 import os
-from fastapi.staticfiles import StaticFiles
 
 from user_routes_complete import router as user_router
 from admin_routes import router as admin_router
 from client_routes import router as client_router
 from common_code import router as common_code_router
 from member_routes import router as member_code_router
+from db_pool import pool, PoolTimeoutError
+from user_cache import user_cache
+from jwt_auth import token_revocations, STATELESS_AUTH, get_current_user
+from bcrypt_pool import bcrypt_executor
+from code_cache import code_cache
+from alert_utils import alert_broker, chat_read_buffer
+from alert_retention import alert_retention
+from upload_utils import UploadLimitMiddleware
+from image_variants import image_pipeline
+from file_gc import file_gc
+from board_paging import board_totals
+from static_files import router as static_router
 
 
 
@@ -27,6 +39,58 @@ def list_routes():
     print("📢 등록된 라우트 목록:", routes)
     return routes
 
+# DB 커넥션 풀 포화 시 500 대신 503 반환
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    return JSONResponse(status_code=503, content={"detail": "서버가 혼잡합니다. 잠시 후 다시 시도해주세요."})
+
+
+# 운영 지표 확인용 (내부 상태가 노출되므로 최종관리자만)
+@app.get("/metrics")
+def get_metrics(user: dict = Depends(get_current_user)):
+    if user["role"] != "R04":
+        raise HTTPException(status_code=403, detail="최종관리자만 접근 가능합니다.")
+    return {
+        "db_pool": pool.stats(),
+        "user_cache": user_cache.stats(),
+        "token_revocations": token_revocations.stats(),
+        "bcrypt": bcrypt_executor.stats(),
+        "code_cache": code_cache.stats(),
+        "alert_stream": alert_broker.stats(),
+        "alert_retention": alert_retention.stats(),
+        "chat_read_buffer": chat_read_buffer.stats(),
+        "image_pipeline": image_pipeline.stats(),
+        "file_gc": file_gc.stats(),
+        "board_totals": board_totals.stats(),
+    }
+
+
+@app.on_event("startup")
+def warm_caches():
+    # 공통코드는 첫 요청 전에 미리 적재
+    code_cache.warm()
+    # 스테이트리스 인증: 재시작 전에 기록된 토큰 폐기 목록 적재
+    if STATELESS_AUTH:
+        token_revocations.load()
+    # 지난 알림 보관 작업 시작
+    alert_retention.start()
+    # 채널 읽음 처리 모아서 반영
+    chat_read_buffer.start()
+    # 채널 이미지 썸네일/WebP 변환
+    image_pipeline.start()
+    # 업로드 파일 삭제 대기열 / 고아 파일 정리
+    file_gc.start()
+
+
+@app.on_event("shutdown")
+def close_resources():
+    alert_retention.stop()
+    chat_read_buffer.stop()
+    image_pipeline.stop()
+    file_gc.stop()
+    pool.dispose()
+    bcrypt_executor.shutdown()
+
 # CORS 설정
 origins = [
     "http://localhost:3000",
@@ -39,12 +103,16 @@ origins = [
     "http://192.168.0.90:3001",
 ]
 
+# 업로드 요청 크기 제한 (본문을 다 받기 전에 413, CORS 보다 안쪽이어야 응답에 CORS 헤더가 붙음)
+app.add_middleware(UploadLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # 알림 목록 다음 페이지 커서
 )
 
 
@@ -59,7 +127,8 @@ app.include_router(admin_router, prefix="/admin")
 app.include_router(client_router, prefix="/client")
 app.include_router( common_code_router, prefix="/common", tags=["공통코드"])
 app.include_router(member_code_router, prefix="/member")
-app.mount("/static", StaticFiles(directory="C:/Users/admin/uploads"), name="static")
+# 업로드 파일 (UPLOAD_ROOT) 전송: ETag / Range / 내용 주소 파일 영구 캐시
+app.include_router(static_router)
 
 # 루트 확인용
 @app.get("/")
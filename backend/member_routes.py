@@ -24,6 +24,7 @@
 
 4. 기술 스택 분류 조회
    - 공통 코드 기반의 기술 스택 카테고리 및 기술명 제공
+   - code_cache 의 미리 만든 트리를 ETag 와 함께 응답 (/user/tech-stacks 와 공용)
 
 사용 권한
 ----------------------------------------------------------------------
@@ -34,25 +35,32 @@
 비고
 ----------------------------------------------------------------------
 - DB 연결은 pymysql 사용 (DictCursor)
-- SQL 실행 후 커넥션 반드시 close
-- 파일 업로드 경로는 /uploads/projectchannel 하드코딩됨
+- DB 세션은 `conn = Depends(get_db)` 로 요청당 하나, commit/rollback 은 get_db 가 처리
+- 채널 이미지는 내용(SHA-256) 기준으로 한 번만 저장 (upload_utils.BLOB_PREFIX, file_blob 참조 수, 저장소는 storage.py)
+- 채널 글 작성은 파일을 청크 단위로 먼저 저장(형식/크기 검사) 후 DB 처리는 스레드풀에서 실행
+- 채널 게시판 목록은 cursor(keyset) / page 방식 모두 지원, 전체 글 수는 캐시 (board_paging.py)
 - 일부 요청은 FormData 및 UploadFile 병행 처리
 - 알림(alerts) 등록 시 FRONT_BASE_URL 이용
 ----------------------------------------------------------------------
 """
 
 
-from fastapi import APIRouter, HTTPException, Depends, Body, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, Body, UploadFile, File, Form, Header
 from pydantic import BaseModel
 import pymysql
 import os
 import shutil
-from database import db_config
-from jwt_auth import get_current_user
+from db_pool import get_db, DBSession
+from jwt_auth import get_current_user, user_changed
 from typing import List
-import bcrypt
+from bcrypt_pool import check_password
 from fastapi import Query
 from config import FRONT_BASE_URL
+from alert_utils import add_alert
+from upload_utils import store_images, remove_files, register_files, release_files
+from board_paging import keyset_condition, paginate, board_totals
+from fastapi.concurrency import run_in_threadpool
+from code_cache import resolve_code_labels, tech_stack_response, PROJECT_CODE_LABELS
 from typing import Optional
 
 router = APIRouter(tags=["Member"])
@@ -78,9 +86,8 @@ class ProjectChannel(BaseModel):
     
 # ----------------------- 회원 정보 조회 -------------------------
 @router.get("/userinfo")
-def get_member_user_info(user: dict = Depends(get_current_user)):
+def get_member_user_info(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             # 1. 사용자 기본 정보
             cursor.execute("""
@@ -125,62 +132,51 @@ def get_member_user_info(user: dict = Depends(get_current_user)):
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
-    finally:
-        conn.close()
 # ------------------------ 회원탈퇴 ------------------------
 
 @router.put("/withdraw")
-def withdraw_user(user: dict = Depends(get_current_user)):
-    conn = pymysql.connect(**db_config)
-    try:
-        with conn.cursor() as cursor:
-            # 유저테이블 delyn Y
-            cursor.execute("""
-                UPDATE user
-                SET del_yn = 'Y', update_dt = NOW()
-                WHERE user_id = %s AND del_yn = 'N'
-            """, (user["user_id"],))
-
-            # 유저스킬테이블 delyn Y
-            cursor.execute("""
-                UPDATE user_skills
-                SET del_yn = 'Y', update_dt = NOW()
-                WHERE user_id = %s AND del_yn = 'N'
-            """, (user["user_id"],))
-
-            # teammember테이블 delyn Y
-            cursor.execute("""
-                UPDATE team_member
-                SET del_yn = 'Y', update_dt = NOW()
-                WHERE user_id = %s AND del_yn = 'N'
-            """, (user["user_id"],))
-        conn.commit()
-        return {"message": "회원탈퇴 처리 완료"}
-    finally:
-        conn.close()
+def withdraw_user(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor() as cursor:
+        # 유저테이블 delyn Y
+        cursor.execute("""
+            UPDATE user
+            SET del_yn = 'Y', update_dt = NOW()
+            WHERE user_id = %s AND del_yn = 'N'
+        """, (user["user_id"],))
+
+        # 유저스킬테이블 delyn Y
+        cursor.execute("""
+            UPDATE user_skills
+            SET del_yn = 'Y', update_dt = NOW()
+            WHERE user_id = %s AND del_yn = 'N'
+        """, (user["user_id"],))
+
+        # teammember테이블 delyn Y
+        cursor.execute("""
+            UPDATE team_member
+            SET del_yn = 'Y', update_dt = NOW()
+            WHERE user_id = %s AND del_yn = 'N'
+        """, (user["user_id"],))
+    user_changed(conn, user["user_id"])
+    return {"message": "회원탈퇴 처리 완료"}
 # ------------------------ 비밀번호 확인 ------------------------
 @router.post("/verify-password")
-def verify_password(data: dict = Body(...), user: dict = Depends(get_current_user)):
-    conn = pymysql.connect(**db_config)
-    try:
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("SELECT password FROM user WHERE user_id = %s", (user["user_id"],))
-            result = cursor.fetchone()
-            if not result:
-                raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
-            if not bcrypt.checkpw(data["password"].encode(), result["password"].encode()):
-                raise HTTPException(status_code=401, detail="비밀번호가 일치하지 않습니다.")
-            return {"message": "확인 성공"}
-    finally:
-        conn.close()
+def verify_password(data: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("SELECT password FROM user WHERE user_id = %s", (user["user_id"],))
+        result = cursor.fetchone()
+        if not result:
+            raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+        if not check_password(data["password"], result["password"]):
+            raise HTTPException(status_code=401, detail="비밀번호가 일치하지 않습니다.")
+        return {"message": "확인 성공"}
 
 # ------------------------ 회원 정보 수정 ------------------------
      
 @router.put("/userupdate")
-def update_user_info(payload: dict = Body(...), user: dict = Depends(get_current_user)):
+def update_user_info(payload: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     print("📦 받은 payload:", payload)  # ✅ 추가!
     
-    conn = pymysql.connect(**db_config)
     try:
         with conn.cursor() as cursor:
             # 1. 기본 정보 수정
@@ -236,22 +232,18 @@ def update_user_info(payload: dict = Body(...), user: dict = Depends(get_current
                     print("💥 skill insert 실패:", skill)
                     print("🔥 오류:", e)
 
-        conn.commit()
         return {"message": "회원 정보가 성공적으로 수정되었습니다."}
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
         
         
         
 # ------------------------ 내 프로젝트 ------------------------
 @router.get("/my-projects")
-def get_my_projects(user: dict = Depends(get_current_user)):
+def get_my_projects(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT p.* 
@@ -260,7 +252,6 @@ def get_my_projects(user: dict = Depends(get_current_user)):
                 WHERE j.user_id = %s AND j.status = 'Y' AND p.del_yn = 'N'
             """, (user["user_id"],))
             projects = cursor.fetchall()
-        conn.close()
         return projects
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -268,8 +259,7 @@ def get_my_projects(user: dict = Depends(get_current_user)):
     
     
 @router.post("/alllist")
-def project_list(payload: dict = Body(...), user: dict = Depends(get_current_user)):
-    conn = pymysql.connect(**db_config)
+def project_list(payload: dict = Body(...), user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             # ✅ 1. 팀원으로 내가 포함된 프로젝트들 조회
@@ -283,7 +273,7 @@ def project_list(payload: dict = Body(...), user: dict = Depends(get_current_use
                     p.budget,
                     p.urgency,
                     p.progress,
-                    p.status
+                    p.status,
                     DATE(p.create_dt) AS create_date,
                     p.del_yn
                 FROM project p
@@ -298,67 +288,40 @@ def project_list(payload: dict = Body(...), user: dict = Depends(get_current_use
             if not projects:
                 raise HTTPException(status_code=404, detail="참여한 프로젝트가 없습니다.")
 
-            # ✅ 2. 공통 코드 변환
-            for project in projects:
-                # 긴급도
-                cursor.execute("""
-                    SELECT code_name FROM common_code
-                    WHERE group_id = 'URGENCY_LEVEL'
-                    AND code_id = %s
-                    AND del_yn = 'N'
-                """, (project['urgency'],))
-                urgency = cursor.fetchone()
-                project['urgency_level'] = urgency['code_name'] if urgency else '-'
-
-                # 카테고리
-                cursor.execute("""
-                    SELECT code_name FROM common_code
-                    WHERE group_id = 'PROJECT_TYPE'
-                    AND code_id = %s
-                    AND del_yn = 'N'
-                """, (project['category'],))
-                category = cursor.fetchone()
-                project['category_name'] = category['code_name'] if category else '-'
+            # ✅ 2. 공통 코드 변환 (code_cache 에서 한 번에)
+            resolve_code_labels(projects, PROJECT_CODE_LABELS, default='-')
 
             return {"projects": projects}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/invites")
-def get_my_invites(user: dict = Depends(get_current_user)):
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT
-                    jr.request_id,
-                    jr.project_id,
-                    p.title,
-                    p.description,
-                    p.estimated_duration,
-                    p.budget,
-                    p.create_dt,
-                    p.progress,
-                    jr.status,
-                    jr.checking,
-                    cat.code_name AS category_name,
-                    urg.code_name AS urgency_level
-                FROM join_requests jr
-                JOIN project p ON jr.project_id = p.project_id
-                LEFT JOIN common_code cat ON p.category = cat.code_id AND cat.group_id = 'PROJECT_TYPE'
-                LEFT JOIN common_code urg ON p.urgency = urg.code_id AND urg.group_id = 'URGENCY_LEVEL'
-                WHERE jr.user_id = %s
-                  AND jr.del_yn = 'N'
-                  AND p.del_yn = 'N'
-                  AND NOT (jr.status = 'N' AND jr.checking = 'Y')
-            """, (user["user_id"],))
-            rows = cursor.fetchall()
-            return {"invites": rows}
-    finally:
-        conn.close()
+def get_my_invites(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("""
+            SELECT
+                jr.request_id,
+                jr.project_id,
+                p.title,
+                p.description,
+                p.estimated_duration,
+                p.budget,
+                p.create_dt,
+                p.progress,
+                jr.status,
+                jr.checking,
+                p.category,
+                p.urgency
+            FROM join_requests jr
+            JOIN project p ON jr.project_id = p.project_id
+            WHERE jr.user_id = %s
+              AND jr.del_yn = 'N'
+              AND p.del_yn = 'N'
+              AND NOT (jr.status = 'N' AND jr.checking = 'Y')
+        """, (user["user_id"],))
+        rows = cursor.fetchall()
+        return {"invites": resolve_code_labels(rows, PROJECT_CODE_LABELS)}
 
 
 #초대 응답
@@ -366,128 +329,106 @@ def get_my_invites(user: dict = Depends(get_current_user)):
 def respond_to_invite(
     request_id: int,
     response: dict = Body(...),  # {"accept": true or false}
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)
 ):
     is_accept = response.get("accept")
     if is_accept not in [True, False]:
         raise HTTPException(status_code=400, detail="accept 값은 true 또는 false여야 합니다.")
 
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:  # DictCursor 써야 user["nickname"] 사용 가능
-            # 1. 초대 요청 조회
-            cursor.execute("""
-                SELECT * FROM join_requests
-                WHERE request_id = %s AND user_id = %s AND del_yn = 'N'
-            """, (request_id, user["user_id"]))
-            request_row = cursor.fetchone()
-
-            if not request_row:
-                raise HTTPException(status_code=404, detail="초대 요청을 찾을 수 없습니다.")
-
-            # 2. 응답 처리
-            cursor.execute("""
-                UPDATE join_requests
-                SET checking = 'Y',
-                    status = %s,
-                    update_dt = NOW()
-                WHERE request_id = %s
-            """, ('Y' if is_accept else 'N', request_id))
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:  # DictCursor 써야 user["nickname"] 사용 가능
+        # 1. 초대 요청 조회
+        cursor.execute("""
+            SELECT * FROM join_requests
+            WHERE request_id = %s AND user_id = %s AND del_yn = 'N'
+        """, (request_id, user["user_id"]))
+        request_row = cursor.fetchone()
+
+        if not request_row:
+            raise HTTPException(status_code=404, detail="초대 요청을 찾을 수 없습니다.")
+
+        # 2. 응답 처리
+        cursor.execute("""
+            UPDATE join_requests
+            SET checking = 'Y',
+                status = %s,
+                update_dt = NOW()
+            WHERE request_id = %s
+        """, ('Y' if is_accept else 'N', request_id))
+
+        # 나에게 보낸 alerts 알람지우기
+        cursor.execute("""
+            UPDATE alerts
+            SET del_yn ='Y', update_dt = NOW(), update_id = %s
+            WHERE value_id = %s AND category="project"
+        """, (user["user_id"], request_id))
+        
+        # 3. 승인일 경우 알림 추가
+        if is_accept:
+            pm_id = request_row["pm_id"]
+            nickname = user.get("nickname", user["user_id"])  # 닉네임이 없으면 user_id 사용
+            message = f"{nickname}님이 프로젝트 참여를 승인 요청했습니다."
+            link = f"{FRONT_BASE_URL}/admin/projects"
+            add_alert(conn, pm_id, "시스템 알림", message, link, user["user_id"],
+                      value_id=request_id, category="project")
 
-            # 나에게 보낸 alerts 알람지우기
-            cursor.execute("""
-                UPDATE alerts
-                SET del_yn ='Y', update_dt = NOW(), update_id = %s
-                WHERE value_id = %s AND category="project"
-            """, (user["user_id"], request_id))
-            
-            # 3. 승인일 경우 알림 추가
-            if is_accept:
-                pm_id = request_row["pm_id"]
-                nickname = user.get("nickname", user["user_id"])  # 닉네임이 없으면 user_id 사용
-                message = f"{nickname}님이 프로젝트 참여를 승인 요청했습니다."
-                link = f"{FRONT_BASE_URL}/admin/projects"
-                cursor.execute("""
-                    INSERT INTO alerts (target_user, value_id, category, title, message, link, create_dt, create_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
-                """, (
-                    pm_id,
-                    request_id,
-                    "project",
-                    "시스템 알림",
-                    message,
-                    link,
-                    user["user_id"]
-                ))
-
-        conn.commit()
-        return {"message": "초대 응답이 처리되었습니다."}
-    finally:
-        conn.close()
+    return {"message": "초대 응답이 처리되었습니다."}
 
 
 @router.post("/list")
-def get_my_accepted_projects(user: dict = Depends(get_current_user)):
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT
-                    p.project_id,
-                    p.title,
-                    p.description,
-                    p.estimated_duration,
-                    p.budget,
-                    p.progress,
-                    p.create_dt AS create_date,
-                    cat.code_name AS category_name,
-                    urg.code_name AS urgency_level
-                FROM join_requests j
-                JOIN project p ON j.project_id = p.project_id
-                LEFT JOIN common_code cat ON p.category = cat.code_id
-                LEFT JOIN common_code urg ON p.urgency = urg.code_id
-                WHERE j.user_id = %s
-                  AND j.status = 'Y'
-                  AND j.checking = 'Y'
-                  AND j.del_yn = 'N'
-                  AND p.del_yn = 'N'
-            """, (user["user_id"],))
-            rows = cursor.fetchall()
-        return {"projects": rows}
-    finally:
-        conn.close()
+def get_my_accepted_projects(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("""
+            SELECT
+                p.project_id,
+                p.title,
+                p.description,
+                p.estimated_duration,
+                p.budget,
+                p.progress,
+                p.create_dt AS create_date,
+                p.category,
+                p.urgency
+            FROM join_requests j
+            JOIN project p ON j.project_id = p.project_id
+            WHERE j.user_id = %s
+              AND j.status = 'Y'
+              AND j.checking = 'Y'
+              AND j.del_yn = 'N'
+              AND p.del_yn = 'N'
+        """, (user["user_id"],))
+        rows = cursor.fetchall()
+    return {"projects": resolve_code_labels(rows, PROJECT_CODE_LABELS)}
 
 # 백엔드: 실제 참여 확정된 프로젝트 조회 (team_member 기준)
 @router.post("/confirmed-projects")
-def get_confirmed_projects(user: dict = Depends(get_current_user)):
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT p.project_id, p.title, p.description, c.code_name as category_name,
-                       u.code_name as urgency_level, p.estimated_duration, p.budget, p.progress, p.create_dt
-                FROM team_member tm
-                JOIN project p ON tm.project_id = p.project_id
-                LEFT JOIN common_code c ON p.category = c.code_id
-                LEFT JOIN common_code u ON p.urgency = u.code_id
-                WHERE tm.user_id = %s AND tm.del_yn = 'N'
-            """, (user["user_id"],))
-            result = cursor.fetchall()
-            return {"confirmed_projects": result}
-    finally:
-        conn.close()
+def get_confirmed_projects(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("""
+            SELECT p.project_id, p.title, p.description, p.category,
+                   p.urgency, p.estimated_duration, p.budget, p.progress, p.create_dt
+            FROM team_member tm
+            JOIN project p ON tm.project_id = p.project_id
+            WHERE tm.user_id = %s AND tm.del_yn = 'N'
+        """, (user["user_id"],))
+        result = cursor.fetchall()
+        return {"confirmed_projects": resolve_code_labels(result, PROJECT_CODE_LABELS)}
 
 @router.get("/project/common/{project_id}")
 def get_project_common(
     project_id: int,
     page: int = Query(1, ge=1),
-    page_size: int = Query(5, ge=1)
+    page_size: int = Query(5, ge=1, le=100),
+    cursor_key: Optional[str] = Query(None, alias="cursor"),
+    include_total: bool = Query(True),
+    conn: DBSession = Depends(get_db)
     ):
+    # cursor 가 있으면 keyset, 없으면 기존 page 방식
+    keyset_sql, keyset_params = keyset_condition("pc", cursor_key)
+    offset = 0 if cursor_key else (page - 1) * page_size
     try:
-        offset = (page - 1) * page_size
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            sql = """
+            sql = f"""
                     SELECT 
                         pc.channel_id, 
                         pc.title, 
@@ -507,40 +448,37 @@ def get_project_common(
                     AND u.role IN ('R03', 'R04')
                     AND pc.user_id = pc.create_id
                     AND pc.value_id = %s
-                    AND pc.category = "board01"
-                    ORDER BY pc.create_dt DESC
+                    AND pc.category = 'board01'
+                    {keyset_sql}
+                    ORDER BY pc.create_dt DESC, pc.channel_id DESC
                     LIMIT %s OFFSET %s
                 """
-            cursor.execute(sql, (project_id, page_size, offset))
-            items = cursor.fetchall()
-
-            count_sql = """
-                SELECT COUNT(*) AS total
-                FROM project_channel pc
-                JOIN user u ON pc.user_id = u.user_id
-                WHERE pc.del_yn = 'N'
-                    AND u.role IN ('R03', 'R04')
-                    AND pc.user_id = pc.create_id
-                    AND pc.value_id = %s
-                    AND pc.category = "board01"
-            """
-            cursor.execute(count_sql, (project_id,))
-            total = cursor.fetchone()["total"]
+            cursor.execute(sql, (project_id, *keyset_params, page_size + 1, offset))
+            result = paginate(cursor.fetchall(), page_size)
 
-            return {
-                "items": items,
-                "total": total
-            }
+            def count_total():
+                cursor.execute("""
+                    SELECT COUNT(*) AS total
+                    FROM project_channel pc
+                    JOIN user u ON pc.user_id = u.user_id
+                    WHERE pc.del_yn = 'N'
+                        AND u.role IN ('R03', 'R04')
+                        AND pc.user_id = pc.create_id
+                        AND pc.value_id = %s
+                        AND pc.category = "board01"
+                """, (project_id,))
+                return cursor.fetchone()["total"]
+
+            # 전체 글 수는 캐시 (페이지마다 COUNT 하지 않음, 관리자 화면과 같은 값 공유)
+            result["total"] = board_totals.get(("board01", project_id), count_total) if include_total else None
+            return result
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
         
 @router.get("/project/{project_id}/projecttitle")
-def get_project_title(project_id: int, user: dict = Depends(get_current_user)):
+def get_project_title(project_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT title
@@ -558,8 +496,6 @@ def get_project_title(project_id: int, user: dict = Depends(get_current_user)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        conn.close()
         
 from datetime import datetime
 
@@ -569,7 +505,7 @@ from datetime import datetime
 #         raise HTTPException(status_code=403, detail="관리자 권한 필요")
     
 #     try:
-#         conn = pymysql.connect(**db_config)
+#         conn = get_connection()
 #         with conn.cursor() as cursor:
 #             sql = """
 #                 INSERT INTO project_channel 
@@ -618,21 +554,21 @@ async def create_project_channel_with_file(
     content: str = Form(...),
     teamMemberId: int = Form(...),
     files: Optional[List[UploadFile]] = File(None),
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)
 ):
     if user["role"] != "R02":
         raise HTTPException(status_code=403, detail="관리자 권한 필요")
 
-    allowed_types = {"image/jpeg", "image/jpg",  "image/png", "image/gif", "image/webp"}
-    UPLOAD_DIR = "C:/Users/admin/uploads/projectchannel"
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    # 1. 이미지 파일 먼저 저장 (청크 단위, 쓰기는 스레드풀) → 형식/크기 검사에 걸리면 글도 등록하지 않음
+    stored = await store_images(files)
 
-    try:
-        conn = pymysql.connect(**db_config)
+    def save_post():
+        # pymysql 호출은 이벤트 루프 밖(스레드풀)에서 실행
         with conn.cursor() as cursor:
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-            # 1. 게시글 등록
+            # 2. 게시글 등록
             cursor.execute("""
                 INSERT INTO project_channel 
                 (title, user_id, content, create_dt, create_id, value_id, category, del_yn)
@@ -640,59 +576,38 @@ async def create_project_channel_with_file(
             """, (title, pm_id, content, now, user["user_id"], teamMemberId, "board02", "N"))
             
             channel_id = cursor.lastrowid
+            conn.after_commit(lambda: board_totals.invalidate("board02", teamMemberId))
 
-            # 2. 파일 저장
-            if files:
-                for file in files:
-                    if file.content_type not in allowed_types:
-                        raise HTTPException(status_code=400, detail="이미지 파일만 등록하실 수 있습니다.")
-                    
-                    filename = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}"
-                    filepath = os.path.join(UPLOAD_DIR, filename)
-
-                    with open(filepath, "wb") as buffer:
-                        shutil.copyfileobj(file.file, buffer)
-
-                    cursor.execute("""
-                        INSERT INTO post_file (channel_id, file_name, file_path, create_dt, create_id, del_yn)
-                        VALUES (%s, %s, %s, NOW(), %s, 'N')
-                    """, (channel_id, file.filename, filepath, user["user_id"]))
+            # 3. 파일 정보 등록
+            register_files(cursor, channel_id, stored, user["user_id"])
             link = f"{FRONT_BASE_URL}/admin/projects"
-            # 3. 알림 등록
-            cursor.execute("""
-                INSERT INTO alerts (target_user, value_id, category, title, message, link, create_dt, create_id)
-                VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
-            """, (
-                "", 
-                teamMemberId, 
-                "chat", 
-                "시스템 알림제목",
-                "시스템 알림내용",
-                link, 
-                user["user_id"]))
-
-        conn.commit()
+            # 4. 알림 등록 (채널 상대인 PM 에게 실시간 배지 갱신)
+            add_alert(conn, "", "시스템 알림제목", "시스템 알림내용", link, user["user_id"],
+                      value_id=teamMemberId, category="chat", notify_users=[pm_id])
+
+    try:
+        await run_in_threadpool(save_post)
         return {"message": "게시글과 이미지가 등록되었습니다."}
     except Exception as e:
+        await run_in_threadpool(conn.rollback)  # file_blob 잠금부터 풀고 파일 정리
+        await run_in_threadpool(remove_files, stored)
+        if isinstance(e, HTTPException):
+            raise
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.delete("/projectchannel/{channel_id}/delete")
-def delete_notice(channel_id: str):
+def delete_notice(channel_id: str, conn: DBSession = Depends(get_db)):
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
-            cursor.execute("UPDATE project_channel SET del_yn = 'Y' WHERE channel_id = %s", (channel_id,))
-        conn.commit()
+            # update_dt 기준으로 보관 기간이 지나면 첨부 파일 정리 (file_gc.py)
+            cursor.execute("UPDATE project_channel SET del_yn = 'Y', update_dt = NOW() WHERE channel_id = %s", (channel_id,))
+        conn.after_commit(board_totals.invalidate)
         return {"message": "글이 삭제되었습니다."}
     except Exception as e:
         print("❌ 삭제 중 오류 발생:", e)
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends
@@ -705,21 +620,20 @@ class ProjectChannel(BaseModel):
     content: str
 
 @router.put("/projectchannel/{channel_id}/update")
-def update_project_channel(
+async def update_project_channel(
     channel_id: int, 
     title: str = Form(...),
     pm_id: str = Form(...),
     content: str = Form(...),
     delete_ids: Optional[List[int]] = Form(None),
     files: Optional[List[UploadFile]] = File(None),
-    user: dict = Depends(get_current_user)
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)
 ):
-    
-    allowed_types = {"image/jpeg", "image/jpg",  "image/png", "image/gif", "image/webp"}
-    UPLOAD_DIR = "C:/Users/admin/uploads/projectchannel"
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
-    try:
-        conn = pymysql.connect(**db_config)
+    # 새 이미지 파일 먼저 저장 (내용 주소, 같은 이미지는 한 번만 저장)
+    stored = await store_images(files)
+
+    def save_post():
         with conn.cursor() as cursor:
             cursor.execute("""
                 SELECT create_id FROM project_channel
@@ -741,46 +655,30 @@ def update_project_channel(
                 WHERE channel_id = %s
             """, (title, content, user["user_id"], channel_id))
 
-            # 삭제할 이미지 파일 처리
-            for file_id in delete_ids or []:
-                cursor.execute("SELECT file_path FROM post_file WHERE file_id = %s", (file_id,))
-                result = cursor.fetchone()
-                if result and os.path.exists(result["file_path"]):
-                    os.remove(result["file_path"])
-                cursor.execute("DELETE FROM post_file WHERE file_id = %s", (file_id,))
-            # 새 이미지 파일 저장
-            if files:
-                for file in files:
-                    if file.content_type not in allowed_types:
-                        raise HTTPException(status_code=400, detail="이미지 파일만 등록하실 수 있습니다.")
-                    
-                    filename = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}"
-                    filepath = os.path.join(UPLOAD_DIR, filename)
-                    with open(filepath, "wb") as buffer:
-                        shutil.copyfileobj(file.file, buffer)
-
-                    cursor.execute("""
-                        INSERT INTO post_file (channel_id, file_name, file_path, create_dt, create_id, del_yn)
-                        VALUES (%s, %s, %s, NOW(), %s, 'N')
-                    """, (channel_id, file.filename, filepath, user["user_id"]))
-
-        conn.commit()
+            # 삭제할 이미지 연결 해제 (다른 글이 같이 쓰는 파일은 남김)
+            release_files(cursor, channel_id, delete_ids)
+            # 새 이미지 연결
+            register_files(cursor, channel_id, stored, user["user_id"])
+
+    try:
+        await run_in_threadpool(save_post)
         return {"message": "글이 수정되었습니다."}
     except Exception as e:
+        await run_in_threadpool(conn.rollback)  # file_blob 잠금부터 풀고 파일 정리
+        await run_in_threadpool(remove_files, stored)
+        if isinstance(e, HTTPException):
+            raise
         import traceback
         print("❌ 예외 발생:", e)
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
         
 @router.get("/project/{project_id}/members")
-def get_project_members(project_id: int, user: dict = Depends(get_current_user)):
+def get_project_members(project_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     if user["role"] not in ["R04", "R03", "R02"]:
         raise HTTPException(status_code=403, detail="권한이 없습니다.")
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT u.user_id, u.nickname
@@ -807,8 +705,6 @@ def get_project_members(project_id: int, user: dict = Depends(get_current_user))
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
         
 
 @router.get("/project/{project_id}/user/{user_id}/{teamMemberId}")
@@ -817,14 +713,18 @@ def get_user_project_channel(
     user_id: str,
     teamMemberId: int, 
     page: int = Query(1, ge=1),
-    page_size: int = Query(5, ge=1),
-    user: dict = Depends(get_current_user)):
+    page_size: int = Query(5, ge=1, le=100),
+    cursor_key: Optional[str] = Query(None, alias="cursor"),
+    include_total: bool = Query(True),
+    user: dict = Depends(get_current_user),
+    conn: DBSession = Depends(get_db)):
     if user["role"] == "R02" and user["user_id"] != user_id:
         raise HTTPException(status_code=403, detail="해당 채널에 접근할 수 없습니다.")
 
+    # cursor 가 있으면 keyset, 없으면 기존 page 방식
+    keyset_sql, keyset_params = keyset_condition("c", cursor_key)
+    offset = 0 if cursor_key else (page - 1) * page_size
     try:
-        offset = (page - 1) * page_size
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             # sql = """
             #     SELECT 
@@ -858,7 +758,7 @@ def get_user_project_channel(
             pm_id = pm_row["pm_id"] if pm_row else None
 
             # 🔍 user_id 또는 pm_id가 작성한 글만 가져오기
-            cursor.execute("""
+            cursor.execute(f"""
                     SELECT 
                         c.channel_id, 
                         c.value_id, 
@@ -878,35 +778,36 @@ def get_user_project_channel(
                     WHERE c.value_id = %s
                         AND c.create_id IN (%s, %s)
                         AND c.del_yn = 'N'
-                        AND c.category = "board02"
-                    ORDER BY c.create_dt DESC
+                        AND c.category = 'board02'
+                        {keyset_sql}
+                    ORDER BY c.create_dt DESC, c.channel_id DESC
                     LIMIT %s OFFSET %s
-                """, (teamMemberId, user_id, pm_id, page_size, offset))
-            
-            channels = cursor.fetchall()
-            
-            cursor.execute("""
-                SELECT COUNT(*) AS total
-                FROM project_channel c
-                WHERE c.value_id = %s
-                    AND c.create_id IN (%s, %s)
-                    AND c.del_yn = 'N'
-                    AND c.category = "board02"
-                """, (teamMemberId, user_id, pm_id))
-
-            total = cursor.fetchone()["total"]
-            
-            return {"items": channels, "pm_id": pm_id, "total": total}
+                """, (teamMemberId, user_id, pm_id, *keyset_params, page_size + 1, offset))
+            result = paginate(cursor.fetchall(), page_size)
+
+            def count_total():
+                cursor.execute("""
+                    SELECT COUNT(*) AS total
+                    FROM project_channel c
+                    WHERE c.value_id = %s
+                        AND c.create_id IN (%s, %s)
+                        AND c.del_yn = 'N'
+                        AND c.category = "board02"
+                    """, (teamMemberId, user_id, pm_id))
+                return cursor.fetchone()["total"]
+
+            # 전체 글 수는 캐시 (페이지마다 COUNT 하지 않음)
+            key = ("board02", teamMemberId, user_id, pm_id)
+            result["total"] = board_totals.get(key, count_total) if include_total else None
+            result["pm_id"] = pm_id
+            return result
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/projectchannel/{channel_id}")
-def get_project_channel(channel_id: int, user: dict = Depends(get_current_user)):
+def get_project_channel(channel_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 SELECT 
@@ -920,59 +821,20 @@ def get_project_channel(channel_id: int, user: dict = Depends(get_current_user))
             return data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/notices/{notice_id}")
-def get_notice_detail(notice_id: int, user: dict = Depends(get_current_user)):
-    try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            cursor.execute("SELECT notice_id, title, target_type, content, create_dt FROM notices WHERE notice_id = %s", (notice_id,))
-            result = cursor.fetchone()
-        if not result:
-            raise HTTPException(status_code=404, detail="공지사항을 찾을 수 없습니다.")
-        return result
-    finally:
-        conn.close()
-        
+def get_notice_detail(notice_id: int, user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute("SELECT notice_id, title, target_type, content, create_dt FROM notices WHERE notice_id = %s", (notice_id,))
+        result = cursor.fetchone()
+    if not result:
+        raise HTTPException(status_code=404, detail="공지사항을 찾을 수 없습니다.")
+    return result
+    
 @router.get("/user/tech-stacks")
-def get_tech_stacks():
+def get_tech_stacks(if_none_match: Optional[str] = Header(None)):
+    # 공통코드 캐시에서 미리 만들어 둔 트리 응답 (ETag 같으면 304)
     try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            # 자식 코드만 가져오기 (PARENT_CODE가 NULL 아닌 것만)  React , Node.js 등등
-            sql = """
-                SELECT code_id, code_name, parent_code
-                FROM common_code
-                WHERE group_id = 'TECH_STACK' AND parent_code IS NOT NULL
-                ORDER BY code_id ASC
-            """
-            cursor.execute(sql)
-            child_codes = cursor.fetchall()
-
-            # 부모 코드도 같이 가져오기  프론트엔드, 백엔드 등등
-            cursor.execute("""
-                SELECT code_id, code_name
-                FROM common_code
-                WHERE group_id = 'TECH_STACK' AND parent_code IS NULL
-                ORDER BY code_id ASC
-            """)
-            parent_codes = cursor.fetchall()
-
-        # 🧠 분류용 딕셔너리로 정리
-        result = {}
-        parent_map = {row["code_id"]: row["code_name"] for row in parent_codes}
-        for item in child_codes:
-            parent_name = parent_map.get(item["parent_code"], "기타")
-            if parent_name not in result:
-                result[parent_name] = []
-            result[parent_name].append({
-                "label": item["code_name"],
-                "code_id": item["code_id"],
-                "parent_code": item["parent_code"]
-            })
-
-        return result
+        return tech_stack_response(if_none_match)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,22 @@
+-- ----------------------------------------------------------------------
+-- chat 알림 안 읽은 수 카운터 (alert_utils.add_alert 에서 +1, /common/alertsCheck 에서 0)
+-- - create_id : 글쓴이 (PM 또는 팀원)
+-- - value_id  : team_member_id (개인채널)
+-- - category  : 'chat'
+-- ----------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS alert_counter (
+    create_id     VARCHAR(50) NOT NULL,
+    value_id      INT         NOT NULL,
+    category      VARCHAR(30) NOT NULL,
+    unread_count  INT         NOT NULL DEFAULT 0,
+    update_dt     DATETIME    NULL,
+    PRIMARY KEY (create_id, value_id, category)
+);
+
+-- 기존 데이터 채우기 (여러 번 실행해도 같은 결과)
+INSERT INTO alert_counter (create_id, value_id, category, unread_count, update_dt)
+SELECT create_id, value_id, category, COUNT(*), NOW()
+FROM alerts
+WHERE target_user = '' AND category = 'chat' AND del_yn = 'N' AND value_id IS NOT NULL
+GROUP BY create_id, value_id, category
+ON DUPLICATE KEY UPDATE unread_count = VALUES(unread_count), update_dt = NOW();
@@ -0,0 +1,45 @@
+-- ----------------------------------------------------------------------
+-- 공용(역할 전체) 알림의 사용자별 확인 상태 (alert_utils.dismiss_broadcasts)
+-- - 공용 알림은 alerts 에 target_user = 역할 코드('R01', 'R02', 'R03')로 한 행만 저장
+-- - broadcast_seq : 대상(역할 코드)별 공용 알림 일련번호 (개인/chat 알림은 NULL)
+--                   alert_broadcast_seq 에서 발급, 대상별로 1 부터 빈틈 없이 증가
+-- - cursor_seq    : 이 번호 이하의 공용 알림은 모두 확인(삭제)한 것으로 처리
+-- - bitmap        : i 번째 비트(little-endian) = broadcast_seq (cursor_seq + 1 + i) 확인 여부
+--                   ALERT_READ_BITMAP_BITS(기본 4096비트 = 512바이트) 까지만 사용
+-- - alerts_archive.sql 보다 먼저 실행 (alerts_archive 가 alerts 와 같은 컬럼 순서여야 함)
+-- ----------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS alert_broadcast_seq (
+    audience  VARCHAR(50) NOT NULL,
+    last_seq  BIGINT      NOT NULL DEFAULT 0,
+    PRIMARY KEY (audience)
+);
+
+ALTER TABLE alerts
+    ADD COLUMN broadcast_seq BIGINT NULL,
+    ADD INDEX idx_alerts_broadcast (target_user, broadcast_seq);
+
+-- 기존 공용 알림에 번호 부여 (alert_id 순서)
+UPDATE alerts a
+JOIN (
+    SELECT alert_id, ROW_NUMBER() OVER (PARTITION BY target_user ORDER BY alert_id) AS seq
+    FROM alerts
+    WHERE target_user IN ('R01', 'R02', 'R03')
+) s ON s.alert_id = a.alert_id
+SET a.broadcast_seq = s.seq;
+
+INSERT INTO alert_broadcast_seq (audience, last_seq)
+SELECT target_user, MAX(broadcast_seq) FROM alerts WHERE broadcast_seq IS NOT NULL GROUP BY target_user
+ON DUPLICATE KEY UPDATE last_seq = VALUES(last_seq);
+
+CREATE TABLE IF NOT EXISTS alert_read_state (
+    user_id     VARCHAR(50)    NOT NULL,
+    audience    VARCHAR(50)    NOT NULL,
+    cursor_seq  BIGINT         NOT NULL DEFAULT 0,
+    bitmap      VARBINARY(512) NOT NULL DEFAULT '',
+    update_dt   DATETIME       NULL,
+    PRIMARY KEY (user_id, audience)
+);
+
+-- 기존 사용자는 cursor_seq 0 에서 시작 (현재 남아 있는 공용 알림이 모두 보임)
+-- 행이 없어도 조회는 cursor_seq 0 으로 처리되므로 생략 가능
+-- 신규 가입자는 init_read_state 가 cursor_seq = alert_broadcast_seq.last_seq (대상별 마지막 번호) 로 등록
@@ -0,0 +1,11 @@
+-- ----------------------------------------------------------------------
+-- 보관 알림 테이블 (alert_retention.py 가 alerts 에서 옮겨 옴)
+-- - alerts 와 같은 컬럼 + 맨 뒤에 archived_dt (INSERT ... SELECT a.*, NOW() 로 옮기므로 순서 유지)
+-- - alerts_partitioning.sql 보다 먼저 실행 (LIKE 가 파티션 정의까지 복사하지 않도록)
+-- - 한 번만 실행
+-- ----------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS alerts_archive LIKE alerts;
+
+ALTER TABLE alerts_archive
+    ADD COLUMN archived_dt DATETIME NULL,
+    ADD INDEX idx_alerts_archive_target (target_user, create_dt);
@@ -0,0 +1,5 @@
+-- ----------------------------------------------------------------------
+-- 알림 목록 keyset 페이지네이션용 인덱스 (/common/alerts, /common/alerts/unread-count)
+-- WHERE target_user IN (...) AND del_yn = 'N' ORDER BY create_dt DESC, alert_id DESC
+-- ----------------------------------------------------------------------
+CREATE INDEX idx_alerts_target_feed ON alerts (target_user, del_yn, create_dt, alert_id);
@@ -0,0 +1,21 @@
+-- ----------------------------------------------------------------------
+-- (선택) alerts 월별 RANGE 파티션 전환
+-- - 최근 알림만 조회하는 쿼리가 작은 파티션만 읽도록
+-- - 파티션 테이블은 모든 PK/UNIQUE 키에 파티션 컬럼(create_dt)이 포함되어야 함
+--   → PK 를 (alert_id, create_dt) 로 변경 (alert_id AUTO_INCREMENT 는 그대로)
+-- - 파티션 테이블에는 외래키를 둘 수 없음
+-- - 테이블 전체를 다시 쓰므로 점검 시간에 실행
+-- - 아래 p_old 경계는 실행하는 달의 1일로 바꿔서 실행
+--   이후 월 파티션은 alert_retention.py 가 pmax 에서 미리 분리
+--   (ALERT_PARTITION_AHEAD_MONTHS, 기본 2개월)
+-- ----------------------------------------------------------------------
+ALTER TABLE alerts
+    MODIFY create_dt DATETIME NOT NULL,
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (alert_id, create_dt);
+
+ALTER TABLE alerts
+    PARTITION BY RANGE COLUMNS (create_dt) (
+        PARTITION p_old VALUES LESS THAN ('2026-10-01'),
+        PARTITION pmax  VALUES LESS THAN (MAXVALUE)
+    );
@@ -0,0 +1,7 @@
+-- ----------------------------------------------------------------------
+-- 알림 보관 작업(alert_retention.py) 조회용 인덱스
+-- - 삭제된 알림   : del_yn = 'Y' AND update_dt < ?  /  del_yn = 'Y' AND update_dt IS NULL AND create_dt < ?
+-- - 오래된 알림   : create_dt < ?
+-- ----------------------------------------------------------------------
+CREATE INDEX idx_alerts_retention_deleted ON alerts (del_yn, update_dt, create_dt);
+CREATE INDEX idx_alerts_create_dt ON alerts (create_dt);
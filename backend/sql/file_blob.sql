@@ -0,0 +1,20 @@
+-- ----------------------------------------------------------------------
+-- 내용 주소 기반 이미지 저장 (upload_utils.store_images / register_files / release_files)
+-- - content_hash : 파일 내용 SHA-256 (저장 경로 blobs/{앞 2자리}/{해시}.{확장자})
+-- - ref_count    : 이 파일을 쓰는 post_file 행 수
+-- ----------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS file_blob (
+    content_hash  CHAR(64)     NOT NULL,
+    file_path     VARCHAR(500) NOT NULL,
+    size          BIGINT       NOT NULL,
+    content_type  VARCHAR(50)  NOT NULL,
+    ref_count     INT          NOT NULL DEFAULT 0,
+    create_dt     DATETIME     NULL,
+    update_dt     DATETIME     NULL,
+    PRIMARY KEY (content_hash)
+);
+
+-- 예전 파일(파일명 기반 저장)은 content_hash 가 NULL 로 남음
+ALTER TABLE post_file
+    ADD COLUMN content_hash CHAR(64) NULL,
+    ADD INDEX idx_post_file_hash (content_hash);
@@ -0,0 +1,23 @@
+-- ----------------------------------------------------------------------
+-- 저장소 파일 삭제 대기열 (upload_utils.release_files 가 등록, file_gc.py 가 처리)
+-- - storage_key  : 지울 저장소 키 (blobs/ab/{해시}.jpg 또는 예전 파일 경로)
+-- - content_hash : 내용 주소 파일이면 해시 (지우기 직전 file_blob.ref_count = 0 인지 다시 확인)
+-- - due_dt       : 이 시각 이후에 처리 (참조가 0 이 된 직후 같은 내용이 다시 올라오는 경우 대비)
+-- - attempts     : 실패 횟수 (FILE_DELETE_MAX_ATTEMPTS 이상이면 더 이상 처리하지 않음)
+-- ----------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS file_delete_queue (
+    queue_id      BIGINT       NOT NULL AUTO_INCREMENT,
+    storage_key   VARCHAR(500) NOT NULL,
+    content_hash  CHAR(64)     NULL,
+    attempts      INT          NOT NULL DEFAULT 0,
+    last_error    VARCHAR(500) NULL,
+    due_dt        DATETIME     NOT NULL,
+    create_dt     DATETIME     NULL,
+    PRIMARY KEY (queue_id),
+    INDEX idx_file_delete_queue_due (due_dt),
+    INDEX idx_file_delete_queue_hash (content_hash)
+);
+
+-- 삭제된 글의 파일을 보관 기간(FILE_GC_GRACE_DAYS) 뒤에 정리하기 위한 인덱스
+ALTER TABLE project_channel
+    ADD INDEX idx_project_channel_del (del_yn, update_dt);
@@ -0,0 +1,22 @@
+-- ----------------------------------------------------------------------
+-- 채널 이미지 썸네일/WebP 변환 작업 대기열 (image_variants.py)
+-- - content_hash 당 한 건 (같은 이미지는 한 번만 변환)
+-- - status : Q(대기) / R(처리 중) / D(완료) / F(실패)
+-- - SKIP LOCKED 사용 → MySQL 8.0 이상
+-- ----------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS image_job (
+    job_id        BIGINT       NOT NULL AUTO_INCREMENT,
+    content_hash  CHAR(64)     NOT NULL,
+    status        CHAR(1)      NOT NULL DEFAULT 'Q',
+    attempts      INT          NOT NULL DEFAULT 0,
+    last_error    VARCHAR(500) NULL,
+    create_dt     DATETIME     NULL,
+    update_dt     DATETIME     NULL,
+    PRIMARY KEY (job_id),
+    UNIQUE KEY uq_image_job_hash (content_hash),
+    INDEX idx_image_job_status (status, job_id)
+);
+
+-- 이미 올라와 있는 내용 주소 이미지도 변환 대기열에 등록
+INSERT IGNORE INTO image_job (content_hash, status, attempts, create_dt, update_dt)
+SELECT content_hash, 'Q', 0, NOW(), NOW() FROM file_blob;
@@ -0,0 +1,7 @@
+-- ----------------------------------------------------------------------
+-- 프로젝트 채널 게시판 커서(keyset) 페이지용 인덱스 (board_paging.py)
+-- - 목록 조건 (value_id, category, del_yn) + 정렬 (create_dt DESC, channel_id DESC)
+--   → 커서 이후 글을 인덱스 순서대로 page_size + 1 개만 읽고 멈춤
+-- ----------------------------------------------------------------------
+ALTER TABLE project_channel
+    ADD INDEX idx_project_channel_board (value_id, category, del_yn, create_dt, channel_id);
@@ -0,0 +1,18 @@
+-- ----------------------------------------------------------------------
+-- 리프레시 토큰 (jwt_auth.create_refresh_token / rotate_refresh_token)
+-- - jti       : 토큰 고유 ID (회전할 때마다 새로 발급)
+-- - family_id : 같은 로그인에서 이어진 토큰 묶음 (재사용 감지/로그아웃 시 통째로 폐기)
+-- - expire_at : UTC 기준 만료 시각
+-- ----------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS refresh_token (
+    jti         CHAR(32)    NOT NULL,
+    user_id     VARCHAR(50) NOT NULL,
+    family_id   CHAR(32)    NOT NULL,
+    expire_at   DATETIME    NOT NULL,
+    revoked_yn  CHAR(1)     NOT NULL DEFAULT 'N',
+    create_dt   DATETIME    NOT NULL,
+    update_dt   DATETIME    NULL,
+    PRIMARY KEY (jti),
+    KEY idx_refresh_token_user (user_id, expire_at),
+    KEY idx_refresh_token_family (family_id)
+);
@@ -0,0 +1,12 @@
+-- ----------------------------------------------------------------------
+-- 스테이트리스 인증(JWT_STATELESS=Y)용 토큰 폐기 기록 (jwt_auth.TokenRevocations)
+-- - revoked_at : 역할 변경/정지/탈퇴 시각 (epoch 초), 이 시각 이전에 발급(iat)된 액세스 토큰은 거부
+-- - 액세스 토큰 만료 시간이 지난 기록은 서버가 주기적으로 삭제
+-- ----------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS token_revocation (
+    user_id     VARCHAR(50)   NOT NULL,
+    revoked_at  DOUBLE        NOT NULL,
+    update_dt   DATETIME      NULL,
+    PRIMARY KEY (user_id),
+    KEY idx_token_revocation_time (revoked_at)
+);
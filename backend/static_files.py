@@ -0,0 +1,211 @@
+"""
+----------------------------------------------------------------------
+파일명     : static_files.py
+설명       : 업로드 파일(/static) 전송 라우터 (캐시 검증, Range, 영구 캐시)
+
+주요 기능
+----------------------------------------------------------------------
+1. 파일 전송 (GET/HEAD /static/{path})
+   - UPLOAD_ROOT 아래 파일만 전송 (../ 등으로 밖의 파일 접근 불가)
+   - . 으로 시작하는 경로 구간은 거부 (업로드 중 임시 파일 .staging/, 숨김 파일)
+   - 강한 ETag
+     · 내용 주소 파일(blobs/, 이름이 SHA-256) : 해시 자체가 ETag
+     · 그 외 : 수정 시각 + 크기
+   - If-None-Match / If-Modified-Since 일치 시 304 (본문 전송 없음)
+   - Range 요청(bytes=시작-끝, 시작-, -끝에서부터) → 206, 범위 밖이면 416
+     If-Range 가 현재 ETag 와 다르면 전체 전송
+   - Cache-Control
+     · 내용 주소 파일 : public, max-age=1년, immutable (다시 검증도 안 함)
+     · 그 외 : no-cache (매번 ETag 로 검증, 바뀌지 않았으면 304)
+
+2. 전송 방식 (`FileRangeResponse`)
+   - STATIC_ACCEL_REDIRECT 설정 시 본문 없이 X-Accel-Redirect 헤더만 응답
+     → 앞단 nginx 가 sendfile 로 직접 전송 (애플리케이션은 바이트를 옮기지 않음)
+   - ASGI 서버가 http.response.zerocopy 확장을 지원하면 파일 디스크립터를 넘겨 sendfile
+   - 둘 다 아니면 STATIC_CHUNK_SIZE 단위로 스레드풀에서 읽어 전송 (메모리 사용 일정)
+
+3. S3 저장소 (STORAGE_BACKEND=s3, storage.py)
+   - 파일이 API 서버에 없으므로 presigned 주소로 302 이동 (예전에 저장된 /static 주소 호환)
+
+환경 설정 (.env, config.py)
+----------------------------------------------------------------------
+- UPLOAD_ROOT           : 업로드 파일 저장 최상위 경로
+- STATIC_BASE_URL       : 응답에 넣을 /static 주소 (예: https://api.example.com/static)
+- STATIC_ACCEL_REDIRECT : nginx internal location 경로 (예: /protected-static, 비우면 사용 안 함)
+- STATIC_CHUNK_SIZE     : 직접 전송 시 읽기 단위 (기본 256KB)
+----------------------------------------------------------------------
+"""
+
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import RedirectResponse, Response
+from config import UPLOAD_ROOT, STATIC_ACCEL_REDIRECT
+from storage import storage, LocalStorage
+
+CHUNK_SIZE = int(os.getenv("STATIC_CHUNK_SIZE", str(256 * 1024)))
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+# blobs/ab/{64자리 해시}.ext 또는 {해시}_thumb.webp 같은 변환 파일
+HASHED_NAME = re.compile(r"^(?P<hash>[0-9a-f]{64})(?P<variant>_[a-z0-9]+)?\.[a-z0-9]+$")
+
+mimetypes.add_type("image/webp", ".webp")
+
+router = APIRouter()
+
+
+class FileRangeResponse(Response):
+    """파일의 [offset, offset + length) 구간 전송"""
+
+    def __init__(self, path, offset, length, status_code=200, headers=None, media_type=None, send_body=True):
+        super().__init__(content=None, status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.offset = offset
+        self.length = length
+        self.send_body = send_body
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        f = await run_in_threadpool(open, self.path, "rb")
+        try:
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": f.fileno(),
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+                return
+            await run_in_threadpool(f.seek, self.offset)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await run_in_threadpool(f.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})  # 전송 중 파일이 줄어든 경우
+        finally:
+            await run_in_threadpool(f.close)
+
+
+def _resolve(path: str):
+    if any(part.startswith(".") for part in path.replace("\\", "/").split("/")):
+        return None
+    root = os.path.realpath(UPLOAD_ROOT)
+    full = os.path.realpath(os.path.join(root, path))
+    try:
+        if os.path.commonpath([root, full]) != root:
+            return None
+    except ValueError:  # Windows 에서 드라이브가 다른 경우
+        return None
+    return full
+
+
+def _etag(path: str, st) -> tuple:
+    """(ETag, 내용 주소 파일 여부)"""
+    match = HASHED_NAME.match(os.path.basename(path))
+    if match:
+        return f'"{match.group("hash")}{match.group("variant") or ""}"', True
+    return f'"{st.st_mtime_ns:x}-{st.st_size:x}"', False
+
+
+def _not_modified(etag, last_modified, if_none_match, if_modified_since) -> bool:
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if if_modified_since:
+        try:
+            return int(last_modified) <= int(parsedate_to_datetime(if_modified_since).timestamp())
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _parse_range(range_header: str, size: int):
+    """단일 bytes 범위만 처리 → (시작, 끝) / 형식이 다르면 None (전체 전송) / 범위 밖이면 "invalid" """
+    match = re.fullmatch(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*", range_header)
+    if not match or (not match.group(1) and not match.group(2)):
+        return None  # 여러 구간 요청 등은 전체 전송으로 처리
+    start, end = match.group(1), match.group(2)
+    if start:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+        if start >= size or start > end:
+            return "invalid"
+    else:
+        suffix = int(end)
+        if suffix == 0:
+            return "invalid"
+        start, end = max(size - suffix, 0), size - 1
+    return start, end
+
+
+@router.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def serve_static(
+    path: str,
+    request: Request,
+    range_header: Optional[str] = Header(None, alias="range"),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+):
+    if not isinstance(storage, LocalStorage):
+        return RedirectResponse(storage.url(path.lstrip("/")), status_code=302)
+
+    full = _resolve(path)
+    try:
+        st = await run_in_threadpool(os.stat, full) if full else None
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
+
+    etag, hashed = _etag(full, st)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE if hashed else REVALIDATE_CACHE,
+        "Accept-Ranges": "bytes",
+    }
+    if _not_modified(etag, st.st_mtime, if_none_match, if_modified_since):
+        return Response(status_code=304, headers=headers)
+
+    media_type = mimetypes.guess_type(full)[0] or "application/octet-stream"
+
+    if STATIC_ACCEL_REDIRECT:
+        # nginx 가 sendfile 로 전송 (Range 도 nginx 가 처리)
+        relative = os.path.relpath(full, os.path.realpath(UPLOAD_ROOT)).replace(os.sep, "/")
+        # 예전 파일은 한글 파일명이 있으므로 퍼센트 인코딩 (헤더는 latin-1 만 가능)
+        headers["X-Accel-Redirect"] = STATIC_ACCEL_REDIRECT.rstrip("/") + "/" + quote(relative)
+        return Response(status_code=200, headers=headers, media_type=media_type)
+
+    send_body = request.method != "HEAD"
+    size = st.st_size
+    byte_range = None
+    if range_header and (not if_range or if_range.strip() == etag):
+        byte_range = _parse_range(range_header, size)
+    if byte_range == "invalid":
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+    if byte_range:
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        return FileRangeResponse(full, start, end - start + 1, status_code=206,
+                                 headers=headers, media_type=media_type, send_body=send_body)
+    return FileRangeResponse(full, 0, size, headers=headers, media_type=media_type, send_body=send_body)
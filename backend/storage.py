@@ -0,0 +1,225 @@
+"""
+----------------------------------------------------------------------
+파일명     : storage.py
+설명       : 업로드 파일 저장소 추상화 (로컬 디스크 / S3 호환 오브젝트 스토리지)
+
+주요 기능
+----------------------------------------------------------------------
+1. 공통 인터페이스 (`Storage`)
+   - 파일은 키(예: blobs/ab/{해시}.jpg)로 다룸, DB 의 file_path 에도 키를 저장
+   - exists(key)                   : 있는지 확인
+   - put_file(local_path, key, ct) : 로컬 임시 파일을 저장소로 옮김 (임시 파일은 사라짐)
+   - fetch(key)                    : 로컬에서 읽을 수 있는 경로 (with 문, S3 는 임시 다운로드)
+   - delete(key)                   : 삭제
+   - url(key)                      : 브라우저가 받을 주소
+   - list(prefix)                  : (키, 크기, 수정 시각) 목록 (파일 정리 작업용, file_gc.py)
+   - staging_dir                   : 업로드 중 임시 파일을 쓸 디렉터리
+
+2. 로컬 디스크 (`LocalStorage`)
+   - UPLOAD_ROOT/{key} 에 저장, 주소는 STATIC_BASE_URL/{key} (static_files.py 가 전송)
+   - 임시 파일도 같은 디스크(UPLOAD_ROOT/.staging)에 써서 os.replace 한 번으로 이동
+
+3. S3 호환 (`S3Storage`, boto3 필요)
+   - AWS S3 / MinIO 등 (S3_ENDPOINT_URL 로 지정)
+   - 내용 주소 파일은 Cache-Control: immutable 로 올림
+   - url() 은 S3_PRESIGN_SECONDS 동안 유효한 presigned GET 주소
+     → 브라우저가 스토리지에서 직접 받음 (API 서버는 파일 전송에 관여하지 않음)
+   - 여러 API 서버가 같은 버킷을 공유
+
+4. 예전 경로 호환 (`key_for`)
+   - 예전에 절대 경로(UPLOAD_ROOT/...)로 저장된 file_path 도 키로 변환해서 사용
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- STORAGE_BACKEND     : local / s3 (기본 local)
+- S3_BUCKET           : 버킷 이름
+- S3_ENDPOINT_URL     : S3 호환 서버 주소 (예: http://localhost:9000, AWS 는 비움)
+- S3_REGION           : 리전 (기본 ap-northeast-2)
+- S3_ACCESS_KEY / S3_SECRET_KEY : 접근 키 (비우면 boto3 기본 자격 증명 사용)
+- S3_PREFIX           : 버킷 안 키 앞에 붙일 경로 (기본 없음)
+- S3_PRESIGN_SECONDS  : presigned 주소 유효 시간(초) (기본 3600)
+
+비고
+----------------------------------------------------------------------
+- 로컬 MinIO 로 확인:
+  docker run -p 9000:9000 -e MINIO_ROOT_USER=minio -e MINIO_ROOT_PASSWORD=minio123 minio/minio server /data
+  STORAGE_BACKEND=s3, S3_ENDPOINT_URL=http://localhost:9000, S3_ACCESS_KEY=minio, S3_SECRET_KEY=minio123
+----------------------------------------------------------------------
+"""
+
+import contextlib
+import os
+import tempfile
+
+from config import UPLOAD_ROOT, STATIC_BASE_URL
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # boto3 미설치 (로컬 저장소만 사용)
+    boto3 = None
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+S3_BUCKET = os.getenv("S3_BUCKET", "")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_REGION = os.getenv("S3_REGION", "ap-northeast-2")
+S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY") or None
+S3_SECRET_KEY = os.getenv("S3_SECRET_KEY") or None
+S3_PREFIX = os.getenv("S3_PREFIX", "").strip("/")
+S3_PRESIGN_SECONDS = int(os.getenv("S3_PRESIGN_SECONDS", "3600"))
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+
+
+def key_for(file_path) -> str:
+    """DB 의 file_path (키 또는 예전 절대 경로) → 저장소 키"""
+    path = (file_path or "").replace("\\", "/")
+    root = UPLOAD_ROOT.replace("\\", "/").rstrip("/")
+    if path.startswith(root + "/"):
+        return path[len(root) + 1:]
+    return path.lstrip("/")
+
+
+class Storage:
+    staging_dir = tempfile.gettempdir()
+
+    def exists(self, key) -> bool:
+        raise NotImplementedError
+
+    def put_file(self, local_path, key, content_type=None):
+        raise NotImplementedError
+
+    def fetch(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def url(self, key) -> str:
+        raise NotImplementedError
+
+    def list(self, prefix=""):
+        raise NotImplementedError
+
+
+class LocalStorage(Storage):
+    def __init__(self, root=UPLOAD_ROOT, base_url=STATIC_BASE_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+        self.staging_dir = os.path.join(root, ".staging")
+
+    def path(self, key) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key) -> bool:
+        return os.path.exists(self.path(key))
+
+    def put_file(self, local_path, key, content_type=None):
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(local_path, target)
+
+    @contextlib.contextmanager
+    def fetch(self, key):
+        yield self.path(key)
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key) -> str:
+        return f"{self.base_url}/{key}"
+
+    def list(self, prefix=""):
+        staging = os.path.realpath(self.staging_dir)
+        for dirpath, dirnames, filenames in os.walk(self.path(prefix) if prefix else self.root):
+            dirnames[:] = [d for d in dirnames if os.path.realpath(os.path.join(dirpath, d)) != staging]
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(full, self.root).replace(os.sep, "/")
+                yield key, st.st_size, st.st_mtime
+
+
+class S3Storage(Storage):
+    def __init__(self, bucket=S3_BUCKET, prefix=S3_PREFIX, presign_seconds=S3_PRESIGN_SECONDS):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 를 사용하려면 boto3 를 설치해야 합니다. (pip install boto3)")
+        if not bucket:
+            raise RuntimeError("S3_BUCKET 이 설정되지 않았습니다.")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.presign_seconds = presign_seconds
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=S3_ENDPOINT_URL,
+            region_name=S3_REGION,
+            aws_access_key_id=S3_ACCESS_KEY,
+            aws_secret_access_key=S3_SECRET_KEY,
+            # MinIO 는 path-style 주소 사용
+            config=BotoConfig(signature_version="s3v4",
+                              s3={"addressing_style": "path" if S3_ENDPOINT_URL else "auto"}),
+        )
+
+    def _key(self, key) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def exists(self, key) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_file(self, local_path, key, content_type=None):
+        extra = {"CacheControl": IMMUTABLE_CACHE}
+        if content_type:
+            extra["ContentType"] = content_type
+        try:
+            self.client.upload_file(local_path, self.bucket, self._key(key), ExtraArgs=extra)
+        finally:
+            os.remove(local_path)
+
+    @contextlib.contextmanager
+    def fetch(self, key):
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1], dir=self.staging_dir)
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, self._key(key), path)
+            yield path
+        finally:
+            os.remove(path)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def url(self, key) -> str:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(key)},
+            ExpiresIn=self.presign_seconds,
+        )
+
+    def list(self, prefix=""):
+        paginator = self.client.get_paginator("list_objects_v2")
+        start = len(self.prefix) + 1 if self.prefix else 0
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][start:], obj["Size"], obj["LastModified"].timestamp()
+
+
+def _create_storage() -> Storage:
+    if STORAGE_BACKEND == "s3":
+        return S3Storage()
+    return LocalStorage()
+
+
+storage = _create_storage()
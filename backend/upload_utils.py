@@ -0,0 +1,312 @@
+"""
+----------------------------------------------------------------------
+파일명     : upload_utils.py
+설명       : 프로젝트 채널 이미지 업로드 저장 공통 모듈 (내용 주소 기반 중복 제거)
+
+주요 기능
+----------------------------------------------------------------------
+1. 이미지 저장 (`store_images`)
+   - 업로드 파일을 UPLOAD_CHUNK_SIZE 씩 읽어서 저장 (파일 크기와 상관없이 메모리 사용 일정)
+   - 읽기는 UploadFile 비동기 read, 쓰기는 스레드풀에서 실행 → 이벤트 루프를 막지 않음
+   - 첫 청크의 매직 바이트로 이미지 형식 확인 (JPEG, PNG, GIF, WEBP)
+     → 디스크에 쓰기 전에 검사, Content-Type 헤더만 믿지 않음
+   - 파일별 UPLOAD_MAX_FILE_BYTES, 요청 전체 UPLOAD_MAX_REQUEST_BYTES 를 복사하면서 확인
+   - 복사하면서 SHA-256 계산 → 저장소 키는 blobs/{해시 앞 2자리}/{해시}.{확장자}
+     · 같은 내용이면 같은 파일 하나만 저장 (이미 있으면 임시 파일만 지움)
+     · 내용이 바뀌면 키도 바뀌므로 URL 을 영구 캐시해도 됨, 파일명 충돌 없음
+   - 임시 파일(.part)에 쓰고 끝까지 성공한 뒤에만 저장소(storage.py, 로컬/S3)로 옮김
+   - file_path 에는 저장소 키를 저장
+   - 중간에 실패하면 이번 요청에서 새로 만든 파일 삭제
+
+2. 참조 수 관리 (file_blob 테이블, sql/file_blob.sql)
+   - register_files(cursor, channel_id, stored, user_id)
+     post_file 행 등록 (content_hash 포함) + file_blob.ref_count +1
+     + 썸네일/WebP 변환 작업 등록 (image_job, image_variants.py 가 처리)
+   - release_files(cursor, channel_id, file_ids)
+     post_file 행 삭제 + file_blob.ref_count -1 (다른 글이 같이 쓰는 파일은 지우지 않음)
+     참조가 0 이 된 파일과 content_hash 가 없는 예전 파일은 삭제 대기열에 등록
+     (file_delete_queue, 실제 삭제는 file_gc.py 가 커밋 이후 백그라운드에서)
+   - remove_files(stored) : DB 처리에 실패했을 때 이번 요청에서 새로 만든 파일 삭제
+     같은 내용을 동시에 올린 다른 요청이 이미 file_blob 에 등록했으면 지우지 않음
+     요청 세션을 rollback 한 뒤에 호출 (register_files 가 잡은 file_blob 잠금을 기다리지 않도록)
+
+3. 파일 주소 (`file_url`)
+   - file_path(저장소 키 또는 예전 절대 경로) → 브라우저가 받을 주소
+     로컬: STATIC_BASE_URL/{키} (static_files.py 가 전송), S3: presigned 주소
+
+4. 요청 크기 제한 미들웨어 (`UploadLimitMiddleware`)
+   - multipart 요청의 Content-Length 가 UPLOAD_MAX_REQUEST_BYTES 보다 크면 본문을 읽기 전에 413
+   - Content-Length 가 없거나 속인 경우에도 받은 바이트 수를 세다가 넘으면 413
+     (multipart 파서가 임시 파일에 쌓는 양도 제한)
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- UPLOAD_MAX_FILE_BYTES    : 파일 하나 최대 크기 (기본 10MB)
+- UPLOAD_MAX_REQUEST_BYTES : 요청 하나 최대 크기 (기본 50MB)
+- UPLOAD_CHUNK_SIZE        : 읽기/쓰기 단위 (기본 1MB)
+- FILE_DELETE_DELAY        : 참조가 0 이 된 파일을 지우기까지 대기 시간(초) (기본 600)
+
+비고
+----------------------------------------------------------------------
+- ref_count 가 0 이 된 파일은 바로 지우지 않음
+  (같은 내용을 동시에 올리는 요청이 그 파일을 재사용할 수 있으므로 FILE_DELETE_DELAY 뒤에,
+   지우기 직전 ref_count 를 다시 확인)
+- register_files 는 file_blob 행을 잠근 뒤 파일이 아직 있는지 확인
+  (정리 작업이나 같은 내용을 동시에 올리다 실패한 요청이 먼저 지웠으면 409, 다시 올리면 새로 저장됨)
+----------------------------------------------------------------------
+"""
+
+import hashlib
+import logging
+import os
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from db_pool import get_connection
+from storage import storage, key_for
+
+MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(50 * 1024 * 1024)))
+CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+DELETE_DELAY = int(os.getenv("FILE_DELETE_DELAY", "600"))
+
+logger = logging.getLogger(__name__)
+
+# 프로젝트 채널 이미지 저장소 키 앞부분 (내용 주소 기반)
+BLOB_PREFIX = "blobs"
+
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif", "image/webp": ".webp"}
+
+
+def detect_image_type(head: bytes):
+    """파일 앞부분(매직 바이트)으로 이미지 형식 판별, 이미지가 아니면 None"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _safe_name(filename) -> str:
+    # 경로 조작 방지 (../, 드라이브 경로 등은 파일명만 남김)
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    return name or "image"
+
+
+def file_url(file_path) -> str:
+    if not file_path:
+        return file_path
+    return storage.url(key_for(file_path))
+
+
+def blob_key(content_hash, content_type) -> str:
+    return f"{BLOB_PREFIX}/{content_hash[:2]}/{content_hash}{EXTENSIONS[content_type]}"
+
+
+def remove_files(stored):
+    created = [item for item in stored if item.get("created")]  # 원래 있던 파일은 다른 글이 쓰고 있을 수 있음
+    if not created:
+        return
+    conn = get_connection()
+    try:
+        with conn.cursor() as cursor:
+            for item in created:
+                # 같은 내용을 동시에 올린 요청도 created=True 일 수 있으므로 file_blob 을 확인
+                # (잠금 읽기: 그 요청이 등록 중이면 커밋될 때까지 기다림, 지우는 동안은 그 요청이 기다림)
+                cursor.execute("SELECT 1 FROM file_blob WHERE content_hash = %s LOCK IN SHARE MODE",
+                               (item["content_hash"],))
+                if cursor.fetchone():
+                    continue
+                try:
+                    storage.delete(item["file_path"])
+                except Exception as e:
+                    logger.warning("업로드 파일 삭제 실패 (%s): %s", item["file_path"], e)
+        conn.commit()
+    except Exception:
+        # 못 지운 파일은 파일 정리 작업(file_gc.py)이 보관 기간 뒤에 처리
+        logger.exception("업로드 파일 정리 실패 (%d 건)", len(created))
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+def _write_chunk(out, digest, chunk):
+    # hashlib 은 큰 데이터에서 GIL 을 놓으므로 쓰기와 같이 스레드풀에서 처리
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _commit_blob(temp_path, key, content_type) -> bool:
+    """임시 파일을 저장소로, 이미 같은 내용이 있으면 임시 파일만 삭제 (새로 만들었으면 True)"""
+    if storage.exists(key):
+        os.remove(temp_path)
+        return False
+    storage.put_file(temp_path, key, content_type)
+    return True
+
+
+async def store_images(files, max_file_bytes=MAX_FILE_BYTES, max_request_bytes=MAX_REQUEST_BYTES):
+    """
+    이미지 파일들을 저장소에 내용 주소로 저장하고 저장 정보 목록 반환
+    - [{"file_name": 원래 파일명, "file_path": 저장소 키, "content_hash": SHA-256,
+        "size": 바이트, "content_type": 형식, "created": 새로 저장했는지}, ...]
+    - 형식이 맞지 않으면 400, 크기 초과 시 413 (이번에 새로 만든 파일은 삭제)
+    """
+    staging_dir = storage.staging_dir
+    await run_in_threadpool(os.makedirs, staging_dir, exist_ok=True)
+    stored = []
+    total = 0
+    try:
+        for file in files or []:
+            head = await file.read(CHUNK_SIZE)
+            content_type = detect_image_type(head)
+            if content_type is None:
+                raise HTTPException(status_code=400, detail="이미지 파일만 등록 가능합니다.")
+
+            temp_path = os.path.join(staging_dir, f"{os.urandom(8).hex()}.part")
+            out = await run_in_threadpool(open, temp_path, "wb")
+            digest = hashlib.sha256()
+            size = 0
+            try:
+                chunk = head
+                while chunk:
+                    size += len(chunk)
+                    total += len(chunk)
+                    if size > max_file_bytes:
+                        raise HTTPException(status_code=413, detail=f"파일 하나는 {max_file_bytes // (1024 * 1024)}MB 까지 등록할 수 있습니다.")
+                    if total > max_request_bytes:
+                        raise HTTPException(status_code=413, detail=f"한 번에 {max_request_bytes // (1024 * 1024)}MB 까지 등록할 수 있습니다.")
+                    await run_in_threadpool(_write_chunk, out, digest, chunk)
+                    chunk = await file.read(CHUNK_SIZE)
+            except BaseException:
+                await run_in_threadpool(out.close)
+                await run_in_threadpool(os.remove, temp_path)
+                raise
+            await run_in_threadpool(out.close)
+
+            content_hash = digest.hexdigest()
+            key = blob_key(content_hash, content_type)
+            created = await run_in_threadpool(_commit_blob, temp_path, key, content_type)
+            stored.append({
+                "file_name": _safe_name(file.filename),
+                "file_path": key,
+                "content_hash": content_hash,
+                "size": size,
+                "content_type": content_type,
+                "created": created,
+            })
+    except BaseException:
+        await run_in_threadpool(remove_files, stored)
+        raise
+    return stored
+
+
+def register_files(cursor, channel_id, stored, user_id):
+    """저장한 파일을 글에 연결 (post_file 등록 + 참조 수 +1)"""
+    if not stored:
+        return
+    cursor.executemany("""
+        INSERT INTO file_blob (content_hash, file_path, size, content_type, ref_count, create_dt, update_dt)
+        VALUES (%s, %s, %s, %s, 1, NOW(), NOW())
+        ON DUPLICATE KEY UPDATE ref_count = ref_count + 1, update_dt = NOW()
+    """, [(item["content_hash"], item["file_path"], item["size"], item["content_type"]) for item in stored])
+    cursor.executemany("""
+        INSERT INTO post_file (channel_id, file_name, file_path, content_hash, create_dt, create_id, del_yn)
+        VALUES (%s, %s, %s, %s, NOW(), %s, 'N')
+    """, [(channel_id, item["file_name"], item["file_path"], item["content_hash"], user_id) for item in stored])
+    # 썸네일/WebP 변환은 백그라운드에서 (이미 변환한 이미지면 무시)
+    cursor.executemany("""
+        INSERT IGNORE INTO image_job (content_hash, status, attempts, create_dt, update_dt)
+        VALUES (%s, 'Q', 0, NOW(), NOW())
+    """, sorted({(item["content_hash"],) for item in stored}))
+    # 위 INSERT ... ON DUPLICATE KEY 로 file_blob 행이 잠겨 있으므로 이 사이에 정리 작업이 지우지 못함
+    # 새로 만든 파일도 확인 (같은 내용을 동시에 올리다 실패한 요청이 먼저 지웠을 수 있음)
+    for item in stored:
+        if not storage.exists(item["file_path"]):
+            raise HTTPException(status_code=409, detail="파일 저장 중 충돌이 발생했습니다. 다시 시도해 주세요.")
+
+
+def release_files(cursor, channel_id, file_ids):
+    """글에서 파일 연결 해제 (post_file 삭제 + 참조 수 -1)"""
+    file_ids = list(file_ids or [])
+    if not file_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(file_ids))
+    cursor.execute(f"""
+        SELECT file_id, file_path, content_hash
+        FROM post_file
+        WHERE channel_id = %s AND file_id IN ({placeholders})
+    """, (channel_id, *file_ids))
+    rows = cursor.fetchall()
+    if not rows:
+        return
+
+    cursor.execute(f"DELETE FROM post_file WHERE file_id IN ({', '.join(['%s'] * len(rows))})",
+                   [row["file_id"] for row in rows])
+
+    released = {}
+    legacy = []
+    for row in rows:
+        if row["content_hash"]:
+            released[row["content_hash"]] = released.get(row["content_hash"], 0) + 1
+        elif row["file_path"]:
+            # 예전 방식(파일명 기반)으로 저장된 파일은 글마다 따로 있으므로 바로 삭제 대상
+            legacy.append(key_for(row["file_path"]))
+    if legacy:
+        cursor.executemany("""
+            INSERT INTO file_delete_queue (storage_key, content_hash, due_dt, create_dt)
+            VALUES (%s, NULL, NOW(), NOW())
+        """, [(key,) for key in legacy])
+    if released:
+        cursor.executemany("""
+            UPDATE file_blob
+            SET ref_count = GREATEST(ref_count - %s, 0), update_dt = NOW()
+            WHERE content_hash = %s
+        """, [(count, content_hash) for content_hash, count in released.items()])
+        hashes = list(released)
+        cursor.execute(f"""
+            INSERT INTO file_delete_queue (storage_key, content_hash, due_dt, create_dt)
+            SELECT b.file_path, b.content_hash, NOW() + INTERVAL %s SECOND, NOW()
+            FROM file_blob b
+            WHERE b.content_hash IN ({', '.join(['%s'] * len(hashes))}) AND b.ref_count = 0
+              AND NOT EXISTS (SELECT 1 FROM file_delete_queue q WHERE q.content_hash = b.content_hash)
+        """, (DELETE_DELAY, *hashes))
+
+
+class UploadLimitMiddleware:
+    """multipart 요청 본문 크기 제한 (순수 ASGI 미들웨어, 본문을 메모리에 모으지 않음)"""
+
+    def __init__(self, app, max_bytes=MAX_REQUEST_BYTES):
+        self.app = app
+        # 파일 외 폼 필드 / multipart 경계 문자열 여유분
+        self.max_bytes = max_bytes + 64 * 1024
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope.get("headers") or [])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        too_large = JSONResponse(status_code=413, content={"detail": "업로드 용량이 너무 큽니다."})
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            return await too_large(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail="업로드 용량이 너무 큽니다.")
+            return message
+
+        return await self.app(scope, limited_receive, send)
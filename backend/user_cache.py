@@ -0,0 +1,103 @@
+"""
+----------------------------------------------------------------------
+파일명     : user_cache.py
+설명       : get_current_user 가 조회하는 사용자 정보의 프로세스 내 캐시
+
+주요 기능
+----------------------------------------------------------------------
+1. TTL + LRU 캐시 (`UserCache`)
+   - user_id 기준으로 인증에 필요한 컬럼만 보관 (USER_COLUMNS)
+   - USER_CACHE_TTL 초가 지나면 만료, USER_CACHE_SIZE 초과 시 오래된 것부터 제거
+   - hit / miss / eviction 카운터 제공 (/metrics)
+
+2. 무효화 (`invalidate_user`)
+   - 역할/등급/정지/복구/탈퇴/PM 해제 처리 시 호출
+   - 즉시 제거 + 커밋 이후 한 번 더 제거 (커밋 전 다른 요청이 옛 값을 다시 넣는 경우 방지)
+
+환경 설정 (.env)
+----------------------------------------------------------------------
+- USER_CACHE_TTL  : 캐시 유지 시간(초) (기본 60)
+- USER_CACHE_SIZE : 최대 보관 사용자 수 (기본 1024)
+
+비고
+----------------------------------------------------------------------
+- 프로세스(워커)별 캐시이므로 다른 워커에는 TTL 이 지나야 반영됨
+----------------------------------------------------------------------
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+# 핸들러에서 실제로 쓰는 컬럼 + 계정 상태 확인용 컬럼
+USER_COLUMNS = ("user_id", "nickname", "role", "status", "del_yn")
+
+
+class UserCache:
+    def __init__(self, ttl=CACHE_TTL, max_size=CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()  # user_id -> (expire_at, row)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None or item[0] < now:
+                if item is not None:
+                    del self._items[user_id]
+                self._misses += 1
+                return None
+            self._items.move_to_end(user_id)
+            self._hits += 1
+            return dict(item[1])  # 호출한 쪽에서 수정해도 캐시는 그대로
+
+    def put(self, user_id, row):
+        data = {col: row.get(col) for col in USER_COLUMNS}
+        with self._lock:
+            self._items[user_id] = (time.monotonic() + self.ttl, data)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._invalidations += 1
+            self._items.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._items),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / total, 4) if total else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+user_cache = UserCache()
+
+
+def invalidate_user(conn, user_id):
+    """사용자 정보가 바뀌는 처리에서 호출 (conn: get_db 세션)"""
+    user_cache.invalidate(user_id)
+    conn.after_commit(lambda: user_cache.invalidate(user_id))
@@ -7,7 +7,9 @@
 ----------------------------------------------------------------------
 1. 인증 및 로그인
    - 로그인 (/login)
-   - JWT 토큰 발급
+   - JWT 토큰 발급 (액세스 + 리프레시)
+   - 액세스 토큰 재발급 (/refresh, 리프레시 토큰 회전)
+   - 로그아웃 (/logout, 리프레시 토큰 폐기)
    - 내 정보 조회 (/me)
 
 2. 회원가입 및 사용자 관리
@@ -23,6 +25,7 @@
 
 4. 기술 스택
    - 기술 스택 공통코드 기반 조회 (프론트엔드/백엔드 분류)
+   - code_cache 에서 미리 만든 트리 + ETag 응답 (변경 없으면 304)
 
 5. 문의사항
    - 사용자 문의사항 등록 (/askSend)
@@ -40,7 +43,7 @@
 비고
 ----------------------------------------------------------------------
 - DB 연결은 pymysql 사용 (DictCursor)
-- SQL 실행 후 커넥션 반드시 close
+- DB 세션은 `conn = Depends(get_db)` 로 요청당 하나, commit/rollback 은 get_db 가 처리
 - 이메일 인증은 email_verification 테이블 기반으로 처리
 - 인증 코드는 6자리 랜덤 + 3분 만료
 - 기술 스택은 공통코드 (TECH_STACK) 기반 분류
@@ -49,14 +52,16 @@
 """
 
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 import pymysql
-import bcrypt
-from jwt_auth import create_access_token, get_current_user
-from database import db_config
+from bcrypt_pool import hash_password, check_password, needs_rehash
+from jwt_auth import create_access_token, create_refresh_token, rotate_refresh_token, revoke_refresh_token, get_current_user
+from db_pool import get_db, DBSession
+from code_cache import tech_stack_response
+from alert_utils import add_alert, init_read_state
 import re
 import random, string
 from datetime import datetime, timedelta
@@ -110,6 +115,9 @@ class askSend(BaseModel):
     category: Optional[str] = None
     askMessage: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 def validate_password(password: str):
     password_regex = re.compile(
         r'^(?=.*[A-Za-z])(?=.*\d)(?=.*[!@#$%^&*()_+~`\-=\[\]{};:"\\|,.<>\/?]).{8,}$'
@@ -122,32 +130,40 @@ def validate_password(password: str):
         )
 # ---------- 로그인 ----------
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    conn = pymysql.connect(**db_config)
+def login(form_data: OAuth2PasswordRequestForm = Depends(), conn: DBSession = Depends(get_db)):
     try:
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("SELECT * FROM user WHERE user_id = %s", (form_data.username,))
             user = cursor.fetchone()
 
-            if not user:
-                logger.warning("🚫 아이디 없음")
-                raise HTTPException(status_code=401, detail="아이디가 존재하지 않습니다.")
-            
-            if not bcrypt.checkpw(form_data.password.encode(), user["password"].encode()):
-                logger.warning("🚫 비밀번호 오류")
-                raise HTTPException(status_code=401, detail="비밀번호가 올바르지 않습니다.")
-
-            if user["del_yn"] == "Y":
-                logger.warning("🚫 탈퇴한 계정")
-                raise HTTPException(status_code=401, detail="탈퇴된 아이디입니다.")
-
-            if user["status"] == "N":
-                logger.warning("🚫 정지된 계정")
-                raise HTTPException(status_code=401, detail="활동이 정지된 아이디입니다.")
-
-            
-
-        # ✅ 커서 블록 종료 후에는 cursor 사용 X
+        # bcrypt 확인 동안 DB 커넥션을 잡고 있지 않도록 먼저 반납 (이후 쿼리는 새로 대여)
+        conn.release()
+
+        if not user:
+            logger.warning("🚫 아이디 없음")
+            raise HTTPException(status_code=401, detail="아이디가 존재하지 않습니다.")
+
+        if not check_password(form_data.password, user["password"]):
+            logger.warning("🚫 비밀번호 오류")
+            raise HTTPException(status_code=401, detail="비밀번호가 올바르지 않습니다.")
+
+        if user["del_yn"] == "Y":
+            logger.warning("🚫 탈퇴한 계정")
+            raise HTTPException(status_code=401, detail="탈퇴된 아이디입니다.")
+
+        if user["status"] == "N":
+            logger.warning("🚫 정지된 계정")
+            raise HTTPException(status_code=401, detail="활동이 정지된 아이디입니다.")
+
+        # 예전 작업계수로 저장된 비밀번호는 로그인 성공 시 새 작업계수로 다시 저장
+        # (해시 계산이 끝난 뒤에 커넥션을 빌려 UPDATE 만 짧게)
+        if needs_rehash(user["password"]):
+            new_hash = hash_password(form_data.password)
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE user SET password = %s WHERE user_id = %s",
+                    (new_hash, user["user_id"]),
+                )
 
         logger.info(f"🎉 로그인 성공: {user['user_id']}")
         access_token = create_access_token(data={
@@ -155,8 +171,9 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
             "nickname": user["nickname"],
             "role": user["role"]
         })
+        refresh_token = create_refresh_token(conn, user["user_id"])
 
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
     except HTTPException as e:
         raise e
@@ -165,16 +182,26 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
         logger.error(f"💥 서버 에러: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        conn.close()
+# ---------- 토큰 재발급 ----------
+@router.post("/refresh")
+def refresh(body: RefreshRequest, conn: DBSession = Depends(get_db)):
+    # 비밀번호 확인(bcrypt) 없이 리프레시 토큰만으로 재발급, 사용한 토큰은 회전
+    access_token, refresh_token = rotate_refresh_token(conn, body.refresh_token)
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+# ---------- 로그아웃 ----------
+@router.post("/logout")
+def logout(body: RefreshRequest, conn: DBSession = Depends(get_db)):
+    revoke_refresh_token(conn, body.refresh_token)
+    return {"message": "로그아웃 되었습니다."}
+
 
 
 # ---------- 내 정보 조회 ----------
 @router.get("/me")
-def get_my_info(user: dict = Depends(get_current_user)):
+def get_my_info(user: dict = Depends(get_current_user), conn: DBSession = Depends(get_db)):
     print("🔥 get_my_info 받은 user:", user)
 
-    conn = pymysql.connect(**db_config)
     try:
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("SELECT * FROM user WHERE user_id = %s", (user["user_id"],))
@@ -225,15 +252,12 @@ def get_my_info(user: dict = Depends(get_current_user)):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
     
-    finally:
-        conn.close()
 
 
 # ---------- 회원가입 ----------
 @router.post("/register")
-def register_user(user: UserRegister):
+def register_user(user: UserRegister, conn: DBSession = Depends(get_db)):
     
-    conn = pymysql.connect(**db_config)
     try:
         with conn.cursor() as cursor:
             cursor.execute("SELECT user_id FROM user WHERE user_id = %s", (user.user_id,))
@@ -246,7 +270,7 @@ def register_user(user: UserRegister):
             if cursor.fetchone():
                 raise HTTPException(status_code=400, detail="이미 등록된 이메일입니다.")
 
-            hashed_pw = bcrypt.hashpw(user.password.encode(), bcrypt.gensalt()).decode()
+            hashed_pw = hash_password(user.password)
             sql = '''
                 INSERT INTO user (user_id, nickname, email, password, role, phone, company, portfolio, create_dt, del_yn)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW(), 'N')
@@ -255,6 +279,8 @@ def register_user(user: UserRegister):
                 user.user_id, user.nickname, user.email, hashed_pw, user.role,
                 user.phone, user.company, user.portfolio
             ))
+            # 가입 이전 공용 알림은 보이지 않도록 확인 커서를 대상별 마지막 broadcast_seq 로 초기화
+            init_read_state(cursor, user.user_id, user.role)
 
             # 기술 스택 등록
             if user.skills:
@@ -275,15 +301,12 @@ def register_user(user: UserRegister):
                         user.user_id, years, is_fresher, skill.code_id, skill.code_name, skill.parent_code
                     ))
 
-        conn.commit()
         return {"message": "회원가입 완료"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.post("/check-duplicate")
-def check_duplicate(data: DuplicateCheckRequest):
+def check_duplicate(data: DuplicateCheckRequest, conn: DBSession = Depends(get_db)):
     result = {
         "user_idExists": False,
         "emailExists": False,
@@ -291,7 +314,6 @@ def check_duplicate(data: DuplicateCheckRequest):
     }
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor() as cursor:
             # user_id 중복 확인
             if data.user_id:
@@ -315,7 +337,6 @@ def check_duplicate(data: DuplicateCheckRequest):
                         INSERT INTO email_verification (email, code, expire_at)
                         VALUES (%s, %s, %s)
                     """, (data.email, code, expire_time))
-                    conn.commit()
 
                     # 이메일 전송
                     send_verification_email(data.email, code)
@@ -328,56 +349,19 @@ def check_duplicate(data: DuplicateCheckRequest):
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 # 기술불러오기
 @router.get("/tech-stacks")
-def get_tech_stacks():
+def get_tech_stacks(if_none_match: Optional[str] = Header(None)):
+    # 공통코드 캐시에서 미리 만들어 둔 트리 응답 (ETag 같으면 304)
     try:
-        conn = pymysql.connect(**db_config)
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            # 자식 코드만 가져오기 (PARENT_CODE가 NULL 아닌 것만)  React , Node.js 등등
-            sql = """
-                SELECT code_id, code_name, parent_code
-                FROM common_code
-                WHERE group_id = 'TECH_STACK' AND parent_code IS NOT NULL
-                ORDER BY code_id ASC
-            """
-            cursor.execute(sql)
-            child_codes = cursor.fetchall()
-
-            # 부모 코드도 같이 가져오기  프론트엔드, 백엔드 등등
-            cursor.execute("""
-                SELECT code_id, code_name
-                FROM common_code
-                WHERE group_id = 'TECH_STACK' AND parent_code IS NULL
-                ORDER BY code_id ASC
-            """)
-            parent_codes = cursor.fetchall()
-
-        # 🧠 분류용 딕셔너리로 정리
-        result = {}
-        parent_map = {row["code_id"]: row["code_name"] for row in parent_codes}
-        for item in child_codes:
-            parent_name = parent_map.get(item["parent_code"], "기타")
-            if parent_name not in result:
-                result[parent_name] = []
-            result[parent_name].append({
-                "label": item["code_name"],
-                "code_id": item["code_id"],
-                "parent_code": item["parent_code"]
-            })
-
-        return result
+        return tech_stack_response(if_none_match)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/verify-email")
-def verify_email(code: str):
-    # DB 연결
-    conn = pymysql.connect(**db_config)
+def verify_email(code: str, conn: DBSession = Depends(get_db)):
     with conn.cursor() as cursor:
         # ✅ 먼저 해당 코드를 가진 이메일을 찾기
         cursor.execute("""
@@ -406,17 +390,16 @@ def verify_email(code: str):
 
         if not latest_row or latest_row["id"] != row["id"]:
             raise HTTPException(status_code=400, detail="이 코드는 최신 인증 코드가 아닙니다.")
-        
+    
 
         # 인증 완료 처리
         cursor.execute("UPDATE email_verification SET is_verified = TRUE WHERE id = %s", (latest_row["id"],))
-        conn.commit()
 
     return {"message": f"{row['email']} 인증이 완료되었습니다!"}
 
 
 @router.post("/Find-email")
-def check_duplicate(data: FindRequest):
+def check_duplicate(data: FindRequest, conn: DBSession = Depends(get_db)):
     result = {
         "emailExists": False,
         "message": "",
@@ -425,7 +408,6 @@ def check_duplicate(data: FindRequest):
     }
 
     try:
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             
             # 이메일만 있으면 실행
@@ -446,7 +428,6 @@ def check_duplicate(data: FindRequest):
                         INSERT INTO email_verification (email, code, expire_at)
                         VALUES (%s, %s, %s)
                     """, (data.email, code, expire_time))
-                    conn.commit()
 
                     # 이메일 전송
                     send_verification_email(data.email, code)
@@ -475,7 +456,6 @@ def check_duplicate(data: FindRequest):
                         INSERT INTO email_verification (email, code, expire_at)
                         VALUES (%s, %s, %s)
                     """, (data.email, code, expire_time))
-                    conn.commit()
 
                     # 이메일 전송
                     send_verification_email(data.email, code)
@@ -490,14 +470,10 @@ def check_duplicate(data: FindRequest):
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 @router.get("/idFind")
-def idFind(email: str):
-    # DB 연결
-    conn = pymysql.connect(**db_config)
+def idFind(email: str, conn: DBSession = Depends(get_db)):
     with conn.cursor(pymysql.cursors.DictCursor) as cursor:
         # ✅ 먼저 해당 코드를 가진 이메일을 찾기
         cursor.execute("""
@@ -513,21 +489,18 @@ def idFind(email: str):
     return row
 
 @router.post("/pwFind")
-def idFind(data: FindRequest):
+def idFind(data: FindRequest, conn: DBSession = Depends(get_db)):
     if data.password != data.confirm_password:
             raise HTTPException(status_code=400, detail="❌ 비밀번호가 일치하지 않습니다.")
     validate_password(data.password)
-    # DB 연결
-    conn = pymysql.connect(**db_config)
     with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-        hashed_pw = bcrypt.hashpw(data.password.encode(), bcrypt.gensalt()).decode()
+        hashed_pw = hash_password(data.password)
 
         # ✅ 먼저 해당 코드를 가진 이메일을 찾기
         cursor.execute("""
             UPDATE user SET password = %s, update_dt = NOW() WHERE user_id = %s AND email = %s AND del_yn ='N'
         """, (hashed_pw, data.user_id, data.email,))
-        
-        conn.commit()
+    
 
         if cursor.rowcount == 0:
             raise HTTPException(status_code=400, detail="비밀번호 재설정 실패")
@@ -535,10 +508,8 @@ def idFind(data: FindRequest):
     return {"message": "비밀번호 재설정 완료!"}
 
 @router.post("/askSend")
-def askSending(data: askSend):
+def askSending(data: askSend, conn: DBSession = Depends(get_db)):
     try:
-        # DB 연결
-        conn = pymysql.connect(**db_config)
         with conn.cursor(pymysql.cursors.DictCursor) as cursor:
             cursor.execute("""
                 INSERT INTO ask (username, company, phone, position, email, category, description, create_dt, del_yn)
@@ -548,71 +519,59 @@ def askSending(data: askSend):
             ask_id = cursor.lastrowid
             link = f"{FRONT_BASE_URL}/admin/askList"
             # ✨ 알림 추가
-            cursor.execute("""
-                INSERT INTO alerts (
-                    target_user, value_id, category, title, message, link, answer_yn, create_dt, del_yn, create_id
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, 'N', NOW(), 'N', %s
-                )
-            """, (
+            add_alert(
+                conn,
                 "R03",  # 알림 받을 대상   이거받는곳 if문에 R04도 넣어서 상관없음
-                ask_id,
-                "ask",
                 "시스템 알람",
                 "새로운 문의사항이 등록되었습니다.",
                 link,
-                "client"  # 알림 보낸 사람
-            ))
-            conn.commit()
+                "client",  # 알림 보낸 사람
+                value_id=ask_id,
+                category="ask",
+                answer_yn="N",
+            )
 
         return {"message": "문의사항 작성완료"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 
 @router.get("/portfoliotest")
-def get_portfolio():
-    # DB 연결
-    conn = pymysql.connect(**db_config)
-    try:
-        with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-            # 1. 포트폴리오 전체 조회
-            cursor.execute("""
-                SELECT * FROM portfolio
-                WHERE del_yn = 'N'
-                ORDER BY create_dt ASC
-            """, ())
-            portfolios = cursor.fetchall()
-
-            # 2. 포트폴리오 ID 목록 추출
-            portfolio_ids = [p["portfolio_id"] for p in portfolios]
-
-            if not portfolio_ids:
-                return {"portfolios": []}
-
-            # 3. 관련 기술 목록 가져오기
-            format_strings = ','.join(['%s'] * len(portfolio_ids))  # 조회된 포트폴리오 id 갯수만큼 %s, %s 만들어줌
-            cursor.execute(f"""
-                SELECT ps.portfolio_id, cc.code_name, cc.code_id, cc.parent_code
-                FROM portfolio_skill ps
-                JOIN common_code cc ON ps.code_id = cc.code_id
-                WHERE ps.portfolio_id IN ({format_strings}) AND ps.del_yn = 'N'
-            """, portfolio_ids)
-            skill_rows = cursor.fetchall()
-
-            # 4. 포트폴리오 ID별로 기술 이름 묶기
-            from collections import defaultdict
-            skills_map = defaultdict(list)
-            for row in skill_rows:
-                skills_map[row["portfolio_id"]].append(row["code_name"])
-
-            # 5. tags 추가해서 결과 조립
-            for portfolio in portfolios:
-                portfolio["tags"] = skills_map.get(portfolio["portfolio_id"], [])
-
-            return {"portfolios": portfolios}
-    finally:
-        conn.close()
+def get_portfolio(conn: DBSession = Depends(get_db)):
+    with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+        # 1. 포트폴리오 전체 조회
+        cursor.execute("""
+            SELECT * FROM portfolio
+            WHERE del_yn = 'N'
+            ORDER BY create_dt ASC
+        """, ())
+        portfolios = cursor.fetchall()
+
+        # 2. 포트폴리오 ID 목록 추출
+        portfolio_ids = [p["portfolio_id"] for p in portfolios]
+
+        if not portfolio_ids:
+            return {"portfolios": []}
+
+        # 3. 관련 기술 목록 가져오기
+        format_strings = ','.join(['%s'] * len(portfolio_ids))  # 조회된 포트폴리오 id 갯수만큼 %s, %s 만들어줌
+        cursor.execute(f"""
+            SELECT ps.portfolio_id, cc.code_name, cc.code_id, cc.parent_code
+            FROM portfolio_skill ps
+            JOIN common_code cc ON ps.code_id = cc.code_id
+            WHERE ps.portfolio_id IN ({format_strings}) AND ps.del_yn = 'N'
+        """, portfolio_ids)
+        skill_rows = cursor.fetchall()
+
+        # 4. 포트폴리오 ID별로 기술 이름 묶기
+        from collections import defaultdict
+        skills_map = defaultdict(list)
+        for row in skill_rows:
+            skills_map[row["portfolio_id"]].append(row["code_name"])
+
+        # 5. tags 추가해서 결과 조립
+        for portfolio in portfolios:
+            portfolio["tags"] = skills_map.get(portfolio["portfolio_id"], [])
+
+        return {"portfolios": portfolios}
 
@@ -1,9 +1,10 @@
 import React, { useState, useEffect } from "react";
-import { Box, Grid, Paper, Typography, List, ListItem, ListItemText, useTheme, useMediaQuery, Stack } from "@mui/material";
+import { Box, Grid, Paper, Typography, List, ListItem, ListItemText, useTheme, useMediaQuery, Stack, Button } from "@mui/material";
 import GroupsIcon from "@mui/icons-material/Groups";
 import WorkspacesIcon from "@mui/icons-material/Workspaces";
 import { useNavigate } from "react-router-dom";
 import axios from "../common/axiosInstance"
+import useAlertStream from "../common/useAlertStream";
 import AlertCard from "../components/AlertCard";
 import { useAlert } from "../components/CommonAlert";
 import Tooltip from "@mui/material/Tooltip";
@@ -26,6 +27,16 @@ export default function AdminDashboard() {
   const navigate = useNavigate();
   const BASE_URL = process.env.REACT_APP_API_URL;
   const [alerts, setAlerts] = useState([]);
+  const [alertSince, setAlertSince] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+
+  // 목록을 받은 뒤부터 새 알림은 스트림으로 받아서 맨 위에 추가
+  useAlertStream({
+    enabled: alertSince !== null,
+    since: alertSince,
+    onAlert: (alert) =>
+      setAlerts((prev) => (prev.some((a) => a.alert_id === alert.alert_id) ? prev : [alert, ...prev])),
+  });
   const { showAlert } = useAlert();
 
   const theme = useTheme();
@@ -57,6 +68,8 @@ export default function AdminDashboard() {
           headers: { Authorization: `Bearer ${token}` },
         });
         setAlerts(res.data);
+        setNextCursor(res.headers["x-next-cursor"] || null);
+        setAlertSince(res.data.reduce((max, a) => Math.max(max, a.alert_id), 0));
       } catch (error) {
         if (error.response?.status !== 401) {
           console.error("알림 목록 불러오기 실패", error);
@@ -67,6 +80,21 @@ export default function AdminDashboard() {
     fetchAlerts();
   }, []);
 
+  // 이전 알림 다음 페이지 불러오기 (X-Next-Cursor)
+  const loadMoreAlerts = async () => {
+    try {
+      const token = sessionStorage.getItem("token");
+      const res = await axios.get(`${BASE_URL}/common/alerts`, {
+        params: { cursor: nextCursor },
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      setAlerts((prev) => [...prev, ...res.data.filter((a) => !prev.some((p) => p.alert_id === a.alert_id))]);
+      setNextCursor(res.headers["x-next-cursor"] || null);
+    } catch (error) {
+      console.error("알림 불러오기 실패", error);
+    }
+  };
+
   const handleCloseAlert = async (alertId) => {
     try {
       const token = sessionStorage.getItem("token");
@@ -79,6 +107,23 @@ export default function AdminDashboard() {
     }
   };
 
+  // 보이는 알림 + 아직 안 불러온 이전 알림을 한 번에 삭제
+  const handleClearAlerts = async () => {
+    try {
+      const token = sessionStorage.getItem("token");
+      await axios.put(`${BASE_URL}/common/alerts/bulk-delete`, {
+        alert_ids: alerts.map((a) => a.alert_id),
+        before: nextCursor,
+      }, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      setAlerts([]);
+      setNextCursor(null);
+    } catch (error) {
+      console.error("알림 삭제 실패", error);
+    }
+  };
+
   const cards = [
     {
       icon: <GroupsIcon sx={{ fontSize: 40, color: "#1976d2" }} />,
@@ -150,6 +195,16 @@ export default function AdminDashboard() {
           />
         )
       })}
+      {alerts.length > 0 && (
+        <Button size="small" onClick={handleClearAlerts} sx={{ mt: 1 }}>
+          알림 모두 지우기
+        </Button>
+      )}
+      {nextCursor && (
+        <Button size="small" onClick={loadMoreAlerts} sx={{ mt: 1 }}>
+          알림 더 보기
+        </Button>
+      )}
     </Box>
   );
 }
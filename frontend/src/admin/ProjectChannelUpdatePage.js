@@ -52,7 +52,7 @@ export default function ProjectChannelUpdatePage() {
             const existingImgs = (res.data.images || []).map(img => ({
                 type: "existing",
                 file_id: img.file_id,
-                previewUrl: img.previewUrl || img.file_path || img.image_url,
+                previewUrl: img.thumb_url || img.previewUrl || img.file_path || img.image_url, // 미리보기는 썸네일
             }));
             setImages(existingImgs);
         } catch (error) {
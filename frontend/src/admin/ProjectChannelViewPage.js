@@ -154,8 +154,9 @@ export default function ProjectChannelViewPage() {
                                     {images.map((img, idx) => (
                                         <img
                                             key={idx}
-                                            src={img.file_path.replace("C:/Users/admin/uploads", `${BASE_URL}/static`)}
+                                            src={img.view_url || img.file_path.replace("C:/Users/admin/uploads", `${BASE_URL}/static`)}
                                             alt={`file-${idx}`}
+                                            loading="lazy"
                                             style={{
                                                 width: '100%',
 
@@ -4,6 +4,7 @@
  * 주요 기능:
  *   - 공통 알림 리스트 조회 (/common/alerts)
  *   - 알림 삭제 처리 (/common/alerts/{id}/delete)
+ *   - 알림 모두 지우기 (/common/alerts/bulk-delete)
  *   - 알림 클릭 시 지정된 링크로 이동
  */
 
@@ -11,6 +12,7 @@ import React, { useEffect, useState } from "react";
 import { Box, Typography, Button, Paper, Grid, Chip, Skeleton, Stack, LinearProgress } from "@mui/material";
 import { useNavigate } from "react-router-dom";
 import axios from "../common/axiosInstance"
+import useAlertStream from "../common/useAlertStream";
 import AlertCard from "../components/AlertCard";
 import Folder from "../assets/folder.png"
 import MobileFullPageLayout from "../common/MobileFullPageLayout";
@@ -23,6 +25,16 @@ export default function ClientDashboard() {
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
   const [alerts, setAlerts] = useState([]);
+  const [alertSince, setAlertSince] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+
+  // 목록을 받은 뒤부터 새 알림은 스트림으로 받아서 맨 위에 추가
+  useAlertStream({
+    enabled: alertSince !== null,
+    since: alertSince,
+    onAlert: (alert) =>
+      setAlerts((prev) => (prev.some((a) => a.alert_id === alert.alert_id) ? prev : [alert, ...prev])),
+  });
 
   const categoryColors = {
     project: "#1976d2",   // 파랑 (예: 프로젝트 알림)
@@ -42,6 +54,8 @@ export default function ClientDashboard() {
           headers: { Authorization: `Bearer ${token}` },
         });
         setAlerts(res.data);
+        setNextCursor(res.headers["x-next-cursor"] || null);
+        setAlertSince(res.data.reduce((max, a) => Math.max(max, a.alert_id), 0));
       } catch (error) {
         if (error.response && error.response.status === 401) {
           alert("세션이 만료되었습니다. 다시 로그인해주세요.");
@@ -54,6 +68,21 @@ export default function ClientDashboard() {
     fetchAlerts();
   }, [navigate]);
 
+  // 이전 알림 다음 페이지 불러오기 (X-Next-Cursor)
+  const loadMoreAlerts = async () => {
+    try {
+      const token = sessionStorage.getItem("token");
+      const res = await axios.get(`${BASE_URL}/common/alerts`, {
+        params: { cursor: nextCursor },
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      setAlerts((prev) => [...prev, ...res.data.filter((a) => !prev.some((p) => p.alert_id === a.alert_id))]);
+      setNextCursor(res.headers["x-next-cursor"] || null);
+    } catch (error) {
+      console.error("알림 불러오기 실패", error);
+    }
+  };
+
   const handleCloseAlert = async (alertId) => {
     try {
       const token = sessionStorage.getItem("token");
@@ -66,6 +95,23 @@ export default function ClientDashboard() {
     }
   };
 
+  // 보이는 알림 + 아직 안 불러온 이전 알림을 한 번에 삭제
+  const handleClearAlerts = async () => {
+    try {
+      const token = sessionStorage.getItem("token");
+      await axios.put(`${BASE_URL}/common/alerts/bulk-delete`, {
+        alert_ids: alerts.map((a) => a.alert_id),
+        before: nextCursor,
+      }, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      setAlerts([]);
+      setNextCursor(null);
+    } catch (error) {
+      console.error("알림 삭제 실패", error);
+    }
+  };
+
   return (
     <MobileFullPageLayout>
       <Box sx={{ p: 2, pt: 3 }}>
@@ -104,6 +150,16 @@ export default function ClientDashboard() {
             />
           )
         })}
+        {alerts.length > 0 && (
+          <Button size="small" onClick={handleClearAlerts} sx={{ mt: 1 }}>
+            알림 모두 지우기
+          </Button>
+        )}
+        {nextCursor && (
+          <Button size="small" onClick={loadMoreAlerts} sx={{ mt: 1 }}>
+            알림 더 보기
+          </Button>
+        )}
 
 
       </Box>
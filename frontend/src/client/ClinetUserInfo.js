@@ -120,6 +120,7 @@ function ClientEditableView({ userInfo }) {
 
       showAlert("탈퇴가 완료되었습니다.");
       sessionStorage.removeItem("token");
+      sessionStorage.removeItem("refresh_token");
       navigate("/");
     } catch (err) {
       showAlert("비밀번호가 일치하지 않거나 오류 발생");
@@ -42,6 +42,7 @@ export default function LoginPage() {
 
       const token = response.data.access_token;
       sessionStorage.setItem("token", token);
+      sessionStorage.setItem("refresh_token", response.data.refresh_token);
 
       // 2. 사용자 정보 요청 (/me)
       const userRes = await axios.get(`${BASE_URL}/user/me`, {
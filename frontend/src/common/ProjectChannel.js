@@ -2,6 +2,7 @@ import { Outlet, Link, useParams, useLocation } from "react-router-dom";
 import { Box, Typography, List, ListItem, ListItemButton, ListItemText, Divider, Stack } from "@mui/material";
 import React, { useEffect, useState } from "react";
 import axios from "../common/axiosInstance";
+import useAlertStream from "./useAlertStream";
 import useMediaQuery from "@mui/material/useMediaQuery";
 import { useTheme } from "@mui/material/styles";
 
@@ -21,6 +22,11 @@ export default function ProjectChannel({ role }) {
 
   const BASE_URL = process.env.REACT_APP_API_URL;
 
+  // 개인채널에 새 글(chat 알림)이 오면 배지 갯수 다시 불러오기
+  useAlertStream({
+    onChat: () => setIsChecked(true),
+  });
+
   // 🔑 현재 로그인된 user_id 가져오기
   useEffect(() => {
     const id = sessionStorage.getItem("user_id");
@@ -64,12 +70,14 @@ export default function ProjectChannel({ role }) {
 
     if (myUserId != "" && role != "R03") {  // App.js 에서 R03, R04 체크해서 R03으로 넘김
       try {
-        const res = await axios.get(`${BASE_URL}/common/alerts/${teamMemberId}/${pmId}`, {
+        // 프로젝트 채널 배지 수를 한 번에 받아서 내 것만 사용
+        const res = await axios.get(`${BASE_URL}/common/alerts/project/${project_id}/chat-counts`, {
           headers: {
             Authorization: `Bearer ${sessionStorage.getItem("token")}`,
           },
         });
-        setAlertCount(res.data.count);
+        const mine = (res.data.counts ?? []).find((row) => row.user_id === myUserId);
+        setAlertCount(mine ? mine.pm_unread : 0);
       } catch (err) {
         console.error("알림 갯수 조회 실패", err);
       }
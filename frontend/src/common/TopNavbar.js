@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import { AppBar, Toolbar, Typography, Button, Box, Menu, MenuItem, ListItemIcon, ListItemText, Fade, Divider, IconButton, Drawer, List, ListItem, ListItemButton } from "@mui/material";
 import { Link, useNavigate, useLocation } from "react-router-dom";
+import { revokeRefreshToken } from "./axiosInstance";
 import DashboardIcon from '@mui/icons-material/Dashboard';
 import GroupIcon from '@mui/icons-material/Group';
 import CreateIcon from '@mui/icons-material/Create';
@@ -33,6 +34,7 @@ export default function TopNavbar() {
 
 
   const handleLogout = () => {
+    revokeRefreshToken();
     sessionStorage.removeItem("token");
     sessionStorage.removeItem("role");
     sessionStorage.removeItem("nickname");
@@ -1,6 +1,7 @@
 /**
  * 파일명: axiosInstance.js
- * 설명: Axios 인스턴스를 설정하고, 토큰 만료 시 자동 로그아웃 처리.
+ * 설명: Axios 인스턴스를 설정하고, 토큰 만료 시 리프레시 토큰으로 재발급 후 재요청.
+ *       재발급도 실패하면 자동 로그아웃 처리.
  * 참고: 모든 API 요청에 공통으로 사용됨
  */
 import axios from "axios";
@@ -10,9 +11,55 @@ const axiosInstance = axios.create({
   baseURL: process.env.REACT_APP_API_URL,
 });
 
+// 동시에 여러 요청이 401 을 받아도 재발급은 한 번만
+let refreshPromise = null;
+
+const refreshAccessToken = () => {
+  if (!refreshPromise) {
+    const refreshToken = sessionStorage.getItem("refresh_token");
+    refreshPromise = (refreshToken
+      ? axios.post(`${process.env.REACT_APP_API_URL}/user/refresh`, { refresh_token: refreshToken })
+      : Promise.reject(new Error("no refresh token"))
+    )
+      .then(res => {
+        sessionStorage.setItem("token", res.data.access_token);
+        sessionStorage.setItem("refresh_token", res.data.refresh_token);
+        return res.data.access_token;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
+// 로그아웃 시 서버의 리프레시 토큰 폐기 (실패해도 로그아웃은 진행)
+export const revokeRefreshToken = () => {
+  const refreshToken = sessionStorage.getItem("refresh_token");
+  sessionStorage.removeItem("refresh_token");
+  if (refreshToken) {
+    axios
+      .post(`${process.env.REACT_APP_API_URL}/user/logout`, { refresh_token: refreshToken })
+      .catch(() => {});
+  }
+};
+
+const isAuthRequest = url => /\/user\/(login|refresh|logout)$/.test(url || "");
+
 axiosInstance.interceptors.response.use(
   response => response,
-  error => {
+  async error => {
+    const original = error.config;
+    if (error.response?.status === 401 && original && !original._retry && !isAuthRequest(original.url)) {
+      original._retry = true;
+      try {
+        const token = await refreshAccessToken();
+        original.headers = { ...original.headers, Authorization: `Bearer ${token}` };
+        return axiosInstance(original);
+      } catch (e) {
+        // 재발급 실패 → 아래 로그아웃 처리
+      }
+    }
     if (error.response?.status === 401) {
       showAlertExternally("로그인 세션이 만료되었습니다. 다시 로그인해주세요.", () => {
         sessionStorage.clear();
@@ -8,7 +8,7 @@ import { useNavigate } from "react-router-dom";
 import "./HomePage.css";
 import Drawer from "@mui/material/Drawer";
 import { useMediaQuery, useTheme } from "@mui/material";
-import axios from "../axiosInstance"
+import axios, { revokeRefreshToken } from "../axiosInstance"
 import FloatingQRCode from "./FloatingQRCode";
 import HeroSlider from "./HeroSlider";
 import PortfolioVerticalSlider from "./PortfolioVerticalSlider";
@@ -39,6 +39,7 @@ export default function HomePage() {
 
 
   const handleLogout = () => {
+    revokeRefreshToken();
     sessionStorage.removeItem("token");
     sessionStorage.removeItem("role");
     sessionStorage.removeItem("nickname");
@@ -0,0 +1,63 @@
+/**
+ * 파일명: useAlertStream.js
+ * 설명: 실시간 알림 스트림(/common/alerts/stream, Server-Sent Events) 구독 훅.
+ * 주요 기능:
+ *   - 새 알림은 onAlert, 내 채널의 chat 알림은 onChat 콜백으로 전달
+ *   - since(마지막으로 받은 alert_id)를 넘기면 그 이후 놓친 알림부터 받음
+ *   - 연결이 끊기면 마지막 alert_id 기준으로 다시 연결 (토큰은 매번 sessionStorage 에서 새로 읽음)
+ *   - 재연결 시 서버가 since 앞쪽 몇 초를 겹쳐서 다시 보내므로(늦게 커밋된 알림 포함) alert_id 로 중복 제거
+ * 참고: EventSource 는 헤더를 붙일 수 없어서 토큰을 쿼리(token)로 전달
+ */
+import { useEffect, useRef } from "react";
+
+const RETRY_MS = 5000;
+const SEEN_LIMIT = 500; // 중복 제거용으로 기억하는 alert_id 개수
+
+export default function useAlertStream({ enabled = true, since = null, onAlert, onChat } = {}) {
+  const handlers = useRef({ onAlert, onChat });
+  handlers.current = { onAlert, onChat };
+
+  useEffect(() => {
+    if (!enabled || typeof EventSource === "undefined") return;
+
+    let source = null;
+    let retryTimer = null;
+    let lastId = since;
+    let stopped = false;
+    const seen = new Set();
+
+    const connect = () => {
+      const token = sessionStorage.getItem("token");
+      if (!token || stopped) return;
+
+      const params = new URLSearchParams({ token });
+      if (lastId !== null && lastId !== undefined) params.set("since", lastId);
+      source = new EventSource(`${process.env.REACT_APP_API_URL}/common/alerts/stream?${params}`);
+
+      source.addEventListener("alert", (e) => {
+        const alert = JSON.parse(e.data);
+        lastId = Math.max(lastId || 0, alert.alert_id);
+        if (seen.has(alert.alert_id)) return;
+        seen.add(alert.alert_id);
+        if (seen.size > SEEN_LIMIT) seen.delete(seen.values().next().value);
+        handlers.current.onAlert?.(alert);
+      });
+      source.addEventListener("chat", (e) => {
+        handlers.current.onChat?.(JSON.parse(e.data));
+      });
+      source.onerror = () => {
+        // 브라우저 자동 재연결이 포기한 경우(401 등)만 직접 다시 연결
+        if (source.readyState === EventSource.CLOSED && !stopped) {
+          retryTimer = setTimeout(connect, RETRY_MS);
+        }
+      };
+    };
+
+    connect();
+    return () => {
+      stopped = true;
+      clearTimeout(retryTimer);
+      source?.close();
+    };
+  }, [enabled, since]);
+}
@@ -1,7 +1,8 @@
 import React, { useState, useEffect, Component } from "react";
-import { Box, Typography, List, ListItem, ListItemText, Stack } from "@mui/material";
+import { Box, Typography, List, ListItem, ListItemText, Stack, Button } from "@mui/material";
 import { useNavigate } from "react-router-dom";
 import axios from "../common/axiosInstance"
+import useAlertStream from "../common/useAlertStream";
 import DevIcon from "../assets/dev-icon.png";
 import AlertCard from "../components/AlertCard";
 import Tooltip from "@mui/material/Tooltip";
@@ -25,6 +26,16 @@ export default function MemberDashboard() {
   const navigate = useNavigate();
   const BASE_URL = process.env.REACT_APP_API_URL;
   const [alerts, setAlerts] = useState([]);
+  const [alertSince, setAlertSince] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+
+  // 목록을 받은 뒤부터 새 알림은 스트림으로 받아서 맨 위에 추가
+  useAlertStream({
+    enabled: alertSince !== null,
+    since: alertSince,
+    onAlert: (alert) =>
+      setAlerts((prev) => (prev.some((a) => a.alert_id === alert.alert_id) ? prev : [alert, ...prev])),
+  });
 
   useEffect(() => {
     const fetchAlerts = async () => {
@@ -33,10 +44,27 @@ export default function MemberDashboard() {
         headers: { Authorization: `Bearer ${token}` },
       });
       setAlerts(res.data);
+      setNextCursor(res.headers["x-next-cursor"] || null);
+      setAlertSince(res.data.reduce((max, a) => Math.max(max, a.alert_id), 0));
     };
     fetchAlerts();
   }, []);
 
+  // 이전 알림 다음 페이지 불러오기 (X-Next-Cursor)
+  const loadMoreAlerts = async () => {
+    try {
+      const token = sessionStorage.getItem("token");
+      const res = await axios.get(`${BASE_URL}/common/alerts`, {
+        params: { cursor: nextCursor },
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      setAlerts((prev) => [...prev, ...res.data.filter((a) => !prev.some((p) => p.alert_id === a.alert_id))]);
+      setNextCursor(res.headers["x-next-cursor"] || null);
+    } catch (error) {
+      console.error("알림 불러오기 실패", error);
+    }
+  };
+
   const handleCloseAlert = async (alertId) => {
     try {
       const token = sessionStorage.getItem("token");
@@ -49,6 +77,23 @@ export default function MemberDashboard() {
     }
   };
 
+  // 보이는 알림 + 아직 안 불러온 이전 알림을 한 번에 삭제
+  const handleClearAlerts = async () => {
+    try {
+      const token = sessionStorage.getItem("token");
+      await axios.put(`${BASE_URL}/common/alerts/bulk-delete`, {
+        alert_ids: alerts.map((a) => a.alert_id),
+        before: nextCursor,
+      }, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      setAlerts([]);
+      setNextCursor(null);
+    } catch (error) {
+      console.error("알림 삭제 실패", error);
+    }
+  };
+
   return (
     <Box sx={{ p: 2, pt: 3 }}>
 
@@ -90,6 +135,16 @@ export default function MemberDashboard() {
           />
         )
       })}
+      {alerts.length > 0 && (
+        <Button size="small" onClick={handleClearAlerts} sx={{ mt: 1 }}>
+          알림 모두 지우기
+        </Button>
+      )}
+      {nextCursor && (
+        <Button size="small" onClick={loadMoreAlerts} sx={{ mt: 1 }}>
+          알림 더 보기
+        </Button>
+      )}
 
       <ListItem>
       </ListItem>
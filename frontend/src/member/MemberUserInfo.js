@@ -181,6 +181,7 @@ function EditableView({ userInfo, myId }) {
 
       showAlert("탈퇴가 완료되었습니다.");
       sessionStorage.removeItem("token");
+      sessionStorage.removeItem("refresh_token");
       sessionStorage.removeItem("user_id");
       sessionStorage.removeItem("role");
       sessionStorage.removeItem("nickname");